@@ -0,0 +1,279 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from utils.stats import percentile, summarize
+
+import asyncio
+import logging
+import random
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+policy_logger = logging.getLogger(__name__)
+
+class CallPolicyError(Exception):
+    pass
+
+class CircuitOpenError(CallPolicyError):
+    def __init__(self, stage, retry_in):
+        super().__init__(f"Circuit open, skipping {stage} (retry in {retry_in:.0f}s)")
+        self.stage = stage
+
+class StageTimeoutError(CallPolicyError, TimeoutError):
+    def __init__(self, stage, deadline):
+        super().__init__(f"{stage} exceeded its {deadline}s deadline")
+        self.stage = stage
+
+class StagePolicy:
+    """Deadline, retry and hedging settings for one kind of cloud call.
+
+    `deadline` bounds each attempt up to the response (the first streamed byte
+    for streaming calls). When `hedge_percentile` is set and at least
+    `hedge_min_samples` latencies are known, a duplicate request is sent once
+    an attempt runs longer than that percentile and the first answer wins.
+    """
+    def __init__(self, deadline, max_attempts=3, base_delay=0.5, max_delay=8.0,
+                 hedge_percentile=None, hedge_min_samples=20):
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+# Transcription and speech are idempotent, so they are hedged; a duplicate chat completion costs tokens
+DEFAULT_STAGES = {
+    'stt': StagePolicy(deadline=15.0, hedge_percentile=95),
+    'chat': StagePolicy(deadline=20.0),
+    'tts': StagePolicy(deadline=15.0, hedge_percentile=95),
+}
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive transient failures and lets one probe through after `reset_timeout`."""
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probing = False
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        """Lets another probe through after one ended without an outcome, e.g. when it was cancelled."""
+        with self._lock:
+            self._probing = False
+
+    def retry_in(self):
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                policy_logger.info("Circuit closed, cloud calls resumed")
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self.trips += 1
+                self._probing = False
+                policy_logger.warning(f"Circuit opened after {self.failures} failures, "
+                                      f"using local fallbacks for {self.reset_timeout}s")
+
+class CallPolicy:
+    """Runs cloud calls under per-stage deadlines, jittered backoff, hedging and a shared circuit breaker.
+
+    `call()` is for blocking clients and `acall()` for the asyncio loop. `request`
+    is a zero-argument callable (a coroutine function for `acall()`) that issues
+    the call; `cleanup` releases a result that lost a hedge race.
+    `is_retryable(e)` decides which errors are transient: those are retried and
+    count towards the breaker, anything else is raised straight away.
+    """
+    def __init__(self, stages=None, breaker=None, is_retryable=None, window=200, seed=None):
+        self.stages = dict(DEFAULT_STAGES)
+        self.stages.update(stages or {})
+        self.breaker = breaker or CircuitBreaker()
+        self.is_retryable = is_retryable or (lambda e: isinstance(e, TimeoutError))
+        self.window = window
+        self.latencies = {stage: deque(maxlen=window) for stage in self.stages}
+        self.hedges = {stage: 0 for stage in self.stages}
+        self.hedge_wins = {stage: 0 for stage in self.stages}
+        self._rng = random.Random(seed)
+        self._executor = None
+
+    def deadline(self, stage):
+        return self.stages[stage].deadline
+
+    def record_latency(self, stage, seconds):
+        self.latencies.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+
+    def hedge_delay(self, stage):
+        policy = self.stages[stage]
+        samples = self.latencies.get(stage, ())
+        if policy.hedge_percentile is None or len(samples) < policy.hedge_min_samples:
+            return None
+        return percentile(list(samples), policy.hedge_percentile)
+
+    def backoff(self, stage, attempt):
+        """Full jitter: a uniform delay up to the capped exponential step."""
+        policy = self.stages[stage]
+        return self._rng.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** attempt))
+
+    def latency_summary(self):
+        summary = {}
+        for stage, samples in self.latencies.items():
+            summary[stage] = summarize(list(samples))
+            summary[stage]['hedged'] = self.hedges.get(stage, 0)
+            summary[stage]['hedge_wins'] = self.hedge_wins.get(stage, 0)
+        return summary
+
+    def _check_breaker(self, stage):
+        if not self.breaker.allow():
+            raise CircuitOpenError(stage, self.breaker.retry_in())
+
+    def _failed(self, stage, attempt, e):
+        """Records a failed attempt and returns the backoff delay, or raises when the call should give up."""
+        if not self.is_retryable(e):
+            self.breaker.record_success()  # the service answered, it just refused this request
+            raise e
+        self.breaker.record_failure()
+        if attempt >= self.stages[stage].max_attempts - 1:
+            raise e
+        delay = self.backoff(stage, attempt)
+        policy_logger.warning(f"{stage} attempt {attempt + 1} failed ({e}), retrying in {delay:.2f}s")
+        return delay
+
+    def _succeeded(self, stage, started):
+        self.record_latency(stage, time.perf_counter() - started)
+        self.breaker.record_success()
+
+    def call(self, stage, request, cleanup=None):
+        for attempt in range(self.stages[stage].max_attempts):
+            self._check_breaker(stage)
+            started = time.perf_counter()
+            try:
+                result = self._hedged(stage, request, cleanup)
+            except Exception as e:
+                time.sleep(self._failed(stage, attempt, e))
+                continue
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            self._succeeded(stage, started)
+            return result
+
+    async def acall(self, stage, request, cleanup=None):
+        policy = self.stages[stage]
+        for attempt in range(policy.max_attempts):
+            self._check_breaker(stage)
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(self._ahedged(stage, request, cleanup), policy.deadline)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    e = StageTimeoutError(stage, policy.deadline)
+                await asyncio.sleep(self._failed(stage, attempt, e))
+                continue
+            except BaseException:
+                # A cancelled probe (barge-in, a lost hedge) must not leave the breaker half open for good
+                self.breaker.release_probe()
+                raise
+            self._succeeded(stage, started)
+            return result
+
+    def _submit(self, request):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="call-policy")
+        return self._executor.submit(request)
+
+    def _hedged(self, stage, request, cleanup):
+        deadline = self.stages[stage].deadline
+        expires = time.monotonic() + deadline
+        first = self._submit(request)
+        pending = {first}
+        try:
+            hedge_after = self.hedge_delay(stage)
+            if hedge_after is not None and hedge_after < deadline:
+                done, _ = wait_futures(pending, timeout=hedge_after)
+                if not done:
+                    self.hedges[stage] += 1
+                    pending.add(self._submit(request))
+
+            while pending:
+                done, pending = wait_futures(pending, timeout=max(0.0, expires - time.monotonic()),
+                                             return_when=FIRST_COMPLETED)
+                if not done:
+                    raise StageTimeoutError(stage, deadline)
+                winner = self._pick_winner(stage, first, done, pending, cleanup)
+                if winner is not None:
+                    return winner.result()
+        finally:
+            for future in pending:
+                future.cancel()
+                future.add_done_callback(lambda f: self._discard(f, cleanup))
+
+    async def _ahedged(self, stage, request, cleanup):
+        first = asyncio.ensure_future(request())
+        pending = {first}
+        try:
+            hedge_after = self.hedge_delay(stage)
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(pending, timeout=hedge_after)
+                if not done:
+                    self.hedges[stage] += 1
+                    pending.add(asyncio.ensure_future(request()))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = self._pick_winner(stage, first, done, pending, cleanup)
+                if winner is not None:
+                    return winner.result()
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(lambda t: self._discard(t, cleanup))
+
+    def _pick_winner(self, stage, first, done, pending, cleanup):
+        """Returns the first successful future, or the failed one once nothing else is in flight."""
+        succeeded = [future for future in done if future.exception() is None]
+        if not succeeded:
+            return None if pending else next(iter(done))
+
+        winner = succeeded[0]
+        for loser in succeeded[1:]:
+            self._discard(loser, cleanup)
+        if winner is not first:
+            self.hedge_wins[stage] += 1
+        return winner
+
+    def _discard(self, future, cleanup):
+        if cleanup is None or future.cancelled() or future.exception() is not None:
+            return
+        try:
+            result = cleanup(future.result())
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result)
+        except Exception as e:
+            policy_logger.debug(f"Failed to release a hedged result: {e}")
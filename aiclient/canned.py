@@ -0,0 +1,106 @@
+from enum import Enum
+from utils.define import CANNED_AUDIO_DIR
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+
+logging.basicConfig(level=logging.INFO)
+canned_logger = logging.getLogger(__name__)
+
+class CannedResponse(str, Enum):
+    LOW_CONFIDENCE = 'low_confidence'
+    NO_SPEECH = 'no_speech'
+    STT_ERROR = 'stt_error'
+    QUOTA_EXCEEDED = 'quota_exceeded'
+    RATE_LIMITED = 'rate_limited'
+    API_ERROR = 'api_error'
+    OFFLINE = 'offline'
+
+# response id -> (spoken text, whether the conversation should end after it)
+CANNED_RESPONSES = {
+    CannedResponse.LOW_CONFIDENCE: ("申し訳ありません。音声をはっきりと聞き取れませんでした。もう一度お話しいただけますか？", False),
+    CannedResponse.NO_SPEECH: ("音声が検出できませんでした。もう一度お話しください。", False),
+    CannedResponse.STT_ERROR: ("音声の認識に問題が発生しました。もう一度お試しください。", False),
+    CannedResponse.QUOTA_EXCEEDED: ("申し訳ありません。現在システムに問題が発生しています。後でもう一度お試しください。", True),
+    CannedResponse.RATE_LIMITED: ("申し訳ありません。しばらくしてからもう一度お試しください。", True),
+    CannedResponse.API_ERROR: ("申し訳ありません。エラーが発生しました。", False),
+    CannedResponse.OFFLINE: ("申し訳ありません。ただいまサーバーにつながりません。しばらくしてからもう一度お話しください。", True),
+}
+
+class CannedResponsePack:
+    """Registry of pre-rendered audio for the fixed error and fallback replies.
+
+    The audio is rendered once at install time (`python -m aiclient.canned`) so the
+    error paths can answer locally, without touching the network.
+    """
+    def __init__(self, pack_dir=CANNED_AUDIO_DIR, responses=CANNED_RESPONSES):
+        self.pack_dir = pack_dir
+        self.responses = dict(responses)
+
+    def text(self, response_id):
+        return self.responses[response_id][0]
+
+    def ends_conversation(self, response_id):
+        return self.responses[response_id][1]
+
+    @staticmethod
+    def _name(response_id):
+        # CannedResponse members and plain string ids (e.g. local intent replies) share the pack
+        return response_id.value if isinstance(response_id, Enum) else str(response_id)
+
+    def _path(self, response_id):
+        return os.path.join(self.pack_dir, f"{self._name(response_id)}.wav")
+
+    def audio_path(self, response_id):
+        path = self._path(response_id)
+        return path if os.path.exists(path) else None
+
+    def missing(self):
+        return [response_id for response_id in self.responses if self.audio_path(response_id) is None]
+
+    def build(self, synthesize, force=False):
+        """Renders every missing response with `synthesize(text, output_file) -> (audio_path, track)`."""
+        os.makedirs(self.pack_dir, exist_ok=True)
+        targets = list(self.responses) if force else self.missing()
+
+        for response_id in targets:
+            fd, temp_path = tempfile.mkstemp(suffix='.wav', dir=self.pack_dir)
+            os.close(fd)
+            try:
+                audio_path, _ = synthesize(self.text(response_id), temp_path)
+                if audio_path != temp_path:
+                    shutil.copyfile(audio_path, temp_path)
+                os.replace(temp_path, self._path(response_id))
+                canned_logger.info(f"Rendered canned response '{self._name(response_id)}'")
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        return len(targets)
+
+async def _build_pack():
+    from aiclient.conversation import AsyncConversationClient
+
+    # The client's pack also lists the local intent replies
+    client = AsyncConversationClient()
+    pack = client.canned
+    loop = asyncio.get_running_loop()
+
+    def synthesize(text, output_file):
+        return asyncio.run_coroutine_threadsafe(client.synthesize_speech(text, output_file), loop).result()
+
+    try:
+        # build() blocks on each synthesis, so it runs off the loop that performs them
+        rendered = await asyncio.to_thread(pack.build, synthesize)
+    finally:
+        await client.aclose()
+    canned_logger.info(f"Canned response pack ready in {pack.pack_dir} ({rendered} rendered)")
+
+def main():
+    asyncio.run(_build_pack())
+
+if __name__ == "__main__":
+    main()
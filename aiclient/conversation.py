@@ -1,210 +1,572 @@
+from aiclient.call_policy import CallPolicy, CallPolicyError, CircuitOpenError
+from aiclient.canned import CANNED_RESPONSES, CannedResponse, CannedResponsePack
+from aiclient.history import ConversationHistory
+from aiclient.intent import IntentRouter
+from aiclient.tts_cache import TTSCache
+from display.lipsync import LipSyncTrack
 from utils.define import *
-from openai import OpenAI, OpenAIError
-from typing import List, Dict
+from utils.tracing import NULL_TRACE
+from openai import APIConnectionError, AsyncOpenAI, DefaultAsyncHttpxClient, InternalServerError, OpenAIError
+from pathlib import Path
+from typing import AsyncIterator, List, Dict
 
+import asyncio
+import httpx
 import logging
 import os
+import re
 import time
 
 logging.basicConfig(level=logging.INFO)
 openai_logger = logging.getLogger(__name__)
 
-class ConversationClient:
+END_OF_CONVERSATION_TAG = '[END_OF_CONVERSATION]'
+
+# A sentence ends at one or more Japanese/ASCII terminators (or a line break)
+_SENTENCE_PATTERN = re.compile(r'[^。！？!?\n]*[。！？!?\n]+')
+
+_STT_PROMPT = (
+    "これは日常会話の文脈です。一般的な挨拶、仕事、生活、健康などについての会話が含まれています。"
+    "「仕事」「安心」「大丈夫」「はい」「いいえ」などの一般的な言葉が使用される可能性が高いです。"
+)
+
+# One pool per process: every async client shares the same keep-alive connections to the API
+_async_http_client = None
+
+def split_sentences(buffer: str) -> tuple[List[str], str]:
+    sentences = []
+    end = 0
+    for match in _SENTENCE_PATTERN.finditer(buffer):
+        sentence = match.group().strip()
+        if sentence:
+            sentences.append(sentence)
+        end = match.end()
+    return sentences, buffer[end:]
+
+def _error_code(e: OpenAIError):
+    return getattr(getattr(e, 'error', None), 'code', None) or getattr(e, 'code', None) or getattr(e, 'type', None)
+
+def _is_transient(e: Exception) -> bool:
+    """Errors worth retrying: timeouts, connection failures, server errors and rate limits (not quota)."""
+    if isinstance(e, (TimeoutError, APIConnectionError, InternalServerError)):
+        return True
+    return isinstance(e, OpenAIError) and _error_code(e) == 'rate_limit_exceeded'
+
+def shared_async_http_client():
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        _async_http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=120),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+    return _async_http_client
+
+class PreparedReply:
+    """A reply generated ahead of time: its text and audio, held in memory and not yet in the history."""
+    def __init__(self, prompt: str, reply_text: str, audio: List[bytes], ended: bool):
+        self.prompt = prompt
+        self.reply_text = reply_text
+        self.audio = audio
+        self.ended = ended
+        self.created_at = time.monotonic()
+
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+class BaseConversationClient:
+    """Conversation state and request shaping, independent of how the requests are sent."""
     def __init__(self):
-        self.client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-        self.conversation_history: List[Dict[str, str]] = []
-        self.max_retries = 3
-        self.retry_delay = 5 
+        # Deadlines, retries, hedging and the circuit breaker for every cloud call
+        self.call_policy = CallPolicy(is_retryable=_is_transient)
+        self.tts_concurrency = 2
+        self.tts_cache = TTSCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+        self.intent_router = IntentRouter.from_file(INTENTS_FILE)
+        self.canned = CannedResponsePack(responses={**CANNED_RESPONSES, **self.intent_router.responses()})
+        if self.canned.missing():
+            openai_logger.warning("Canned response pack is incomplete; run `python -m aiclient.canned` to render it")
         self.audio_player = None
         self.gptContext = {"role": "system", "content": """あなたは役立つアシスタントです。日本語で返答してください。
             ユーザーが薬を飲んだかどうか一度だけぜひ確認してください。確認後は、他の話題に移ってください。
             会話が自然に終了したと判断した場合は、返答の最後に '[END_OF_CONVERSATION]' というタグを付けてください。
             ただし、ユーザーがさらに質問や話題を提供する場合は会話を続けてください。"""
         }
+        self.history = ConversationHistory(self.gptContext, max_prompt_tokens=1200, max_summary_tokens=200)
+        self.prompt_token_log: List[Dict[str, int]] = []
 
     def setAudioPlayer(self, audioPlayer):
         self.audio_player = audioPlayer
 
-    def generate_ai_reply(self, new_message: str) -> str:
-        for attempt in range(self.max_retries):
-            try:
-                if not self.conversation_history:
-                    self.conversation_history = [self.gptContext]
-
-                self.conversation_history.append({"role": "user", "content": new_message})
-
-                response = self.client.chat.completions.create(
-                    model="gpt-4",
-                    messages=self.conversation_history,
-                    temperature=0.75,
-                    max_tokens=500
-                )
-                ai_message = response.choices[0].message.content
-                self.conversation_history.append({"role": "assistant", "content": ai_message})
-
-                # Limit conversation history to last 10 messages to prevent token limit issues
-                if len(self.conversation_history) > 11:  # 11 to keep the system message
-                    self.conversation_history = self.conversation_history[:1] + self.conversation_history[-10:]
-
-                return ai_message
-            except OpenAIError as e:
-                error_code = getattr(getattr(e, 'error', None), 'code', None) or getattr(e, 'type', None)
-                if error_code == 'insufficient_quota':
-                    openai_logger.error("OpenAI API quota exceeded. Please check your plan and billing details.")
-                    return "申し訳ありません。現在システムに問題が発生しています。後でもう一度お試しください。"
-                elif error_code == 'rate_limit_exceeded':
-                    if attempt < self.max_retries - 1:
-                        openai_logger.warning(f"Rate limit exceeded. Retrying in {self.retry_delay} seconds...")
-                        time.sleep(self.retry_delay)
-                    else:
-                        openai_logger.error("Max retries reached. Unable to complete the request.")
-                        return "申し訳ありません。しばらくしてからもう一度お試しください。"
-                else:
-                    openai_logger.error(f"OpenAI API error: {e}")
-                    return "申し訳ありません。エラーが発生しました。"
-
-    def speech_to_text(self, audio_file_path: str) -> str:
+    def _canned_audio(self, response_id: CannedResponse) -> str:
+        """Resolves a canned response to local audio: the installed pack, then the TTS cache, then ErrorAudio."""
+        audio_path = self.canned.audio_path(response_id)
+        if audio_path is None:
+            request = self._speech_request(self.canned.text(response_id))
+            audio_path = self.tts_cache.get(self.tts_cache.key_for_request(request))
+        if audio_path is None:
+            openai_logger.warning(f"Canned response '{response_id.value}' is not rendered, playing ErrorAudio")
+            audio_path = ErrorAudio
+        return audio_path
+
+    def _route_intent(self, transcript: str):
+        """The local intent answering `transcript`, if its reply audio is already on disk."""
+        return self.intent_router.route(
+            transcript, self.history.last_message("assistant"),
+            available=lambda intent: self.canned.audio_path(intent.response_id) is not None)
+
+    def _begin_intent_reply(self, transcript: str, intent, trace) -> str:
+        self.history.append("user", transcript)
+        self.history.append("assistant", intent.response)
+        trace.annotate(intent=intent.name)
+        return self.canned.audio_path(intent.response_id)
+
+    def _canned_result(self, response_id: CannedResponse):
+        return self._canned_audio(response_id), None
+
+    def _transcription_request(self, audio_file):
+        return dict(
+            model="whisper-1",
+            file=audio_file,
+            response_format="verbose_json",
+            language="ja",
+            temperature=0.0,
+            prompt=_STT_PROMPT,
+        )
+
+    def _chat_request(self, messages=None):
+        return dict(
+            model="gpt-4",
+            messages=messages if messages is not None else self.history.messages(),
+            temperature=0.75,
+            max_tokens=500,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+    def _speech_request(self, text: str):
+        return dict(
+            model="tts-1-hd",
+            voice="nova",
+            input=text,
+            response_format="wav",
+        )
+
+    def _cached_speech(self, request):
+        """Returns the cache key for a speech request and the cached audio path, if any."""
+        key = self.tts_cache.key_for_request(request)
+        cached_path = self.tts_cache.get(key)
+        if cached_path is not None:
+            openai_logger.info(f"TTS cache hit for '{request['input']}' (hit rate {self.tts_cache.hit_rate():.0%})")
+        return key, cached_path
+
+    def _store_speech(self, key, output_file):
         try:
-            openai_logger.info(f"Processing speech audio file: {audio_file_path}")
-            
-            with open(audio_file_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="verbose_json",  
-                    language="ja",
-                    temperature=0.0,
-                    prompt=(
-                        "これは日常会話の文脈です。一般的な挨拶、仕事、生活、健康などについての会話が含まれています。"
-                        "「仕事」「安心」「大丈夫」「はい」「いいえ」などの一般的な言葉が使用される可能性が高いです。"
-                    ),
-                )
-
-                if hasattr(transcript, 'segments') and transcript.segments:
-                    segment = transcript.segments[0]
-                    quality_info = {
-                        'avg_logprob': segment.avg_logprob,
-                        'no_speech_prob': segment.no_speech_prob,
-                        'compression_ratio': segment.compression_ratio
-                    }
-                    # openai_logger.info(f"Transcription quality metrics: {quality_info}")
-                    
-                    # Evaluate transcription quality
-                    if segment.avg_logprob < -1.0:
-                        openai_logger.warning(f"Very low confidence transcription detected: {quality_info}")
-                        return "申し訳ありません。音声をはっきりと聞き取れませんでした。もう一度お話しいただけますか？"
-                    
-                    if segment.no_speech_prob > 0.5:
-                        openai_logger.warning(f"Possible no speech detected: {quality_info}")
-                        return "音声が検出できませんでした。もう一度お話しください。"
-
-                # Extract and return the transcribed text
-                if hasattr(transcript, 'text'):
-                    transcribed_text = transcript.text.strip()
-                    return transcribed_text
-                else:
-                    raise ValueError("No text found in transcription response")
+            self.tts_cache.put(key, output_file)
+        except OSError as e:
+            openai_logger.warning(f"Failed to cache synthesized speech: {e}")
+
+    def _evaluate_transcript(self, transcript) -> str | CannedResponse:
+        if hasattr(transcript, 'segments') and transcript.segments:
+            segment = transcript.segments[0]
+            quality_info = {
+                'avg_logprob': segment.avg_logprob,
+                'no_speech_prob': segment.no_speech_prob,
+                'compression_ratio': segment.compression_ratio
+            }
+            # openai_logger.info(f"Transcription quality metrics: {quality_info}")
+
+            # Evaluate transcription quality
+            if segment.avg_logprob < -1.0:
+                openai_logger.warning(f"Very low confidence transcription detected: {quality_info}")
+                return CannedResponse.LOW_CONFIDENCE
+
+            if segment.no_speech_prob > 0.5:
+                openai_logger.warning(f"Possible no speech detected: {quality_info}")
+                return CannedResponse.NO_SPEECH
+
+        # Extract and return the transcribed text
+        if hasattr(transcript, 'text'):
+            return transcript.text.strip()
+        raise ValueError("No text found in transcription response")
+
+    def _chat_error_reply(self, e: Exception) -> CannedResponse:
+        """Returns the canned reply for a chat request that failed under the call policy."""
+        if isinstance(e, CircuitOpenError):
+            openai_logger.warning(f"{e}; answering offline")
+            return CannedResponse.OFFLINE
+        error_code = _error_code(e) if isinstance(e, OpenAIError) else None
+        if error_code == 'insufficient_quota':
+            openai_logger.error("OpenAI API quota exceeded. Please check your plan and billing details.")
+            return CannedResponse.QUOTA_EXCEEDED
+        elif error_code == 'rate_limit_exceeded':
+            openai_logger.error("Max retries reached. Unable to complete the request.")
+            return CannedResponse.RATE_LIMITED
+        openai_logger.error(f"OpenAI API error: {e}")
+        return CannedResponse.API_ERROR
+
+    def _stt_error_reply(self, e: Exception) -> CannedResponse:
+        if isinstance(e, CircuitOpenError):
+            openai_logger.warning(f"{e}; answering offline")
+            return CannedResponse.OFFLINE
+        openai_logger.error(f"OpenAI API error during transcription: {str(e)}")
+        return CannedResponse.STT_ERROR
+
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        return self.history.messages()
+
+    def _begin_reply(self, new_message: str):
+        self.history.append("user", new_message)
+        self.prompt_token_log = self.prompt_token_log[-99:] + [{'estimated': self.history.prompt_tokens()}]
+
+    def _record_usage(self, usage):
+        if usage is None or not self.prompt_token_log:
+            return
+        entry = self.prompt_token_log[-1]
+        entry['reported'] = usage.prompt_tokens
+        openai_logger.info(f"Prompt tokens: {usage.prompt_tokens} reported, {entry['estimated']} estimated "
+                           f"(budget {self.history.max_prompt_tokens}, {len(self.history)} messages kept)")
+
+    def _finish_reply(self, ai_message: str):
+        if ai_message:
+            self.history.append("assistant", ai_message)
+
+    def _preview_messages(self, new_message: str) -> List[Dict[str, str]]:
+        """The prompt `new_message` would be sent with, without adding it to the history."""
+        return self.history.messages() + [{"role": "user", "content": new_message}]
+
+    def _commit_prepared(self, prepared: 'PreparedReply'):
+        self._begin_reply(prepared.prompt)
+        self._finish_reply(prepared.reply_text)
+
+    def _prepared_sentences(self, reply_text: str) -> tuple[List[str], bool]:
+        sentences, remainder = split_sentences(reply_text)
+        if remainder.strip():
+            sentences.append(remainder.strip())
+
+        spoken = []
+        conversation_ended = False
+        for sentence in sentences:
+            sentence, ended = self._strip_end_tag(sentence)
+            conversation_ended = conversation_ended or ended
+            if sentence:
+                spoken.append(sentence)
+        return spoken, conversation_ended
+
+    def _reply_text(self, sentence: str | CannedResponse) -> str:
+        return self.canned.text(sentence) if isinstance(sentence, CannedResponse) else sentence
+
+    def _strip_end_tag(self, sentence: str) -> tuple[str, bool]:
+        if END_OF_CONVERSATION_TAG in sentence:
+            return sentence.replace(END_OF_CONVERSATION_TAG, '').strip(), True
+        return sentence, False
+
+    def _interrupted_reply(self, trace, last_played: str) -> tuple[bool, str]:
+        # The user is already talking, so the conversation goes on whatever the reply said
+        openai_logger.info("Reply interrupted by the user")
+        trace.annotate(barge_in=True)
+        return False, last_played
+
+    def _response_base(self, input_audio_file: str) -> str:
+        base, _ = os.path.splitext(input_audio_file)
+        return f"{base}_response"
+
+class AsyncConversationClient(BaseConversationClient):
+    """Conversation client for the asyncio loop: no call blocks the loop while waiting on the network."""
+    def __init__(self, base_url=None, http_client=None):
+        super().__init__()
+        self.http_client = http_client or shared_async_http_client()
+        self.client = AsyncOpenAI(
+            api_key=os.environ["OPENAI_API_KEY"],
+            base_url=base_url or os.environ.get("OPENAI_BASE_URL"),
+            http_client=self.http_client,
+            max_retries=0,  # retries are left to the call policy
+        )
+
+    async def aclose(self):
+        openai_logger.info(f"Cloud call latencies: {self.call_policy.latency_summary()}")
+        openai_logger.info(f"Local intent router: {self.intent_router.stats()}")
+        await self.client.close()
+
+    async def generate_ai_reply(self, new_message: str) -> str:
+        return "".join([self._reply_text(sentence) async for sentence in self.stream_ai_reply(new_message)])
+
+    async def _create_chat_stream(self, messages=None):
+        request = self._chat_request(messages)
+        try:
+            return await self.call_policy.acall(
+                'chat',
+                lambda: self.client.chat.completions.create(**request, timeout=self.call_policy.deadline('chat')),
+                cleanup=lambda stream: stream.close())
+        except (OpenAIError, CallPolicyError) as e:
+            return self._chat_error_reply(e)
+
+    async def stream_ai_reply(self, new_message: str, trace=NULL_TRACE) -> AsyncIterator[str]:
+        """Yields the reply sentence by sentence while the completion is still streaming."""
+        self._begin_reply(new_message)
+
+        stream = await self._create_chat_stream()
+        if isinstance(stream, CannedResponse):
+            yield stream
+            return
 
+        reply_parts = []
+        buffer = ""
+        try:
+            async for chunk in stream:
+                self._record_usage(getattr(chunk, 'usage', None))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    trace.mark('first_llm_token')
+                reply_parts.append(delta)
+                buffer += delta
+
+                sentences, buffer = split_sentences(buffer)
+                for sentence in sentences:
+                    yield sentence
         except OpenAIError as e:
-            error_msg = f"OpenAI API error during transcription: {str(e)}"
-            openai_logger.error(error_msg)
-            return "音声の認識に問題が発生しました。もう一度お試しください。"
+            openai_logger.error(f"OpenAI API error while streaming reply: {e}")
+        finally:
+            trace.mark('llm_done')
+            self._finish_reply("".join(reply_parts))
+
+        if buffer.strip():
+            yield buffer.strip()
+
+    async def speech_to_text(self, audio_file_path: str, trace=NULL_TRACE) -> str | CannedResponse:
+        try:
+            openai_logger.info(f"Processing speech audio file: {audio_file_path}")
+
+            audio_bytes = await asyncio.to_thread(Path(audio_file_path).read_bytes)
+            audio_file = (os.path.basename(audio_file_path), audio_bytes)
+            request = self._transcription_request(audio_file)
+            trace.mark('upload_start')
+            transcript = await self.call_policy.acall(
+                'stt', lambda: self.client.audio.transcriptions.create(**request, timeout=self.call_policy.deadline('stt')))
+            trace.mark('transcript_ready')
+            return self._evaluate_transcript(transcript)
+
+        except (OpenAIError, CallPolicyError) as e:
+            return self._stt_error_reply(e)
         except Exception as e:
-            error_msg = f"Unexpected error during transcription: {str(e)}"
-            openai_logger.error(error_msg)
-            return "音声の認識に問題が発生しました。もう一度お試しください。"
+            openai_logger.error(f"Unexpected error during transcription: {str(e)}")
+            return CannedResponse.STT_ERROR
+
+    async def synthesize_speech(self, text: str, output_file: str, trace=NULL_TRACE):
+        """Returns the audio path for `text` and its lip-sync track, streaming into `output_file` on a cache miss."""
+        request = self._speech_request(text)
+        key, cached_path = self._cached_speech(request)
+        if cached_path is not None:
+            trace.mark('first_tts_byte')
+            return cached_path, None
+
+        response = await self.call_policy.acall(
+            'tts',
+            lambda: self.client.audio.speech.with_streaming_response.create(
+                **request, timeout=self.call_policy.deadline('tts')).__aenter__(),
+            cleanup=lambda response: response.close())
+
+        lipsync_track = LipSyncTrack()
+        try:
+            with open(output_file, "wb") as f:
+                async for chunk in response.iter_bytes(chunk_size=4096):
+                    trace.mark('first_tts_byte')
+                    f.write(chunk)
+                    lipsync_track.feed(chunk)
+        finally:
+            await response.close()
+        lipsync_track.finish()
+        openai_logger.info(f"Successfully wrote audio to {output_file}")
+        await asyncio.to_thread(self._store_speech, key, output_file)
+        return output_file, lipsync_track
 
-    def text_to_speech(self, text: str, output_file: str):
+    async def text_to_speech(self, text: str, output_file: str):
         try:
-            response = self.client.audio.speech.create(
-                model="tts-1-hd",
-                voice="nova",
-                input=text,
-                response_format="wav",
-            )
-
-            # Write the audio file
+            audio_file, lipsync_track = await self.synthesize_speech(text, output_file)
+            await self.audio_player.sync_audio_and_gif_async(audio_file, SpeakingGif, track=lipsync_track)
+        except Exception as e:
+            openai_logger.error(f"Error in text_to_speech: {e}")
+            await self.audio_player.sync_audio_and_gif_async(ErrorAudio, SpeakingGif)
+
+    async def play_canned(self, response_id: CannedResponse, trace=NULL_TRACE) -> bool:
+        """Plays a canned response from local audio and returns whether it ends the conversation."""
+        trace.annotate(canned=response_id.value)
+        audio_path = await asyncio.to_thread(self._canned_audio, response_id)
+        trace.mark('playback_start')
+        await self.audio_player.sync_audio_and_gif_async(audio_path, SpeakingGif)
+        trace.mark('playback_end')
+        return self.canned.ends_conversation(response_id)
+
+    async def prepare_reply(self, new_message: str, output_base: str) -> PreparedReply | None:
+        """Generates the reply to `new_message` and its audio without playing it or touching the history.
+
+        Returns None when the API answers with an error, so the caller falls back to a live turn.
+        """
+        stream = await self._create_chat_stream(self._preview_messages(new_message))
+        if isinstance(stream, CannedResponse):
+            return None
+
+        reply_parts = []
+        async for chunk in stream:
+            if chunk.choices:
+                reply_parts.append(chunk.choices[0].delta.content or "")
+        reply_text = "".join(reply_parts)
+        sentences, ended = self._prepared_sentences(reply_text)
+
+        tts_slots = asyncio.Semaphore(self.tts_concurrency)
+
+        async def render(sentence, output_file):
+            async with tts_slots:
+                audio_file, _ = await self.synthesize_speech(sentence, output_file)
+            return await asyncio.to_thread(Path(audio_file).read_bytes)
+
+        audio = await asyncio.gather(*(render(sentence, f"{output_base}_{index}.wav")
+                                       for index, sentence in enumerate(sentences)))
+        return PreparedReply(new_message, reply_text, list(audio), ended)
+
+    async def play_prepared(self, prepared: PreparedReply, output_base: str = None, trace=NULL_TRACE) -> tuple[bool, str]:
+        """Plays a reply from prepare_reply() and records it in the history as if it had just been generated."""
+        self._commit_prepared(prepared)
+        output_base = output_base or self._response_base(AIOutputAudio)
+
+        last_played = None
+        for index, audio in enumerate(prepared.audio):
+            output_file = f"{output_base}_{index}.wav"
             try:
-                with open(output_file, "wb") as f:
-                    for chunk in response.iter_bytes(chunk_size=4096):
-                        f.write(chunk)
-                openai_logger.info(f"Successfully wrote audio to {output_file}")
+                await asyncio.to_thread(Path(output_file).write_bytes, audio)
+                trace.mark('playback_start')
+                playback = await self.audio_player.sync_audio_and_gif_async(output_file, SpeakingGif)
+                last_played = output_file
             except Exception as e:
-                openai_logger.error(f"Failed to write audio file: {e}")
-                self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
-                return
+                openai_logger.error(f"Failed to play prepared audio: {e}")
+                continue
+            if playback.interrupted:
+                trace.mark('playback_end')
+                return self._interrupted_reply(trace, last_played)
+        trace.mark('playback_end')
+
+        if last_played is None:
+            openai_logger.error("No prepared response audio played")
+            await self.audio_player.sync_audio_and_gif_async(ErrorAudio, SpeakingGif)
+            return prepared.ended, ErrorAudio
+        return prepared.ended, last_played
+
+    async def play_intent(self, transcript: str, intent, trace=NULL_TRACE) -> bool:
+        """Answers a locally routed utterance from its pre-rendered reply; returns whether it ends the conversation."""
+        audio_path = self._begin_intent_reply(transcript, intent, trace)
+        trace.mark('playback_start')
+        await self.audio_player.sync_audio_and_gif_async(audio_path, SpeakingGif)
+        trace.mark('playback_end')
+        return intent.ends_conversation
+
+    async def speak_reply_stream(self, sentences: AsyncIterator[str], output_base: str, trace=NULL_TRACE) -> tuple[bool, str]:
+        """Synthesizes sentences concurrently (bounded by tts_concurrency) and plays them in order.
+
+        The first sentence starts playing while later ones are still being generated.
+        Returns whether the reply carried the end-of-conversation tag and the last file played.
+        """
+        pending = asyncio.Queue()
+        tts_slots = asyncio.Semaphore(self.tts_concurrency)
+        state = {'ended': False}
+
+        async def synthesize(sentence, output_file):
+            async with tts_slots:
+                return await self.synthesize_speech(sentence, output_file, trace)
+
+        async def produce():
+            try:
+                index = 0
+                async for sentence in sentences:
+                    if isinstance(sentence, CannedResponse):
+                        trace.annotate(canned=sentence.value)
+                        state['ended'] = state['ended'] or self.canned.ends_conversation(sentence)
+                        pending.put_nowait(asyncio.create_task(asyncio.to_thread(self._canned_result, sentence)))
+                        continue
+                    sentence, ended = self._strip_end_tag(sentence)
+                    state['ended'] = state['ended'] or ended
+                    if not sentence:
+                        continue
+                    openai_logger.info(f"AI response sentence: {sentence}")
+                    output_file = f"{output_base}_{index}.wav"
+                    pending.put_nowait(asyncio.create_task(synthesize(sentence, output_file)))
+                    index += 1
+            except Exception as e:
+                openai_logger.error(f"Error while generating reply: {e}")
+            finally:
+                pending.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+
+        last_played = None
+        interrupted = False
+        while (item := await pending.get()) is not None:
+            if interrupted:
+                item.cancel()
+                continue
+            try:
+                audio_file, lipsync_track = await item
+            except Exception as e:
+                openai_logger.error(f"Text-to-speech failed: {e}")
+                continue
 
-            # Play the audio file
             try:
-                self.audio_player.sync_audio_and_gif(output_file, SpeakingGif)
+                trace.mark('playback_start')
+                playback = await self.audio_player.sync_audio_and_gif_async(audio_file, SpeakingGif, track=lipsync_track)
+                last_played = audio_file
+                if playback.interrupted:
+                    # Stop reading the chat stream; the partial reply stays in the history
+                    interrupted = True
+                    producer.cancel()
             except Exception as e:
                 openai_logger.error(f"Failed to play audio: {e}")
-                self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
 
-        except OpenAIError as e:
-            openai_logger.error(f"Failed to generate speech: {e}")
-            self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
-        except Exception as e:
-            openai_logger.error(f"Unexpected error in text_to_speech: {e}")
-            self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
+        await asyncio.gather(producer, return_exceptions=True)
+        trace.mark('playback_end')
 
-    def process_audio(self, input_audio_file: str) -> bool:
-        try:
-            # Generate output filename
-            base, ext = os.path.splitext(input_audio_file)
-            output_audio_file = f"{base}_response{ext}"
+        if interrupted:
+            return self._interrupted_reply(trace, last_played)
+
+        if last_played is None:
+            openai_logger.error("No AI response audio generated")
+            await self.audio_player.sync_audio_and_gif_async(ErrorAudio, SpeakingGif)
+            return state['ended'], ErrorAudio
+
+        openai_logger.info(f"Conversation ended: {state['ended']}")
+        return state['ended'], last_played
 
-            # Speech-to-Text
-            stt_text = self.speech_to_text(input_audio_file)
+    async def respond(self, stt_text: str | CannedResponse, input_audio_file: str, trace=NULL_TRACE) -> bool:
+        """Answers a transcript from speech_to_text(); returns whether the conversation ended."""
+        try:
             openai_logger.info(f"Transcript: {stt_text}")
+            if isinstance(stt_text, CannedResponse):
+                return await self.play_canned(stt_text, trace)
+
+            # Short, predictable replies are answered without the LLM
+            intent = self._route_intent(stt_text)
+            if intent is not None:
+                return await self.play_intent(stt_text, intent, trace)
 
-            # LLM
-            content_response = self.generate_ai_reply(stt_text)
-            conversation_ended = '[END_OF_CONVERSATION]' in content_response
-            content_response = content_response.replace('[END_OF_CONVERSATION]', '').strip()
-
-            openai_logger.info(f"AI response: {content_response}")
-            openai_logger.info(f"Conversation ended: {conversation_ended}")
-
-            # Text-to-Speech
-            if content_response:
-                # Generate speech (TTS)
-                try:
-                    self.text_to_speech(content_response, output_audio_file)
-                    openai_logger.info(f'Audio content written to file "{output_audio_file}"')
-                except Exception as e:
-                    openai_logger.error(f"Text-to-speech failed: {e}")
-                    self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
-                    return False
-            else:
-                openai_logger.error("No AI response text generated")
-                self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
-                return False
-            
+            # LLM streamed sentence by sentence into TTS and playback
+            conversation_ended, _ = await self.speak_reply_stream(
+                self.stream_ai_reply(stt_text, trace), self._response_base(input_audio_file), trace)
             return conversation_ended
 
         except OpenAIError as e:
-            openai_logger.error(f"Error in process_audio: {e}")
-            self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
+            openai_logger.error(f"Error in respond: {e}")
+            await self.audio_player.sync_audio_and_gif_async(ErrorAudio, SpeakingGif)
             return True
-        
-    def process_text(self, auto_text: str) -> tuple[str, bool]:
-        try:
-            # LLM
-            content_response = self.generate_ai_reply(auto_text)
-            conversation_ended = '[END_OF_CONVERSATION]' in content_response
-            content_response = content_response.replace('[END_OF_CONVERSATION]', '').strip()
 
-            openai_logger.info(f"AI response: {content_response}")
-            openai_logger.info(f"Conversation ended: {conversation_ended}")
+    async def process_audio(self, input_audio_file: str, trace=NULL_TRACE) -> bool:
+        stt_text = await self.speech_to_text(input_audio_file, trace)
+        return await self.respond(stt_text, input_audio_file, trace)
 
-            # Generate speech (TTS)
-            output_audio_file = AIOutputAudio
-            self.text_to_speech(content_response, output_audio_file)
-
-            return conversation_ended, output_audio_file
+    async def process_text(self, auto_text: str, trace=NULL_TRACE) -> tuple[bool, str]:
+        try:
+            return await self.speak_reply_stream(
+                self.stream_ai_reply(auto_text, trace), self._response_base(AIOutputAudio), trace)
 
         except Exception as e:
-            openai_logger.error(f"Error in process_audio: {e}")
-            self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
-            return True, ErrorAudio
\ No newline at end of file
+            openai_logger.error(f"Error in process_text: {e}")
+            await self.audio_player.sync_audio_and_gif_async(ErrorAudio, SpeakingGif)
+            return True, ErrorAudio
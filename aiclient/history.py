@@ -0,0 +1,121 @@
+import logging
+import re
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logging.basicConfig(level=logging.INFO)
+history_logger = logging.getLogger(__name__)
+
+# Every chat message costs a few tokens of framing on top of its content
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+_FIRST_SENTENCE = re.compile(r'^.*?[。！？!?\n]|^.*$', re.S)
+
+class TokenCounter:
+    def __init__(self, model="gpt-4"):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except Exception as e:
+                history_logger.warning(f"tiktoken encoding unavailable for {model}, estimating tokens: {e}")
+
+    def count(self, text):
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        # Rough estimate: Japanese runs about one token per character, ASCII about four characters per token
+        ascii_chars = sum(1 for c in text if ord(c) < 128)
+        return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+    def message_tokens(self, message):
+        return self.count(message['content']) + _MESSAGE_OVERHEAD_TOKENS
+
+class ConversationHistory:
+    """Chat history held under a prompt token budget.
+
+    The system prompt is always sent first and never changes. When the turns no
+    longer fit, the oldest ones are folded into a short summary message that
+    follows the system prompt. Token counts are computed once per message.
+    """
+    def __init__(self, system_message, max_prompt_tokens=1200, max_summary_tokens=200, counter=None):
+        self.system_message = system_message
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.counter = counter or TokenCounter()
+
+        self.system_tokens = self.counter.message_tokens(system_message)
+        self._entries = []  # (message, tokens)
+        self._entry_tokens = 0
+        self._summary_lines = []  # (line, tokens)
+        self._summary_tokens = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries = []
+        self._entry_tokens = 0
+        self._summary_lines = []
+        self._summary_tokens = 0
+
+    def append(self, role, content):
+        message = {"role": role, "content": content}
+        tokens = self.counter.message_tokens(message)
+        self._entries.append((message, tokens))
+        self._entry_tokens += tokens
+        self._enforce_budget()
+
+    def pop(self):
+        message, tokens = self._entries.pop()
+        self._entry_tokens -= tokens
+        return message
+
+    def last_message(self, role):
+        for message, _ in reversed(self._entries):
+            if message["role"] == role:
+                return message["content"]
+        return None
+
+    def summary_message(self):
+        if not self._summary_lines:
+            return None
+        lines = "\n".join(line for line, _ in self._summary_lines)
+        return {"role": "system", "content": f"これまでの会話の要約:\n{lines}"}
+
+    def messages(self):
+        messages = [self.system_message]
+        summary = self.summary_message()
+        if summary is not None:
+            messages.append(summary)
+        messages.extend(message for message, _ in self._entries)
+        return messages
+
+    def prompt_tokens(self):
+        summary_tokens = self._summary_tokens + _MESSAGE_OVERHEAD_TOKENS if self._summary_lines else 0
+        return self.system_tokens + summary_tokens + self._entry_tokens
+
+    def _enforce_budget(self):
+        # Always keep the newest message, even if it alone exceeds the budget
+        while self.prompt_tokens() > self.max_prompt_tokens and len(self._entries) > 1:
+            message, tokens = self._entries.pop(0)
+            self._entry_tokens -= tokens
+            self._fold(message)
+
+    def _fold(self, message):
+        speaker = "ユーザー" if message["role"] == "user" else "アシスタント"
+        content = message["content"].replace('[END_OF_CONVERSATION]', '').strip()
+        first_sentence = _FIRST_SENTENCE.match(content).group().strip()[:60]
+        if not first_sentence:
+            return
+
+        line = f"{speaker}: {first_sentence}"
+        tokens = self.counter.count(line) + 1
+        self._summary_lines.append((line, tokens))
+        self._summary_tokens += tokens
+
+        while self._summary_tokens > self.max_summary_tokens and len(self._summary_lines) > 1:
+            _, dropped = self._summary_lines.pop(0)
+            self._summary_tokens -= dropped
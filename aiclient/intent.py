@@ -0,0 +1,146 @@
+from enum import Enum
+
+import json
+import logging
+import os
+import re
+import unicodedata
+
+logging.basicConfig(level=logging.INFO)
+intent_logger = logging.getLogger(__name__)
+
+class DialogueState(str, Enum):
+    OPEN = 'open'
+    MEDICATION_QUESTION = 'medication_question'  # the assistant just asked whether the medicine was taken
+    WELLBEING_QUESTION = 'wellbeing_question'  # the assistant just asked how the user feels
+
+# Checked in order against the assistant's last message
+_STATE_PATTERNS = (
+    (DialogueState.MEDICATION_QUESTION, re.compile(r'(薬|くすり).*(飲|の)(み|ん)[^。]*[？?]')),
+    (DialogueState.WELLBEING_QUESTION, re.compile(r'(体調|調子|元気|気分|具合)[^。]*[？?]')),
+)
+
+# Trailing politeness and punctuation that do not change what a short reply means
+_TRAILING = re.compile(r'[\s、。,.!！?？〜~ー…]+$')
+
+# name -> settings; `patterns` must match the whole utterance, `states` limits where the intent applies
+DEFAULT_INTENTS = {
+    'medication_taken': {
+        'patterns': [r'(はい|ええ|うん)?(、)?(もう)?(飲|の)(みました|んだ|んだよ|んでます|んでいます)(よ)?', r'はい', r'ええ', r'うん'],
+        'states': [DialogueState.MEDICATION_QUESTION],
+        'response': "それは良かったです。今日の体調はいかがですか？",
+    },
+    'medication_not_taken': {
+        'patterns': [r'(いいえ|いや|ううん)?(、)?(まだ)(です|飲んでない|飲んでいません)?', r'いいえ', r'ううん', r'(飲|の)んでない', r'(飲|の)んでいません'],
+        'states': [DialogueState.MEDICATION_QUESTION],
+        'response': "忘れずにお薬を飲んでくださいね。飲んだらまた教えてください。",
+    },
+    'feeling_fine': {
+        'patterns': [r'(はい|ええ|うん)?(、)?(大丈夫|元気|いい|良い|まあまあ)(です|だよ|よ)?', r'はい'],
+        'states': [DialogueState.WELLBEING_QUESTION],
+        'response': "それは何よりです。ほかに何かお話ししたいことはありますか？",
+    },
+    'thanks': {
+        'patterns': [r'(どうも)?ありがとう(ございます|ございました)?', r'どうも', r'サンキュー'],
+        'response': "どういたしまして。ほかに何かお話ししたいことはありますか？",
+    },
+    'goodbye': {
+        'patterns': [r'(さようなら|さよなら|バイバイ|またね|また今度|おやすみ(なさい)?|じゃあね|終わり(です)?|もういい(です)?)'],
+        'response': "お話しできてうれしかったです。またお話ししましょうね。",
+        'ends_conversation': True,
+    },
+}
+
+def normalize_utterance(text):
+    text = unicodedata.normalize('NFKC', text).strip()
+    return _TRAILING.sub('', text)
+
+class Intent:
+    def __init__(self, name, patterns, response, ends_conversation=False, states=None, max_length=20):
+        self.name = name
+        self.response = response
+        self.ends_conversation = ends_conversation
+        self.states = {DialogueState(state) for state in states} if states else None
+        self.max_length = max_length
+        self.regex = re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+
+    @property
+    def response_id(self):
+        return f"intent_{self.name}"
+
+    def matches(self, text, state):
+        if self.states is not None and state not in self.states:
+            return False
+        return len(text) <= self.max_length and self.regex.fullmatch(text) is not None
+
+class IntentRouter:
+    """Answers short, predictable utterances locally instead of sending them to the LLM.
+
+    Intents are tried in table order; the first whose patterns match the whole
+    (normalized) transcript in the current dialogue state wins. The table comes
+    from DEFAULT_INTENTS or a JSON file of the same shape.
+    """
+    def __init__(self, intents=None, enabled=True):
+        intents = DEFAULT_INTENTS if intents is None else intents
+        self.intents = [Intent(name, **settings) for name, settings in intents.items()]
+        self.enabled = enabled
+        self.turns = 0
+        self.local_turns = 0
+        self.counts = {}
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        if not path or not os.path.exists(path):
+            return cls(**kwargs)
+        try:
+            with open(path, encoding='utf-8') as f:
+                intents = json.load(f)
+            router = cls(intents, **kwargs)
+            intent_logger.info(f"Loaded {len(router.intents)} intents from {path}")
+            return router
+        except (OSError, ValueError, TypeError, re.error) as e:
+            intent_logger.error(f"Invalid intent file {path}, using the built-in intents: {e}")
+            return cls(**kwargs)
+
+    def responses(self):
+        """Canned response entries for every intent, so the pack renders them ahead of time."""
+        return {intent.response_id: (intent.response, intent.ends_conversation) for intent in self.intents}
+
+    @staticmethod
+    def dialogue_state(last_assistant_message):
+        if last_assistant_message:
+            for state, pattern in _STATE_PATTERNS:
+                if pattern.search(last_assistant_message):
+                    return state
+        return DialogueState.OPEN
+
+    def route(self, transcript, last_assistant_message=None, available=lambda intent: True):
+        """Returns the intent that answers `transcript` locally, or None to use the LLM.
+
+        `available(intent)` lets the caller skip intents whose audio is not on disk.
+        """
+        self.turns += 1
+        if not self.enabled:
+            return None
+
+        text = normalize_utterance(transcript)
+        state = self.dialogue_state(last_assistant_message)
+        for intent in self.intents:
+            if intent.matches(text, state) and available(intent):
+                self.local_turns += 1
+                self.counts[intent.name] = self.counts.get(intent.name, 0) + 1
+                intent_logger.info(f"Intent '{intent.name}' ({state.value}) served locally, "
+                                   f"{self.local_turns}/{self.turns} turns local ({self.local_fraction():.0%})")
+                return intent
+        return None
+
+    def local_fraction(self):
+        return self.local_turns / self.turns if self.turns else 0.0
+
+    def stats(self):
+        return {
+            'turns': self.turns,
+            'local_turns': self.local_turns,
+            'local_fraction': round(self.local_fraction(), 3),
+            'intents': dict(self.counts),
+        }
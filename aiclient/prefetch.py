@@ -0,0 +1,95 @@
+from utils.define import PrefetchAudioBase, PrefetchLeadSeconds, ScheduledOpenerText
+
+import asyncio
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+prefetch_logger = logging.getLogger(__name__)
+
+class ReminderPrefetcher:
+    """Generates the scheduled reminder's opening reply before the reminder fires.
+
+    The schedule side (running off the event loop) calls request() and invalidate();
+    both hop onto the loop, which owns all state. The prepared reply is handed out
+    once by take() and only for the schedule slot it was generated for.
+    """
+    def __init__(self, ai_client, loop, opener_text=ScheduledOpenerText, lead_time=PrefetchLeadSeconds,
+                 output_base=PrefetchAudioBase):
+        self.ai_client = ai_client
+        self.loop = loop
+        self.opener_text = opener_text
+        self.lead_time = lead_time
+        self.max_age = lead_time + 10 * 60
+        self.output_base = output_base
+
+        self._prepared = None  # (schedule key, PreparedReply)
+        self._task = None
+        self._task_key = None
+        self.hits = 0
+        self.misses = 0
+
+    def request(self, key):
+        """Thread-safe: starts preparing the opener for the schedule slot `key`."""
+        self.loop.call_soon_threadsafe(self._start, key)
+
+    def invalidate(self):
+        """Thread-safe: drops any prepared or in-flight opener, e.g. after the schedule changed."""
+        self.loop.call_soon_threadsafe(self._discard)
+
+    def _discard(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._task_key = None
+        if self._prepared is not None:
+            prefetch_logger.info(f"Discarding prepared opener for {self._prepared[0]}")
+        self._prepared = None
+
+    def _start(self, key):
+        self._discard()
+        self._task_key = key
+        self._task = self.loop.create_task(self._prefetch(key))
+
+    async def _prefetch(self, key):
+        started = time.monotonic()
+        try:
+            prepared = await self.ai_client.prepare_reply(self.opener_text, self.output_base)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            prefetch_logger.warning(f"Failed to prepare opener for {key}: {e}")
+            return
+
+        if prepared is None:
+            prefetch_logger.warning(f"Opener for {key} not prepared; the reminder will generate it live")
+            return
+        self._prepared = (key, prepared)
+        prefetch_logger.info(f"Prepared opener for {key} in {time.monotonic() - started:.2f}s")
+
+    async def take(self, key):
+        """Returns the opener prepared for `key`, waiting for it if it is still being generated."""
+        if self._task is not None and self._task_key == key and not self._task.done():
+            prefetch_logger.info(f"Opener for {key} still being prepared, waiting for it")
+            task = self._task
+            try:
+                # Shielded, so cancelling the turn leaves the prefetch running and only this wait ends
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise  # the turn was cancelled, not the prefetch
+                # invalidate() dropped the prefetch; the reply is generated live
+
+        prepared = None
+        if self._prepared is not None and self._prepared[0] == key:
+            prepared = self._prepared[1]
+            if prepared.age() > self.max_age:
+                prefetch_logger.info(f"Prepared opener for {key} is stale ({prepared.age():.0f}s old)")
+                prepared = None
+        self._prepared = None
+
+        if prepared is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return prepared
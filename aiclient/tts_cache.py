@@ -0,0 +1,123 @@
+from collections import OrderedDict
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import unicodedata
+
+logging.basicConfig(level=logging.INFO)
+cache_logger = logging.getLogger(__name__)
+
+class TTSCache:
+    """Content-addressed store of synthesized speech with a byte budget and LRU eviction.
+
+    Audio lives on disk (one file per key); the index of keys and sizes is kept in
+    memory in least-recently-used order and rebuilt from file mtimes at startup.
+    """
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def normalize(text):
+        text = unicodedata.normalize('NFKC', text)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def key(self, text, voice, model, response_format):
+        payload = json.dumps([self.normalize(text), voice, model, response_format], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def key_for_request(self, request):
+        return self.key(request['input'], request['voice'], request['model'], request['response_format'])
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = self._path(name)
+            if name.endswith('.tmp'):
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self.total_bytes += size
+        self._evict()
+        cache_logger.info(f"TTS cache loaded: {len(self._index)} entries, {self.total_bytes} bytes")
+
+    def get(self, key):
+        """Returns the cached audio path for `key`, or None on a miss."""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+
+        path = self._path(key)
+        try:
+            os.utime(path)  # persist recency for the next startup
+        except FileNotFoundError:
+            with self._lock:
+                self.total_bytes -= self._index.pop(key, 0)
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return path
+
+    def put(self, key, source_path):
+        """Copies `source_path` into the cache under `key` and returns the cached path."""
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            self.total_bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hit_rate(), 3),
+            }
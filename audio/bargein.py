@@ -0,0 +1,123 @@
+from collections import deque
+
+import logging
+import threading
+
+logging.basicConfig(level=logging.INFO)
+bargein_logger = logging.getLogger(__name__)
+
+class BargeInMonitor:
+    """Keeps the microphone open while a reply plays and stops playback when the user talks over it.
+
+    The speaker's own voice reaches the microphone too, so each chunk's energy is
+    compared against an echo estimate: the loudest recent hop of the clip's RMS
+    envelope (the lip-sync track) scaled by a coupling factor that is learned
+    while the user is quiet. Only the residual above the calibrated speech
+    threshold counts as speech. The captured chunks, including a short pre-roll,
+    are kept for the next record_question() call.
+    """
+    def __init__(self, py_recorder, enabled=True, threshold_multiplier=2.0, min_speech_seconds=0.24,
+                 pre_roll_seconds=0.5, grace_seconds=0.3, echo_window_seconds=0.25, untracked_multiplier=4.0):
+        self.py_recorder = py_recorder
+        self.enabled = enabled
+        self.threshold_multiplier = threshold_multiplier
+        self.min_speech_seconds = min_speech_seconds
+        self.pre_roll_seconds = pre_roll_seconds
+        self.grace_seconds = grace_seconds
+        self.echo_window_seconds = echo_window_seconds
+        self.untracked_multiplier = untracked_multiplier
+
+        # Start by assuming the echo is as loud as the clip itself; the estimate only moves down from there
+        self.echo_coupling = 1.0
+        self.triggers = 0
+
+        self._frames = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _chunk_seconds(self):
+        return self.py_recorder.CHUNK_DURATION_MS / 1000
+
+    def watch(self, playback, track, volume, on_speech):
+        """Listens while `playback` runs; calls `on_speech()` once the user starts talking."""
+        if not self.enabled or self.py_recorder.energy_threshold is None:
+            return
+        self._join()
+        self._thread = threading.Thread(target=self._listen, args=(playback, track, volume, on_speech),
+                                        name="barge-in", daemon=True)
+        self._thread.start()
+
+    def _echo_energy(self, playback, track, volume):
+        if track is None or track.failed:
+            return None
+        position = playback.position()
+        peak = track.peak_rms(position - self.echo_window_seconds, position + 0.05)
+        if peak is None:
+            return None
+        # Same units as PyRecorder.frame_energy(): mean square of int16 samples
+        return (peak * 32768.0 * volume) ** 2
+
+    def _listen(self, playback, track, volume, on_speech):
+        recorder = self.py_recorder
+        chunk_seconds = self._chunk_seconds()
+        pre_roll = deque(maxlen=max(1, int(self.pre_roll_seconds / chunk_seconds)))
+        needed = max(1, int(self.min_speech_seconds / chunk_seconds))
+        speech_chunks = 0
+        triggered = False
+
+        try:
+            recorder.start_stream()
+            while not playback.is_done():
+                data = recorder.stream.read(recorder.CHUNK_SIZE, exception_on_overflow=False)
+                pre_roll.append(data)
+                if playback.elapsed() < self.grace_seconds:
+                    continue
+
+                energy = recorder.frame_energy(data)
+                threshold = recorder.energy_threshold * self.threshold_multiplier
+                echo = self._echo_energy(playback, track, volume)
+                if echo is None:
+                    residual = energy
+                    threshold *= self.untracked_multiplier
+                else:
+                    residual = energy - self.echo_coupling * echo
+                    if echo > recorder.energy_threshold and residual <= threshold:
+                        # Quiet user and a loud clip: refine the coupling estimate
+                        self.echo_coupling += 0.2 * (energy / echo - self.echo_coupling)
+
+                speech_chunks = speech_chunks + 1 if residual > threshold else 0
+                if speech_chunks >= needed:
+                    triggered = True
+                    break
+        except Exception as e:
+            bargein_logger.error(f"Barge-in monitoring failed: {e}")
+
+        if not triggered:
+            recorder.stop_stream()
+            return
+
+        self.triggers += 1
+        with self._lock:
+            self._frames = list(pre_roll)
+        bargein_logger.info(f"Barge-in after {playback.elapsed():.2f}s of playback "
+                            f"(echo coupling {self.echo_coupling:.3f})")
+        # The stream stays open so the next record_question() continues without a gap
+        on_speech()
+
+    def _join(self):
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def take_frames(self):
+        """Returns the audio captured at the barge-in (pre-roll included) once, or None."""
+        self._join()
+        with self._lock:
+            frames, self._frames = self._frames, None
+        return frames
+
+    def reset(self):
+        """Drops speech nobody is going to record, e.g. when the conversation ends."""
+        if self.take_frames() is not None:
+            self.py_recorder.stop_stream()
@@ -0,0 +1,183 @@
+from ctypes import POINTER, ArgumentError, c_int16
+
+import logging
+import math
+import numpy as np
+import time
+import wave
+
+logging.basicConfig(level=logging.INFO)
+frames_logger = logging.getLogger(__name__)
+
+class FrameRing:
+    """Preallocated int16 frames for the wake-word loop, reused round-robin.
+
+    The capture side fills slot() in place; Porcupine and the energy estimator
+    get view(), a read-only view of the same memory, so no frame is copied or
+    allocated per read. The ring holds `seconds` of audio and doubles as the
+    calibration window: window() is the whole ring as one 2-D array once it
+    has wrapped.
+    """
+    def __init__(self, frame_length, sample_rate, seconds=5.0):
+        self.frame_length = frame_length
+        self.count = max(1, math.ceil(seconds * sample_rate / frame_length))
+        self.buffer = np.zeros((self.count, frame_length), dtype=np.int16)
+        # Row views are made once; indexing the buffer per frame would allocate a new view each time
+        self._slots = list(self.buffer)
+        self._views = [row.view() for row in self.buffer]
+        for view in self._views:
+            view.flags.writeable = False
+        # Native readers and detectors take the slot's address; built once per slot as well
+        self._pointers = [row.ctypes.data_as(POINTER(c_int16)) for row in self.buffer]
+        self._window = self.buffer.view()
+        self._window.flags.writeable = False
+        self.index = 0
+        self.filled = 0  # frames written since the ring was created
+
+    def reset(self):
+        """Starts a new calibration window, e.g. when listening resumes after a conversation."""
+        self.index = 0
+        self.filled = 0
+
+    def slot(self):
+        """The writable frame the next read goes into."""
+        return self._slots[self.index]
+
+    def pointer(self):
+        """ctypes int16 pointer to the current slot's memory."""
+        return self._pointers[self.index]
+
+    def commit(self):
+        """Publishes the slot just filled; returns its read-only view."""
+        view = self._views[self.index]
+        self.index = (self.index + 1) % self.count
+        self.filled += 1
+        return view
+
+    def wrapped(self):
+        """True right after the last slot was committed, i.e. once per `seconds` of audio."""
+        return self.filled > 0 and self.index == 0
+
+    def window(self):
+        return self._window
+
+_fallback_logged = False
+
+def _log_fallback(reason):
+    # A source is created per listening session; the fallback is reported once per process
+    global _fallback_logged
+    if not _fallback_logged:
+        _fallback_logged = True
+        frames_logger.warning(f"PvRecorder zero-copy read disabled ({reason}), using read(); "
+                              f"check the pvrecorder pin in requirements.txt")
+
+class PvFrameSource:
+    """Reads PvRecorder frames straight into the current FrameRing slot.
+
+    Audio sources share this interface: start(), read_into(ring), which fills
+    ring.slot() and returns False once the source has no more audio, and
+    release(), which frees the device between listening sessions.
+
+    PvRecorder.read() builds a new Python list per frame. When the recorder
+    exposes its native read function (the pvrecorder version pinned in
+    requirements.txt), the frame is read into the slot's memory instead. Those
+    are private attributes, so if they are missing or no longer callable the
+    way 1.x calls them, the source falls back to read() for good and copies the
+    list in without any intermediate array.
+    """
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self._read_func = getattr(recorder, '_read_func', None)
+        self._handle = getattr(recorder, '_handle', None)
+        self.native = self._read_func is not None and self._handle is not None
+        if not self.native:
+            _log_fallback("recorder has no _read_func/_handle")
+
+    def start(self):
+        self.recorder.start()
+
+    def read_into(self, ring):
+        if self.native:
+            try:
+                status = self._read_func(self._handle, ring.pointer())
+            except (AttributeError, TypeError, ArgumentError) as e:
+                _log_fallback(e)
+                self.native = False
+            else:
+                if status == 0:  # PV_STATUS_SUCCESS
+                    return True
+                # Let the public read raise the recorder's own exception for this status
+                frames_logger.warning(f"Native PvRecorder read failed with status {status}, falling back")
+                self.native = False
+        ring.slot()[:] = self.recorder.read()
+        return True
+
+    def release(self):
+        self.recorder.stop()
+        self.recorder.delete()
+
+class WavFileSource:
+    """Plays a recorded 16-bit mono WAV file as microphone input, optionally `loops` times over.
+
+    With `realtime` False, frames come as fast as the loop takes them, so hours
+    of room audio replay in minutes. The file is read in `block_seconds` blocks,
+    and a frame is copied from the block straight into the ring slot.
+    """
+    def __init__(self, path, sample_rate, loops=1, realtime=False, block_seconds=1.0):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.loops = loops
+        self.realtime = realtime
+        self.block_frames = int(block_seconds * sample_rate)
+        self.frames_read = 0
+        self._wav = None
+        self._loop = 0
+        self._block = np.zeros(0, dtype=np.int16)
+        self._offset = 0
+        self._next_at = None
+
+        with wave.open(path, 'rb') as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != sample_rate:
+                raise ValueError(f"{path} must be 16-bit mono at {sample_rate} Hz, got {wf.getnchannels()} "
+                                 f"channels, {wf.getsampwidth() * 8}-bit, {wf.getframerate()} Hz")
+            self.seconds = wf.getnframes() / sample_rate
+
+    def start(self):
+        if self._wav is None:
+            self._wav = wave.open(self.path, 'rb')
+
+    def _fill(self, frame_length):
+        while len(self._block) - self._offset < frame_length:
+            data = self._wav.readframes(self.block_frames)
+            if not data:
+                self._loop += 1
+                if self._loop >= self.loops:
+                    return False
+                self._wav.rewind()
+                continue
+            # A short tail is carried into the next block so frames never straddle blocks
+            tail = self._block[self._offset:]
+            self._block = np.concatenate((tail, np.frombuffer(data, dtype=np.int16)))
+            self._offset = 0
+        return True
+
+    def read_into(self, ring):
+        if not self._fill(ring.frame_length):
+            return False
+        ring.slot()[:] = self._block[self._offset:self._offset + ring.frame_length]
+        self._offset += ring.frame_length
+        self.frames_read += 1
+        if self.realtime:
+            now = time.monotonic()
+            self._next_at = max(self._next_at or now, now - 1.0) + ring.frame_length / self.sample_rate
+            time.sleep(max(0.0, self._next_at - now))
+        return True
+
+    def release(self):
+        # Keeps the position, so the next session continues where this one stopped
+        pass
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
@@ -1,10 +1,17 @@
 from contextlib import contextmanager
+from display.lipsync import LipSyncTrack
 from pygame import mixer
 
+import asyncio
+import logging
 import os
 import pygame
 import sys
 import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+player_logger = logging.getLogger(__name__)
 
 @contextmanager
 def suppress_stdout_stderr():
@@ -21,6 +28,70 @@ def suppress_stdout_stderr():
         sys.stderr = _stderr
         null.close()
 
+class PlaybackHandle:
+    """Completion handle for a single mixer.music playback.
+
+    Can be waited on from a thread (`wait`) or awaited from asyncio.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.started_at = time.monotonic()
+        self.ended_at = None
+        self.interrupted = False
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def is_done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def elapsed(self):
+        end = self.ended_at if self.ended_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def position(self):
+        """Seconds of audio played so far, read from the mixer clock while playing."""
+        if not self._done.is_set():
+            position_ms = mixer.music.get_pos()
+            if position_ms >= 0:
+                return position_ms / 1000.0
+        return self.elapsed()
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def finish(self, interrupted=False):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.ended_at = time.monotonic()
+            self.interrupted = interrupted
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                player_logger.error(f"Error in playback callback: {e}")
+
+    def __await__(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _resolve(_):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(self))
+
+        self.add_done_callback(_resolve)
+        return future.__await__()
+
 class AudioPlayer:
     def __init__(self, display):
         self.display = display
@@ -31,37 +102,126 @@ class AudioPlayer:
         self.is_playing = mixer.music.get_busy()
         self.current_volume = 0.5
 
+        self.current_playback = None
+        self._playback_lock = threading.Lock()
+        self.barge_in = None
+        self.end_poll_interval = 0.02
+        self._end_watcher = None  # runs only while a clip is playing
+
     def set_audio_volume(self, volume):
         self.current_volume = max(0.0, min(1.0, volume))
 
+    def _start_end_watcher(self):
+        # Called with _playback_lock held, so a watcher that is exiting has already cleared itself
+        if self._end_watcher is None:
+            self._end_watcher = threading.Thread(target=self._watch_music_end, name="music-end", daemon=True)
+            self._end_watcher.start()
+
+    def _watch_music_end(self):
+        """Finishes each clip once the mixer goes idle; exits when nothing is playing.
+
+        Polls the mixer rather than pygame's event queue, which would have to be
+        pumped from this thread and is shared with every other pygame consumer.
+        """
+        while True:
+            time.sleep(self.end_poll_interval)
+            with self._playback_lock:
+                playback = self.current_playback
+                if playback is None:
+                    self._end_watcher = None
+                    return
+                if mixer.music.get_busy():
+                    continue
+                self.current_playback = None
+            playback.finish()
+
     def play_audio(self, filename):
-        with suppress_stdout_stderr():
-            mixer.music.load(filename)
-            mixer.music.play()
-            mixer.music.set_volume(self.current_volume)
+        playback = PlaybackHandle(filename)
+        with self._playback_lock:
+            previous, self.current_playback = self.current_playback, playback
+            with suppress_stdout_stderr():
+                mixer.music.load(filename)
+                mixer.music.play()
+                mixer.music.set_volume(self.current_volume)
+            playback.started_at = time.monotonic()
+            self._start_end_watcher()
+
+        if previous is not None:
+            previous.finish(interrupted=True)
+        return playback
+
+    def set_barge_in(self, monitor):
+        self.barge_in = monitor
+
+    def stop(self, playback=None):
+        """Stops the current clip; with `playback`, only if that clip is still the one playing."""
+        with self._playback_lock:
+            if playback is not None and playback is not self.current_playback:
+                return
+            playback, self.current_playback = self.current_playback, None
+            mixer.music.stop()
+        if playback is not None:
+            playback.finish(interrupted=True)
 
     def play_trigger_with_logo(self, trigger_audio, logo_path):
-        self.play_audio(trigger_audio)
-        
+        playback = self.play_audio(trigger_audio)
+
         fade_thread = threading.Thread(target=self.display.fade_in_logo, args=(logo_path,))
         fade_thread.start()
 
-        while mixer.music.get_busy():
-            with suppress_stdout_stderr():
-                pygame.time.Clock().tick(10)
-
+        playback.wait()
         fade_thread.join()
+        return playback
 
-    def sync_audio_and_gif(self, audio_file, gif_path):
-        self.play_audio(audio_file)
-        
-        gif_thread = threading.Thread(target=self.display.update_gif, args=(gif_path,))
-        gif_thread.start()
+    def _lipsync_track(self, audio_file):
+        try:
+            return LipSyncTrack.from_file(audio_file)
+        except Exception as e:
+            player_logger.warning(f"Lip sync unavailable for {audio_file}: {e}")
+            return None
 
-        clock = pygame.time.Clock()
-        while mixer.music.get_busy():
-            with suppress_stdout_stderr():
-                clock.tick(10)
+    def _watch_barge_in(self, playback, track):
+        if self.barge_in is not None:
+            self.barge_in.watch(playback, track, self.current_volume, lambda: self.stop(playback))
+
+    def _animation_target(self, gif_path, playback, track):
+        if track is None or track.failed:
+            return self.display.update_gif, (gif_path, playback)
+        return self.display.update_lipsync, (gif_path, track, playback)
+
+    def sync_audio_and_gif(self, audio_file, gif_path, track=None):
+        if track is None:
+            track = self._lipsync_track(audio_file)
+        playback = self.play_audio(audio_file)
+        self._watch_barge_in(playback, track)
+
+        target, args = self._animation_target(gif_path, playback, track)
+        gif_thread = threading.Thread(target=target, args=args)
+        gif_thread.start()
 
+        playback.wait()
         gif_thread.join()
-        self.display.send_white_frames()
\ No newline at end of file
+        self.display.send_white_frames()
+        return playback
+
+    async def play_trigger_with_logo_async(self, trigger_audio, logo_path):
+        playback = self.play_audio(trigger_audio)
+        await asyncio.gather(
+            asyncio.to_thread(self.display.fade_in_logo, logo_path),
+            playback,
+        )
+        return playback
+
+    async def sync_audio_and_gif_async(self, audio_file, gif_path, track=None):
+        if track is None:
+            track = await asyncio.to_thread(self._lipsync_track, audio_file)
+        playback = self.play_audio(audio_file)
+        self._watch_barge_in(playback, track)
+
+        target, args = self._animation_target(gif_path, playback, track)
+        await asyncio.gather(
+            asyncio.to_thread(target, *args),
+            playback,
+        )
+        await asyncio.to_thread(self.display.send_white_frames)
+        return playback
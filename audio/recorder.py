@@ -1,4 +1,5 @@
 from utils.define import CHANNELS, RATE
+from utils.tracing import NULL_TRACE
 from contextlib import contextmanager
 from scipy.signal import butter, lfilter
 
@@ -39,6 +40,8 @@ class PyRecorder:
 
         self.energy_window_size = 50  
         self.recent_energy_levels = []
+        # Designed once; every energy estimate uses the same 1 kHz low-pass
+        self.lowpass = self.butter_lowpass(cutoff=1000, fs=RATE)
 
         with suppress_stdout_stderr():
             self.pyaudio = pyaudio.PyAudio()
@@ -58,6 +61,38 @@ class PyRecorder:
             self.stream.close()
             self.stream = None
 
+    def is_healthy(self):
+        try:
+            if self.stream is not None and self.stream.is_active():
+                # is_active() and the device info are cached and survive an unplug; this asks the device
+                self.stream.get_read_available()
+                return True
+            # Between recordings the wake-word recorder holds the microphone, so no probe stream is opened
+            self.pyaudio.get_default_input_device_info()
+            return True
+        except Exception as e:
+            recorder_logger.warning(f"Capture device unavailable: {e}")
+            return False
+
+    def restart(self):
+        """Reopens capture without rebuilding the recorder; the calibration and beep are kept."""
+        try:
+            if self.stream is not None:
+                self.stream.close()
+        except Exception as e:
+            recorder_logger.warning(f"Error closing broken stream: {e}")
+        self.stream = None
+        if self.is_healthy():
+            return
+
+        # The device itself went away: rescan the host APIs
+        try:
+            self.pyaudio.terminate()
+        except Exception as e:
+            recorder_logger.warning(f"Error terminating PyAudio: {e}")
+        with suppress_stdout_stderr():
+            self.pyaudio = pyaudio.PyAudio()
+
     def save_audio(self, frames, filename):
         wf = wave.open(filename, 'wb')
         wf.setnchannels(CHANNELS)
@@ -78,12 +113,12 @@ class PyRecorder:
         return y
 
     def calibrate_energy_threshold(self, audio_frames):
-        energy_levels = []
-        for frame in audio_frames:
-            audio_chunk = np.frombuffer(frame, dtype=np.int16)
-            filtered_audio = self.butter_lowpass_filter(audio_chunk, cutoff=1000, fs=RATE)
-            energy = np.sum(filtered_audio**2) / len(filtered_audio)
-            energy_levels.append(energy)
+        """`audio_frames` is a 2-D int16 array with one frame per row, or a list of raw int16 frames."""
+        if not isinstance(audio_frames, np.ndarray):
+            audio_frames = np.array([np.frombuffer(frame, dtype=np.int16) for frame in audio_frames])
+        # Each row is filtered on its own, exactly as frame by frame, in a single call
+        filtered_audio = lfilter(*self.lowpass, audio_frames, axis=-1)
+        energy_levels = np.einsum('ij,ij->i', filtered_audio, filtered_audio) / filtered_audio.shape[1]
         
         self.silence_energy = np.mean(energy_levels)
         multiplier = 3.5
@@ -109,22 +144,32 @@ class PyRecorder:
         self.energy_threshold = self.silence_energy * multiplier
         recorder_logger.info(f"Calibration complete. Silence energy: {self.silence_energy}, Threshold: {self.energy_threshold}")
     
+    def frame_energy(self, audio_frame):
+        """Mean square of the low-passed frame; `audio_frame` is raw int16 bytes or an int16 array."""
+        if not isinstance(audio_frame, np.ndarray):
+            audio_frame = np.frombuffer(audio_frame, dtype=np.int16)
+        filtered_audio = lfilter(*self.lowpass, audio_frame)
+        return np.dot(filtered_audio, filtered_audio) / len(filtered_audio)
+
     def is_speech(self, audio_frame):
         if self.energy_threshold is None:
             return False
-        audio_chunk = np.frombuffer(audio_frame, dtype=np.int16)
-        filtered_audio = self.butter_lowpass_filter(audio_chunk, cutoff=1000, fs=RATE)
-        energy = np.sum(filtered_audio**2) / len(filtered_audio)
-        return energy > self.energy_threshold
+        return self.frame_energy(audio_frame) > self.energy_threshold
 
-    def record_question(self, audio_player):
+    def record_question(self, audio_player, trace=NULL_TRACE, initial_frames=None):
+        """Records until the speaker stops. `initial_frames` continues speech already captured (barge-in)."""
         self.start_stream()
-        recorder_logger.info("Listening... Speak your question.")
+        trace.mark('listen_start')
 
-        frames = []
+        frames = list(initial_frames or [])
         silent_chunks = 0
-        is_speaking = False
-        total_chunks = 0
+        is_speaking = bool(frames)
+        total_chunks = len(frames)
+        if is_speaking:
+            trace.mark('speech_onset')
+            recorder_logger.info(f"Continuing speech captured during playback ({total_chunks} chunks)")
+        else:
+            recorder_logger.info("Listening... Speak your question.")
         silence_duration = 2
         max_duration = 30
 
@@ -137,6 +182,7 @@ class PyRecorder:
 
             if self.is_speech(data):
                 if not is_speaking:
+                    trace.mark('speech_onset')
                     recorder_logger.info("Speech detected. Recording...")
                     is_speaking = True
                 silent_chunks = 0
@@ -156,6 +202,7 @@ class PyRecorder:
                 recorder_logger.info(f"Maximum duration reached. Total chunks: {total_chunks}")
                 break
 
+        trace.mark('endpoint')
         audio_player.play_audio(self.beep_file)
         self.stop_stream()
         return b''.join(frames)
@@ -0,0 +1,166 @@
+from utils.define import *
+from utils.utils import is_exit_event_set
+from enum import Enum
+
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+engine_logger = logging.getLogger(__name__)
+
+class ConversationState(str, Enum):
+    OPENING = 'opening'  # the device speaks first (scheduled reminder)
+    LISTENING = 'listening'
+    TRANSCRIBING = 'transcribing'
+    RESPONDING = 'responding'
+    CLOSING = 'closing'
+    DONE = 'done'
+
+class ConversationEngine:
+    """Runs one conversation as a state machine, from its first state until DONE.
+
+    A wake word starts in LISTENING and a scheduled reminder in OPENING; every
+    later turn loops LISTENING -> TRANSCRIBING -> RESPONDING. Work that does not
+    depend on each other overlaps: the listening image is sent while the mic
+    opens, and the white frame while the recording is uploaded for STT. Each
+    step waits on the completion of the one before it instead of fixed pauses.
+    """
+    def __init__(self, ai_client, py_recorder, audio_player, display, barge_in, tracer,
+                 serial_check, take_prepared_opener=None, wake_detected_at=None, max_silence=2):
+        self.ai_client = ai_client
+        self.py_recorder = py_recorder
+        self.audio_player = audio_player
+        self.display = display
+        self.barge_in = barge_in
+        self.tracer = tracer
+        self.serial_check = serial_check
+        self.take_prepared_opener = take_prepared_opener
+        self.wake_detected_at = wake_detected_at
+        self.max_silence = max_silence
+
+        self.state = None
+        self.silence_count = 0
+        self.turns = 0
+        self.trace = None
+        self.frames = None
+        self.transcript = None
+        self.display_task = None
+
+        self.handlers = {
+            ConversationState.OPENING: self.opening,
+            ConversationState.LISTENING: self.listening,
+            ConversationState.TRANSCRIBING: self.transcribing,
+            ConversationState.RESPONDING: self.responding,
+            ConversationState.CLOSING: self.closing,
+        }
+
+    async def run(self, state=ConversationState.LISTENING):
+        self.state = state
+        while self.state is not ConversationState.DONE:
+            if is_exit_event_set() and self.state is not ConversationState.CLOSING:
+                self.state = ConversationState.CLOSING
+            try:
+                next_state = await self.handlers[self.state]()
+            except Exception as e:
+                next_state = await self.failed(e)
+            engine_logger.debug(f"{self.state.value} -> {next_state.value}")
+            self.state = next_state
+        return self.turns
+
+    def _show(self, target, *args):
+        """Sends a frame in the background; frames are queued so they reach the display in order."""
+        previous = self.display_task
+        async def send():
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            await asyncio.to_thread(target, *args)
+        self.display_task = asyncio.create_task(send())
+        return self.display_task
+
+    async def _display_idle(self):
+        if self.display_task is not None:
+            await asyncio.gather(self.display_task, return_exceptions=True)
+            self.display_task = None
+
+    def _finish_turn(self, **fields):
+        if self.trace is not None:
+            self.tracer.finish(self.trace, **fields)
+            self.trace = None
+
+    async def opening(self):
+        engine_logger.info("Starting scheduled conversation")
+        self.trace = self.tracer.start('scheduled')
+        prepared = await self.take_prepared_opener() if self.take_prepared_opener else None
+        if prepared is not None:
+            ended, _ = await self.ai_client.play_prepared(prepared, trace=self.trace)
+        else:
+            ended, _ = await self.ai_client.process_text(ScheduledOpenerText, trace=self.trace)
+        self._finish_turn(prefetched=prepared is not None, outcome='ended' if ended else 'continued')
+
+        if ended:
+            engine_logger.info("Conversation ended after initial greeting")
+            return ConversationState.CLOSING
+        return ConversationState.LISTENING
+
+    async def listening(self):
+        if not await asyncio.to_thread(self.serial_check):
+            return ConversationState.CLOSING
+
+        self.trace = self.tracer.start('wake' if self.wake_detected_at is not None else 'followup')
+        if self.wake_detected_at is not None:
+            self.trace.mark('wake_detected', at=self.wake_detected_at)
+            self.wake_detected_at = None
+
+        # The listening image goes out over serial while the mic is already recording
+        self._show(self.display.start_listening_display, SatoruHappy)
+        trace = self.trace
+        self.frames = await asyncio.to_thread(
+            lambda: self.py_recorder.record_question(
+                audio_player=self.audio_player, trace=trace, initial_frames=self.barge_in.take_frames()))
+
+        if not self.frames:
+            self._finish_turn(outcome='silence')
+            self.silence_count += 1
+            if self.silence_count >= self.max_silence:
+                engine_logger.info("Maximum silence reached. Ending conversation.")
+                return ConversationState.CLOSING
+            return ConversationState.LISTENING
+
+        self.silence_count = 0
+        return ConversationState.TRANSCRIBING
+
+    async def transcribing(self):
+        # The white frame is sent while the recording is written and uploaded
+        self._show(self.display.stop_listening_display)
+        await asyncio.to_thread(self.py_recorder.save_audio, self.frames, AIOutputAudio)
+        self.frames = None
+        self.transcript = await self.ai_client.speech_to_text(AIOutputAudio, self.trace)
+        return ConversationState.RESPONDING
+
+    async def responding(self):
+        # The reply animates the display, so the queued frames must be out first
+        await self._display_idle()
+        transcript, self.transcript = self.transcript, None
+        ended = await self.ai_client.respond(transcript, AIOutputAudio, self.trace)
+        self.turns += 1
+        self._finish_turn(outcome='ended' if ended else 'continued')
+        return ConversationState.CLOSING if ended else ConversationState.LISTENING
+
+    async def failed(self, e):
+        engine_logger.error(f"Error in conversation ({self.state.value}): {e}")
+        if self.state is ConversationState.CLOSING:
+            return ConversationState.DONE
+        self._finish_turn(outcome='error')
+        await self._display_idle()
+        try:
+            await self.audio_player.sync_audio_and_gif_async(ErrorAudio, SpeakingGif)
+        except Exception as play_error:
+            engine_logger.error(f"Failed to play the error audio: {play_error}")
+        return ConversationState.CLOSING
+
+    async def closing(self):
+        self._finish_turn(outcome='ended')
+        self.barge_in.reset()
+        await self._display_idle()
+        await asyncio.to_thread(self.display.fade_in_logo, SeamanLogo)
+        return ConversationState.DONE
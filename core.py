@@ -1,8 +1,12 @@
+from audio.bargein import BargeInMonitor
 from audio.player import AudioPlayer
 from audio.recorder import PyRecorder
+from conversation_engine import ConversationEngine, ConversationState
 from utils.define import *
 from display.display import DisplayModule
 from transmission.serialModule import SerialModule
+from utils.supervisor import Component, Supervisor
+from utils.tracing import TurnTracer
 from utils.utils import is_exit_event_set
 from wakeword.wakeword import WakeWord
 
@@ -13,191 +17,146 @@ logging.basicConfig(level=logging.INFO)
 core_logger = logging.getLogger(__name__)
 
 class SpeakerCore:
-    def __init__(self, args):
+    def __init__(self, args, py_recorder=None, porcupine=None, telemetry_store=None):
+        """`py_recorder` and `porcupine` may be created ahead of time, e.g. concurrently during startup."""
         self.args = args
+        self.telemetry_store = telemetry_store
         self.ai_client = args.aiclient
         self.serial_module = SerialModule()
-        self.py_recorder = PyRecorder()
+        self.py_recorder = py_recorder or PyRecorder()
 
         self.display = DisplayModule(self.serial_module)
         self.audio_player = AudioPlayer(self.display)
-        self.wake_word = WakeWord(args=args, audio_player=self.audio_player, serial_module=self.serial_module)
+        self.barge_in = BargeInMonitor(self.py_recorder, enabled=getattr(args, 'barge_in', True))
+        self.audio_player.set_barge_in(self.barge_in)
+        self.wake_word = WakeWord(args=args, audio_player=self.audio_player, serial_module=self.serial_module,
+                                  detector=porcupine)
+        self.schedule_manager = None
+        self.tracer = TurnTracer(TURN_TRACE_FILE)
+        self.supervisor = Supervisor([
+            Component('capture', lambda: self.py_recorder.is_healthy(), self.restart_capture),
+            Component('wake_word', lambda: self.wake_word.is_healthy(), lambda: self.wake_word.restart()),
+            Component('lcd', self.serial_module.lcd_healthy, lambda: self.serial_module.reopen_lcd(lcd_port())),
+            Component('mcu', self.serial_module.mcu_healthy, self.serial_module.reopen_mcu),
+        ], on_incident=lambda incident: self.record_event('device_recovery', **incident))
         
         self.initialize()
 
         core_logger.info("Speaker Core initialized successfully")
 
     def initialize(self):
-        if not self.serial_module.open(USBPort):
+        if not self.serial_module.open(lcd_port()):
             # FIXME: Send a failure notice post request to server later
-            raise ConnectionError(f"Failed to open serial port {USBPort}")
+            raise ConnectionError(f"Failed to open serial port {lcd_port()}")
         
-    async def run(self, schedule_manager):
+    async def run(self, schedule_manager=None):
+        """Listens for the wake word; the schedule manager may be attached later with attach_schedule_manager()."""
+        self.schedule_manager = schedule_manager
+        self.start_wake_word()
         try:
             while not is_exit_event_set():
                 try:
                     if not hasattr(self, 'device_retry_count'):
                         self.device_retry_count = 0
-                        
-                    res, trigger_type = self.wake_word.listen_for_wake_word(
-                        schedule_manager=schedule_manager, 
-                        py_recorder=self.py_recorder
-                    )
+
+                    suspects = ()
+                    if self.supervisor.unhealthy():
+                        await self.supervisor.recover()
+
+                    # The wake word runs on its own audio thread; the loop stays free until it posts an event
+                    self.wake_word.arm()
+                    trigger_type, error = await self.wake_word.next_event()
+                    if error is not None:
+                        suspects = ('wake_word',)
+                        raise error
                     
                     # Reset retry count on successful operation
                     self.device_retry_count = 0
                     
-                    if res:
-                        if trigger_type and trigger_type == WakeWordType.TRIGGER:
-                            await self.process_conversation()
-                        
-                        if trigger_type and trigger_type == WakeWordType.SCHEDULE:
-                            await self.scheduled_conversation()
-                    else:
-                        if trigger_type is WakeWordType.OTHER:
-                            self.cleanup()
-                            break
-                    
-                    await asyncio.sleep(1)
+                    if trigger_type == WakeWordType.TRIGGER:
+                        await self.converse(ConversationState.LISTENING)
+                    elif trigger_type == WakeWordType.SCHEDULE:
+                        await self.converse(ConversationState.OPENING)
+                    elif trigger_type == WakeWordType.BUTTON:
+                        await asyncio.to_thread(self.wake_word.open_settings)
+                    elif trigger_type is WakeWordType.OTHER:
+                        self.cleanup()
+                        break
                     
                 except Exception as e:
                     self.device_retry_count += 1
                     core_logger.error(f"Error occurred wake word listening: {e}")
                     
-                    if self.device_retry_count > 3:  # Max retries before reinitializing
+                    if self.device_retry_count > 3:  # Max retries before restarting every component
                         core_logger.info("Too many device errors, reinitializing...")
-                        self.cleanup()
-                        await asyncio.sleep(2)
-                        await self.reinitialize()
+                        await self.reinitialize(e)
                         self.device_retry_count = 0
-                    else:
+                    elif not await self.supervisor.recover(suspects, error=e):
                         await asyncio.sleep(1)
                         
         except Exception as e:
             core_logger.error(f"Error occurred in core: {e}")
+        finally:
+            self.wake_word.close()
+            core_logger.info(f"Device recovery: {self.supervisor.stats()}")
 
-    async def reinitialize(self):
-        try:
-            if self.py_recorder:
-                self.py_recorder.stop_stream()
-            
-            # Create new instance
-            self.py_recorder = PyRecorder()  
-            self.wake_word = WakeWord(
-                args=self.args, 
-                audio_player=self.audio_player, 
-                serial_module=self.serial_module
-            )
-            
-            if not self.serial_module.isPortOpen:
-                if not self.serial_module.open(USBPort):
-                    raise ConnectionError(f"Failed to open serial port {USBPort}")
-                    
-            core_logger.info("Successfully reinitialized devices")
-            
-        except Exception as e:
-            core_logger.error(f"Failed to reinitialize: {e}")
-            raise
-
-    async def process_conversation(self):
-        conversation_active = True
-        silence_count = 0
-        max_silence = 2
-
-        while conversation_active and not is_exit_event_set():
-            if not self.serial_port_check():
-                break
-
-            self.display.start_listening_display(SatoruHappy)
-            frames = self.py_recorder.record_question(audio_player=self.audio_player)
-
-            if not frames:
-                silence_count += 1
-                if silence_count >= max_silence:
-                    core_logger.info("Maximum silence reached. Ending conversation.")
-                    conversation_active = False
-                continue
-            else:
-                silence_count = 0
-
-            input_audio_file = AIOutputAudio
-            self.py_recorder.save_audio(frames, input_audio_file)
-
-            self.display.stop_listening_display()
-
-            try:
-                conversation_ended = self.ai_client.process_audio(input_audio_file)
-                if conversation_ended:
-                    conversation_active = False
-            except Exception as e:
-                core_logger.error(f"Error processing conversation: {e}")
-                self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
-                conversation_active = False
-
-            await asyncio.sleep(0.1)
-
-        self.display.fade_in_logo(SeamanLogo)
-
-    async def scheduled_conversation(self):
-        conversation_active = True
-        silence_count = 0
-        max_silence = 2
-        text_initiation = "こんにちは"
-
-        try:
-            core_logger.info("Starting scheduled conversation")
-            conversation_ended, _ = self.ai_client.process_text(text_initiation)
-            
-            if conversation_ended:
-                core_logger.info("Conversation ended after initial greeting")
-                self.display.fade_in_logo(SeamanLogo)
-                return
-
-            await asyncio.sleep(0.5)
-
-            while conversation_active and not is_exit_event_set():
-                if not self.serial_port_check():
-                    break
-
-                self.display.start_listening_display(SatoruHappy)
-                frames = self.py_recorder.record_question(audio_player=self.audio_player)
-
-                if not frames:
-                    silence_count += 1
-                    if silence_count >= max_silence:
-                        core_logger.info("Maximum silence reached. Ending conversation.")
-                        conversation_active = False
-                    continue
-                else:
-                    silence_count = 0
-
-                input_audio_file = AIOutputAudio
-                self.py_recorder.save_audio(frames, input_audio_file)
-
-                self.display.stop_listening_display()
+    def start_wake_word(self):
+        self.wake_word.start(asyncio.get_running_loop(), self.py_recorder)
 
-                try:
-                    conversation_ended = self.ai_client.process_audio(input_audio_file)
-                    if conversation_ended:
-                        conversation_active = False
-                except Exception as e:
-                    core_logger.error(f"Error processing conversation: {e}")
-                    self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
-                    conversation_active = False
+    def attach_schedule_manager(self, schedule_manager):
+        self.schedule_manager = schedule_manager
 
-                await asyncio.sleep(0.1)
+    def restart_capture(self):
+        # Speech captured during a reply belongs to the broken stream
+        self.barge_in.reset()
+        self.py_recorder.restart()
 
+    async def reinitialize(self, error=None):
+        """Restarts every device subsystem in place; the recorder, Porcupine and menus stay loaded."""
+        if await self.supervisor.restart_all(error=error):
+            core_logger.info("Successfully reinitialized devices")
+        else:
+            core_logger.error(f"Failed to reinitialize: {self.supervisor.unhealthy()} still unhealthy")
+
+    async def converse(self, state):
+        """Runs one conversation; wake words start it in LISTENING, scheduled reminders in OPENING."""
+        engine = ConversationEngine(
+            ai_client=self.ai_client,
+            py_recorder=self.py_recorder,
+            audio_player=self.audio_player,
+            display=self.display,
+            barge_in=self.barge_in,
+            tracer=self.tracer,
+            serial_check=self.serial_port_check,
+            take_prepared_opener=self.take_prepared_opener,
+            wake_detected_at=self.wake_word.detected_at if state is ConversationState.LISTENING else None,
+        )
+        turns = await engine.run(state)
+        core_logger.info(f"Conversation finished after {turns} turns")
+        self.record_event('conversation', start=state.value, turns=turns)
+
+    def record_event(self, name, **fields):
+        if self.telemetry_store is None:
+            return
+        try:
+            self.telemetry_store.record_event(name, **fields)
         except Exception as e:
-            core_logger.error(f"Error in scheduled conversation: {e}")
-            self.audio_player.sync_audio_and_gif(ErrorAudio, SpeakingGif)
-        finally:
-            self.display.fade_in_logo(SeamanLogo)
+            core_logger.warning(f"Failed to record {name} event: {e}")
+
+    async def take_prepared_opener(self):
+        prefetcher = self.schedule_manager.prefetcher if self.schedule_manager else None
+        if prefetcher is None:
+            return None
+        prepared = await prefetcher.take(self.schedule_manager.last_trigger_key)
+        core_logger.info(f"Prepared opener {'used' if prepared else 'unavailable'} "
+                         f"({prefetcher.hits} used, {prefetcher.misses} missed)")
+        return prepared
 
     def serial_port_check(self):
         if not self.serial_module.isPortOpen:
             core_logger.info("Serial connection closed. Attempting to reopen...")
             for attempt in range(3):
-                if self.serial_module.open(USBPort):
+                if self.serial_module.open(lcd_port()):
                     core_logger.info("Successfully reopened serial connection.")
                     return True
                 core_logger.info(f"Attempt {attempt + 1} failed. Retrying in 1 second...")
@@ -215,6 +174,12 @@ class SpeakerCore:
                     self.py_recorder.stop_stream()
                 except Exception as e:
                     core_logger.error(f"Error stopping recorder: {e}")
+
+            if self.wake_word:
+                try:
+                    self.wake_word.detector.delete()
+                except Exception as e:
+                    core_logger.error(f"Error releasing wake-word detector: {e}")
                     
             if self.display and self.serial_module and self.serial_module.isPortOpen:
                 try:
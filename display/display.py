@@ -1,6 +1,6 @@
 from contextlib import contextmanager
+from display.lipsync import LipSyncEngine
 from PIL import Image, ImageEnhance
-from pygame import mixer
 
 import io 
 import logging
@@ -28,6 +28,7 @@ class DisplayModule:
     def __init__(self, serial_module):
         self.serial_module = serial_module
         self.fade_in_steps = 7
+        self.lipsync = LipSyncEngine(serial_module)
 
     def fade_in_logo(self, logo_path):
         img = Image.open(logo_path)
@@ -54,12 +55,12 @@ class DisplayModule:
             self.serial_module.send_image_data(img_byte_arr)
             time.sleep(0.01)
 
-    def update_gif(self, gif_path):
+    def update_gif(self, gif_path, playback, frame_delay=0.1):
         frames = self.serial_module.prepare_gif(gif_path)
         all_frames = self.serial_module.precompute_frames(frames)
         
         frame_index = 0
-        while mixer.music.get_busy():
+        while not playback.is_done():
             frame = Image.open(io.BytesIO(all_frames[frame_index]))
             
             brightened_frame = self.serial_module.apply_brightness(frame)
@@ -70,7 +71,14 @@ class DisplayModule:
             
             self.serial_module.send_image_data(img_byte_arr)
             frame_index = (frame_index + 1) % len(all_frames)
-            time.sleep(0.1)
+            playback.wait(frame_delay)
+
+    def update_lipsync(self, gif_path, track, playback):
+        try:
+            self.lipsync.animate(gif_path, track, playback)
+        except Exception as e:
+            display_logger.warning(f"Lip sync failed, falling back to looping gif: {e}")
+            self.update_gif(gif_path, playback)
 
     def display_image(self, image_path):
         try:
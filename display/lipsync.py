@@ -0,0 +1,206 @@
+from bisect import bisect_right
+
+import logging
+import numpy as np
+import struct
+import threading
+import wave
+
+logging.basicConfig(level=logging.INFO)
+lipsync_logger = logging.getLogger(__name__)
+
+class LipSyncTrack:
+    """Mouth-opening levels computed from the RMS envelope of a 16-bit WAV stream.
+
+    Audio can be fed in arbitrary chunks while it is still being downloaded;
+    levels become available as soon as each hop of samples is complete.
+    """
+    def __init__(self, hop_seconds=0.05, thresholds_db=(-45.0, -33.0, -25.0)):
+        self.hop_seconds = hop_seconds
+        self.thresholds_db = np.asarray(thresholds_db, dtype=np.float32)
+        self.num_levels = len(thresholds_db) + 1
+
+        self.sample_rate = None
+        self.channels = None
+        self.complete = False
+        self.failed = False
+
+        self.levels = []
+        self.envelope = []  # RMS per hop, full scale = 1.0
+        self._change_indices = []
+        self._buffer = bytearray()
+        self._header_done = False
+        self._hop_bytes = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        track = cls(**kwargs)
+        with wave.open(path, 'rb') as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"Unsupported sample width for lip sync: {wf.getsampwidth()}")
+            track._set_format(wf.getframerate(), wf.getnchannels())
+            track._header_done = True
+            track.feed(wf.readframes(wf.getnframes()))
+        track.finish()
+        return track
+
+    def _set_format(self, sample_rate, channels):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._hop_bytes = max(1, int(sample_rate * self.hop_seconds)) * channels * 2
+
+    def _parse_header(self):
+        # RIFF/WAVE header followed by chunks; PCM starts right after the 'data' chunk header
+        if len(self._buffer) < 12:
+            return False
+        if self._buffer[:4] != b'RIFF' or self._buffer[8:12] != b'WAVE':
+            raise ValueError("Lip sync input is not a WAV stream")
+
+        offset = 12
+        while len(self._buffer) >= offset + 8:
+            chunk_id = bytes(self._buffer[offset:offset + 4])
+            chunk_size = struct.unpack('<I', self._buffer[offset + 4:offset + 8])[0]
+            if chunk_id == b'data':
+                if self.sample_rate is None:
+                    raise ValueError("WAV stream has no fmt chunk before data")
+                del self._buffer[:offset + 8]
+                return True
+            if len(self._buffer) < offset + 8 + chunk_size:
+                return False
+            if chunk_id == b'fmt ':
+                _, channels, sample_rate, _, _, bits = struct.unpack(
+                    '<HHIIHH', self._buffer[offset + 8:offset + 24])
+                if bits != 16:
+                    raise ValueError(f"Unsupported bit depth for lip sync: {bits}")
+                self._set_format(sample_rate, channels)
+            offset += 8 + chunk_size + (chunk_size & 1)
+        return False
+
+    def feed(self, data):
+        with self._lock:
+            if self.failed:
+                return
+            self._buffer.extend(data)
+            if not self._header_done:
+                try:
+                    self._header_done = self._parse_header()
+                except ValueError as e:
+                    lipsync_logger.warning(f"Lip sync disabled for this clip: {e}")
+                    self.failed = True
+                    self._buffer.clear()
+                if not self._header_done:
+                    return
+            usable = len(self._buffer) - len(self._buffer) % self._hop_bytes
+            if usable:
+                self._append_levels(bytes(self._buffer[:usable]))
+                del self._buffer[:usable]
+
+    def finish(self):
+        with self._lock:
+            if self._header_done and len(self._buffer) >= self.channels * 2:
+                tail = len(self._buffer) - len(self._buffer) % (self.channels * 2)
+                self._append_levels(bytes(self._buffer[:tail]))
+            self._buffer.clear()
+            self.complete = True
+
+    def _append_levels(self, pcm):
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+
+        hop = self._hop_bytes // (2 * self.channels)
+        padded = -len(samples) % hop
+        if padded:
+            samples = np.pad(samples, (0, padded))
+
+        rms = np.sqrt(np.mean(samples.reshape(-1, hop) ** 2, axis=1))
+        db = 20.0 * np.log10(rms + 1e-9)
+        new_levels = np.searchsorted(self.thresholds_db, db, side='right')
+
+        start = len(self.levels)
+        previous = self.levels[-1] if self.levels else -1
+        changed = np.flatnonzero(np.diff(new_levels, prepend=previous) != 0) + start
+        self.levels.extend(new_levels.tolist())
+        self.envelope.extend(rms.tolist())
+        self._change_indices.extend(changed.tolist())
+
+    def duration(self):
+        return len(self.levels) * self.hop_seconds
+
+    def level_at(self, t):
+        index = int(t / self.hop_seconds)
+        with self._lock:
+            if index < len(self.levels):
+                return self.levels[index]
+            if self.complete and self.levels:
+                return 0
+        return None
+
+    def peak_rms(self, start, end):
+        """Loudest hop between `start` and `end` seconds, or None if that audio is not known yet."""
+        first = max(0, int(start / self.hop_seconds))
+        last = int(end / self.hop_seconds) + 1
+        with self._lock:
+            if first >= len(self.envelope):
+                return 0.0 if self.complete else None
+            return max(self.envelope[first:last])
+
+    def next_change(self, t):
+        """Time of the next level change after `t`, or None if none is known yet."""
+        index = int(t / self.hop_seconds)
+        with self._lock:
+            position = bisect_right(self._change_indices, index)
+            if position < len(self._change_indices):
+                return self._change_indices[position] * self.hop_seconds
+        return None
+
+class LipSyncEngine:
+    def __init__(self, serial_module, num_levels=4):
+        self.serial_module = serial_module
+        self.num_levels = num_levels
+        self._frame_cache = {}
+        self.frames_sent = 0
+
+    def mouth_frames(self, gif_path):
+        key = (gif_path, self.serial_module.current_brightness)
+        if key not in self._frame_cache:
+            self._frame_cache = {key: self._encode_mouth_frames(gif_path)}
+        return self._frame_cache[key]
+
+    def _encode_mouth_frames(self, gif_path):
+        frames = self.serial_module.prepare_gif(gif_path)
+        stack = np.stack(frames).astype(np.int16)
+
+        # The GIF starts at rest; the further a frame is from it, the wider the mouth
+        openness = np.abs(stack - stack[0]).mean(axis=(1, 2, 3))
+        order = np.argsort(openness, kind='stable')
+        picks = order[np.linspace(0, len(order) - 1, self.num_levels).round().astype(int)]
+
+        return [self.serial_module.frame_to_bytes(frames[i]) for i in picks]
+
+    def animate(self, gif_path, track, playback):
+        frames = self.mouth_frames(gif_path)
+        scale = (len(frames) - 1) / max(1, track.num_levels - 1)
+        current_level = None
+        sent = 0
+
+        while not playback.is_done():
+            position = playback.position()
+            level = track.level_at(position)
+
+            if level is not None and level != current_level:
+                self.serial_module.send_image_data(frames[round(level * scale)])
+                current_level = level
+                sent += 1
+
+            next_change = track.next_change(position)
+            if next_change is not None:
+                playback.wait(max(0.0, next_change - playback.position()))
+            elif track.complete:
+                playback.wait()
+            else:
+                playback.wait(track.hop_seconds)
+
+        self.frames_sent += sent
+        lipsync_logger.info(f"Lip sync sent {sent} frames for {playback.elapsed():.1f}s of audio")
@@ -1,11 +1,14 @@
 from google.oauth2.credentials import Credentials
 from google.cloud.firestore import Client
+from fireclient.telemetry import TelemetryWriter
+from fireclient.telemetry_store import telemetry_document
 from requests.exceptions import HTTPError
 
 import json
 import logging
 import os
 import requests
+import threading
 
 logging.basicConfig(level=logging.INFO)
 fireclient_logger = logging.getLogger(__name__)
@@ -14,6 +17,17 @@ _DEVICE_SCHEMA = {
     'temperatureSensor': str,
     'irSensor': bool,
     'brightnessSensor': str,  
+    # Per-window aggregates from the sensor sampler
+    'temperatureMin': float,
+    'temperatureMax': float,
+    'temperatureMean': float,
+    'brightnessMin': float,
+    'brightnessMax': float,
+    'brightnessMean': float,
+    'irDutyCycle': float,
+    'irDetections': int,
+    'sampleCount': int,
+    'windowSeconds': float,
 }
 
 def _validate_data_types(data):
@@ -27,14 +41,18 @@ def _validate_data_types(data):
     return invalid_fields
   
 class FireClient:
-    def __init__(self):
-        self.db = None
+    def __init__(self, db=None, speaker_id=None):
+        """`db` replaces the signed-in Firestore client, e.g. with a LocalFirestore stand-in."""
+        self.db = db
+        self.speaker_id = speaker_id or os.environ["SPEAKER_ID"]
+        self.telemetry = None
         self.firebase_api = "https://identitytoolkit.googleapis.com/v1/accounts"
-        self.api_key = os.environ["FIREBASE_API_KEY"]
-        self.email = os.environ["FIREBASE_AUTH_EMAIL"]
-        self.password = os.environ["FIREBASE_AUTH_PASSWORD"]
-        self.project_id = os.environ["FIREBASE_PROJECT_ID"]
-        self.initialize()
+        if db is None:
+            self.api_key = os.environ["FIREBASE_API_KEY"]
+            self.email = os.environ["FIREBASE_AUTH_EMAIL"]
+            self.password = os.environ["FIREBASE_AUTH_PASSWORD"]
+            self.project_id = os.environ["FIREBASE_PROJECT_ID"]
+            self.initialize()
 
     def initialize(self):
         response = self.sign_in_with_email_and_password(self.api_key, self.email, self.password)
@@ -54,20 +72,27 @@ class FireClient:
             
         return req.json()
     
-    def fetch_schedule(self):
-        try:
-            doc_ref = self.db.collection('schedulers').document('medicine_reminder_time')
-            doc = doc_ref.get()
-            if doc.exists:
-                return doc.to_dict()
-            else:
-                fireclient_logger.info("Failed to fetch schedule")
-                return {}
-        except Exception as e:
-            fireclient_logger.error(f"Error occurred in fetching schedule: {e}")
-            
-        return {}
-        
+    def reconnect(self):
+        """Signs in again; the ID token behind a long-lived listener expires after an hour."""
+        if hasattr(self, 'api_key'):
+            self.initialize()
+
+    def schedule_ref(self):
+        return self.db.collection('schedulers').document('medicine_reminder_time')
+
+    def watch_schedule(self, on_change, **kwargs):
+        """Pushes every schedule change to `on_change(schedule)` from a listener thread."""
+        watcher = ScheduleWatcher(self, on_change, **kwargs)
+        watcher.start()
+        return watcher
+
+    def speaker_ref(self):
+        return self.db.collection('speakers').document(self.speaker_id)
+
+    def write_sensor_data(self, data):
+        # One merge-write creates or updates the document without reading it first
+        self.speaker_ref().set(data, merge=True)
+
     def update_sensor_data(self, data = {}):
         try:
             invalid_fields = _validate_data_types(data)
@@ -76,19 +101,154 @@ class FireClient:
                 fireclient_logger.error(f"Failed to update sensor data. Invalid data type")
                 return False
 
-            doc_ref = self.db.collection('speakers').document(os.environ["SPEAKER_ID"])
-
-            doc = doc_ref.get()
-            if doc.exists:
-                doc_ref.update(data)
-                message = "Sensor data updated successfully"
-            else:
-                doc_ref.set(data)
-                message = "Sensor data created successfully"
-
-            fireclient_logger.info(message)
+            self.write_sensor_data(data)
+            fireclient_logger.info("Sensor data updated successfully")
             return True
         except Exception as e:
             fireclient_logger.error(f"Error in sensor data update: {e}")
             
-        return False
\ No newline at end of file
+        return False
+
+    def upload_telemetry(self, store_id, rows):
+        """Uploads stored telemetry rows; returns once they are written and raises if they could not be.
+
+        Sensor readings go through the coalescing merge-writer, so a backlog of
+        them becomes one write of the newest values to the speaker document.
+        Device events are written as documents under the speaker in one commit.
+        """
+        readings = {}
+        events = []
+        for row in rows:
+            if row[1] == 'sensor':
+                readings.update(row[3])
+            else:
+                events.append(row)
+        if readings and self.submit_sensor_data(readings) and not self.telemetry.flush():
+            raise ConnectionError("Sensor data merge-write failed")
+        if events:
+            self.upload_events(store_id, events)
+
+    def upload_events(self, store_id, rows):
+        collection = self.speaker_ref().collection('telemetry')
+        batch = self.db.batch()
+        for row in rows:
+            document_id, body = telemetry_document(store_id, row)
+            batch.set(collection.document(document_id), body)
+        batch.commit()
+
+    def submit_sensor_data(self, data):
+        """Queues `data` for the background telemetry writer; returns False if it is invalid."""
+        invalid_fields = _validate_data_types(data)
+        if invalid_fields:
+            fireclient_logger.error(f"Rejected sensor data with invalid fields: {invalid_fields}")
+            return False
+        if self.telemetry is None:
+            self.telemetry = TelemetryWriter(self.write_sensor_data)
+        self.telemetry.submit(data)
+        return True
+
+    def close(self):
+        if self.telemetry is not None:
+            self.telemetry.close()
+            fireclient_logger.info(f"Telemetry: {self.telemetry.stats()}")
+
+def _snapshot_schedule(snapshot):
+    # Document watches deliver a list with zero (deleted) or one snapshot
+    if isinstance(snapshot, (list, tuple)):
+        snapshot = snapshot[0] if snapshot else None
+    if snapshot is None or not snapshot.exists:
+        return {}
+    return snapshot.to_dict()
+
+class ScheduleWatcher:
+    """Keeps the schedule current through a Firestore real-time listener.
+
+    A supervisor thread resubscribes whenever the listener stops streaming. While
+    it is down, the document is polled instead, backing off from `min_poll` to
+    `max_poll` seconds, and after repeated failures the client signs in again.
+    Changes are pushed to `on_change` only when the schedule actually differs.
+    """
+    def __init__(self, fire_client, on_change, check_interval=10, min_poll=15, max_poll=180, reconnect_after=3):
+        self.fire_client = fire_client
+        self.on_change = on_change
+        self.check_interval = check_interval
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.reconnect_after = reconnect_after
+
+        self.watch = None
+        self.subscribes = 0
+        self.polls = 0
+        self.snapshots = 0
+        self.poll_delay = check_interval  # seconds until the watcher next checks the listener or polls
+        self._last = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="schedule-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._unsubscribe()
+
+    def _deliver(self, schedule):
+        with self._lock:
+            if schedule == self._last:
+                return
+            self._last = schedule
+        try:
+            self.on_change(schedule)
+        except Exception as e:
+            fireclient_logger.error(f"Schedule change handler failed: {e}")
+
+    def _on_snapshot(self, snapshot, changes, read_time):
+        self.snapshots += 1
+        self._deliver(_snapshot_schedule(snapshot))
+
+    def _subscribe(self):
+        self._unsubscribe()
+        self.watch = self.fire_client.schedule_ref().on_snapshot(self._on_snapshot)
+        self.subscribes += 1
+        fireclient_logger.info(f"Subscribed to schedule changes (subscription {self.subscribes})")
+
+    def _unsubscribe(self):
+        watch, self.watch = self.watch, None
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                fireclient_logger.warning(f"Error closing schedule listener: {e}")
+
+    def _active(self):
+        return self.watch is not None and self.watch.is_active
+
+    def _poll(self):
+        self.polls += 1
+        self._deliver(_snapshot_schedule(self.fire_client.schedule_ref().get()))
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            if self._active():
+                failures = 0
+                self.poll_delay = self.check_interval
+            else:
+                try:
+                    if failures and failures % self.reconnect_after == 0:
+                        self.fire_client.reconnect()
+                    # The poll both bridges the gap and catches changes made while unsubscribed
+                    self._poll()
+                    self._subscribe()
+                    failures = 0
+                    self.poll_delay = self.check_interval
+                except Exception as e:
+                    failures += 1
+                    self.poll_delay = min(self.max_poll, self.min_poll * 2 ** (failures - 1))
+                    fireclient_logger.warning(f"Schedule listener unavailable ({e}), "
+                                              f"polling again in {self.poll_delay}s")
+            self._stop.wait(self.poll_delay)
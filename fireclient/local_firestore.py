@@ -0,0 +1,198 @@
+"""In-process stand-in for the parts of google.cloud.firestore.Client that FireClient uses.
+
+    fire_client = FireClient(db=LocalFirestore())
+
+Documents live in memory. Listeners are called on a dispatcher thread the way
+Firestore's watch stream calls them, and break_listeners() ends every stream
+as a dropped connection would. `latency()`, if given, returns the seconds each
+read or commit waits first, standing in for the network round trip. For the real wire protocol, point the regular
+client at the Firestore emulator with FIRESTORE_EMULATOR_HOST instead.
+"""
+import copy
+import datetime
+import logging
+import queue
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+local_firestore_logger = logging.getLogger(__name__)
+
+class DocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self.exists else None
+
+class Watch:
+    def __init__(self, store, path, callback):
+        self._store = store
+        self._path = path
+        self._callback = callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+        self._store._remove_watch(self)
+
+class DocumentReference:
+    def __init__(self, store, collection, document_id):
+        self._store = store
+        self.id = document_id
+        self.path = f"{collection}/{document_id}"
+
+    def get(self):
+        return self._store._get(self)
+
+    def set(self, data, merge=False):
+        self._store._write(self, data, merge=merge)
+
+    def update(self, data):
+        if not self._store._exists(self.path):
+            raise KeyError(f"No document to update: {self.path}")
+        self._store._write(self, data, merge=True)
+
+    def delete(self):
+        self._store._write(self, None)
+
+    def on_snapshot(self, callback):
+        return self._store._add_watch(self, callback)
+
+    def collection(self, name):
+        return CollectionReference(self._store, f"{self.path}/{name}")
+
+class CollectionReference:
+    def __init__(self, store, name):
+        self._store = store
+        self.id = name
+
+    def document(self, document_id):
+        return DocumentReference(self._store, self.id, document_id)
+
+class WriteBatch:
+    max_operations = 500  # Firestore's limit per commit
+
+    def __init__(self, store):
+        self._store = store
+        self._operations = []
+
+    def set(self, reference, data, merge=False):
+        self._operations.append((reference, data, merge))
+
+    def update(self, reference, data):
+        self._operations.append((reference, data, True))
+
+    def delete(self, reference):
+        self._operations.append((reference, None, False))
+
+    def commit(self):
+        if len(self._operations) > self.max_operations:
+            raise ValueError(f"A batch holds at most {self.max_operations} writes, got {len(self._operations)}")
+        self._store._commit(self._operations)
+        self._operations = []
+
+class LocalFirestore:
+    def __init__(self, latency=None):
+        self.latency = latency
+        self.documents = {}
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        self.fail_reads = False  # set to make get() and new listeners fail like an unreachable backend
+        self.fail_writes = False  # set to make writes and batch commits fail
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._events = queue.Queue()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="local-firestore-watch", daemon=True)
+        self._dispatcher.start()
+
+    def collection(self, name):
+        return CollectionReference(self, name)
+
+    def _exists(self, path):
+        with self._lock:
+            return path in self.documents
+
+    def _snapshot(self, reference):
+        with self._lock:
+            data = copy.deepcopy(self.documents.get(reference.path))
+        return DocumentSnapshot(reference, data)
+
+    def _round_trip(self):
+        if self.latency is not None:
+            time.sleep(self.latency())
+
+    def _get(self, reference):
+        self._round_trip()
+        if self.fail_reads:
+            raise ConnectionError("Local Firestore is unavailable")
+        self.reads += 1
+        return self._snapshot(reference)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def _apply(self, reference, data, merge):
+        if data is None:
+            self.documents.pop(reference.path, None)
+        elif merge and reference.path in self.documents:
+            self.documents[reference.path].update(copy.deepcopy(data))
+        else:
+            self.documents[reference.path] = copy.deepcopy(data)
+        return list(self._watches.get(reference.path, ()))
+
+    def _write(self, reference, data, merge=False):
+        self._commit([(reference, data, merge)])
+
+    def _commit(self, operations):
+        self._round_trip()
+        if self.fail_writes:
+            raise ConnectionError("Local Firestore is unavailable")
+        notify = []
+        with self._lock:
+            self.commits += 1
+            for reference, data, merge in operations:
+                self.writes += 1
+                notify.extend((watch, reference) for watch in self._apply(reference, data, merge))
+        for event in notify:
+            self._events.put(event)
+
+    def _add_watch(self, reference, callback):
+        if self.fail_reads:
+            raise ConnectionError("Local Firestore is unavailable")
+        watch = Watch(self, reference.path, callback)
+        with self._lock:
+            self._watches.setdefault(reference.path, []).append(watch)
+        # Like Firestore, a new listener first receives the current state
+        self._events.put((watch, reference))
+        return watch
+
+    def _remove_watch(self, watch):
+        with self._lock:
+            watches = self._watches.get(watch._path, [])
+            if watch in watches:
+                watches.remove(watch)
+
+    def break_listeners(self):
+        """Ends every listener stream, as a dropped connection would."""
+        with self._lock:
+            watches = [watch for watches in self._watches.values() for watch in watches]
+            self._watches.clear()
+        for watch in watches:
+            watch.is_active = False
+
+    def _dispatch(self):
+        while True:
+            watch, reference = self._events.get()
+            if not watch.is_active:
+                continue
+            self.reads += 1
+            snapshot = self._snapshot(reference)
+            try:
+                watch._callback([snapshot] if snapshot.exists else [], [], datetime.datetime.now(datetime.timezone.utc))
+            except Exception as e:
+                local_firestore_logger.error(f"Listener callback failed: {e}")
@@ -0,0 +1,135 @@
+from collections import deque
+from utils.stats import summarize
+
+import logging
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+telemetry_logger = logging.getLogger(__name__)
+
+class TelemetryWriter:
+    """Coalesces field updates for one document and sends them as a single merge-write.
+
+    submit() only merges into the pending fields, newest value per field, and
+    returns at once. A background worker flushes when `max_fields` fields are
+    pending or the oldest pending update is `max_delay` seconds old. A failed
+    write keeps its fields pending, under any newer values, and is retried with
+    backoff.
+    """
+    def __init__(self, write, max_fields=16, max_delay=5.0, max_backoff=60.0, window=200):
+        self.write = write
+        self.max_fields = max_fields
+        self.max_delay = max_delay
+        self.max_backoff = max_backoff
+
+        self.submitted = 0  # field updates handed to submit()
+        self.sent = 0  # field values actually written
+        self.writes = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=window)
+
+        self._pending = {}
+        self._pending_since = None
+        self._retry_at = 0.0
+        self._backoff = 0.0
+        self._in_flight = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fields):
+        with self._condition:
+            first = not self._pending
+            if first:
+                self._pending_since = time.monotonic()
+            self._pending.update(fields)
+            self.submitted += len(fields)
+            # The worker sleeps until a deadline exists, or until the size threshold moves it up
+            if first or len(self._pending) >= self.max_fields:
+                self._condition.notify()
+
+    def _due_in(self, now):
+        if not self._pending:
+            return None
+        due = now if len(self._pending) >= self.max_fields else self._pending_since + self.max_delay
+        return max(due, self._retry_at) - now
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        if not self._pending:
+                            return
+                        break
+                    due_in = self._due_in(time.monotonic())
+                    if due_in is not None and due_in <= 0:
+                        break
+                    self._condition.wait(due_in)
+                batch, self._pending, self._pending_since = self._pending, {}, None
+                self._in_flight = True
+            sent = self._send(batch)
+            with self._condition:
+                self._in_flight = False
+                if self._closed and not sent:
+                    return  # one last attempt on close; the failed fields stay in pending()
+                self._condition.notify_all()
+
+    def _send(self, batch):
+        started = time.monotonic()
+        try:
+            self.write(batch)
+        except Exception as e:
+            self.failures += 1
+            self._backoff = min(self.max_backoff, max(1.0, self._backoff * 2))
+            telemetry_logger.warning(f"Telemetry write of {len(batch)} fields failed, retrying in {self._backoff:.0f}s: {e}")
+            with self._condition:
+                # Newer values submitted meanwhile win over the failed batch
+                self._pending = {**batch, **self._pending}
+                if self._pending_since is None:
+                    self._pending_since = started
+                self._retry_at = time.monotonic() + self._backoff
+            return False
+        self.latencies.append(time.monotonic() - started)
+        self.writes += 1
+        self.sent += len(batch)
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        return True
+
+    def flush(self, timeout=10):
+        """Asks the worker to send everything pending now; returns True once nothing is pending."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            failures = self.failures
+            if self._pending:
+                self._pending_since = time.monotonic() - self.max_delay
+                self._retry_at = 0.0
+                self._condition.notify()
+            # A failed attempt ends the wait; the worker goes back to its backoff
+            while (self._pending or self._in_flight) and self.failures == failures and time.monotonic() < deadline:
+                self._condition.wait(0.05)
+            return not self._pending and not self._in_flight
+
+    def pending(self):
+        with self._condition:
+            return dict(self._pending)
+
+    def close(self, timeout=10):
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'submitted': self.submitted,
+            'sent': self.sent,
+            'coalesced': self.submitted - self.sent - len(self.pending()),
+            'writes': self.writes,
+            'failures': self.failures,
+            'write_latency_s': summarize(list(self.latencies), (50, 95)),
+        }
@@ -0,0 +1,217 @@
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logging.basicConfig(level=logging.INFO)
+telemetry_store_logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS telemetry (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class TelemetryStore:
+    """Append-only local log of sensor readings and device events, kept until they are uploaded.
+
+    SQLite in WAL mode, so recording is a local insert that never waits on the
+    network or on a concurrent drain. The log is bounded to `max_rows`: when it
+    overflows, the oldest sensor readings go first and device events are kept
+    as long as possible.
+    """
+    def __init__(self, path, max_rows=200_000, compact_every=500):
+        self.path = path
+        self.max_rows = max_rows
+        self.compact_every = compact_every
+        self.dropped = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.store_id = self._store_id()
+
+    def _store_id(self):
+        # Prefixes uploaded document ids, so a recreated database never overwrites older uploads
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'store_id'").fetchone()
+        if row:
+            return row[0]
+        store_id = uuid.uuid4().hex[:12]
+        self._db.execute("INSERT INTO meta (key, value) VALUES ('store_id', ?)", (store_id,))
+        return store_id
+
+    def record(self, kind, payload, recorded_at=None):
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        with self._lock:
+            self._db.execute("INSERT INTO telemetry (kind, recorded_at, payload) VALUES (?, ?, ?)",
+                             (kind, recorded_at, json.dumps(payload, ensure_ascii=False)))
+            self._inserts += 1
+            if self._inserts % self.compact_every == 0:
+                self._enforce_bound()
+
+    def record_sensor(self, reading):
+        self.record('sensor', reading)
+
+    def record_event(self, name, **fields):
+        self.record('event', {'name': name, **fields})
+
+    def pending(self, limit=500, after_id=0):
+        """Returns up to `limit` (id, kind, recorded_at, payload) rows, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, kind, recorded_at, payload FROM telemetry WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit)).fetchall()
+        return [(row_id, kind, recorded_at, json.loads(payload)) for row_id, kind, recorded_at, payload in rows]
+
+    def ack(self, row_ids):
+        if not row_ids:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM telemetry WHERE id = ?", [(row_id,) for row_id in row_ids])
+            self._db.execute("COMMIT")
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM telemetry").fetchone()[0]
+
+    def _enforce_bound(self):
+        excess = self._db.execute("SELECT COUNT(*) FROM telemetry").fetchone()[0] - self.max_rows
+        if excess <= 0:
+            return
+        for kind_filter in ("kind = 'sensor'", "1"):
+            if excess <= 0:
+                break
+            deleted = self._db.execute(
+                f"DELETE FROM telemetry WHERE id IN "
+                f"(SELECT id FROM telemetry WHERE {kind_filter} ORDER BY id LIMIT ?)", (excess,)).rowcount
+            excess -= deleted
+            self.dropped += deleted
+        telemetry_store_logger.warning(f"Telemetry backlog over {self.max_rows} rows, dropped {self.dropped} so far")
+
+    def compact(self):
+        """Returns freed pages to the filesystem and truncates the WAL; cheap when there is nothing to do."""
+        with self._lock:
+            self._enforce_bound()
+            self._db.execute("PRAGMA incremental_vacuum")
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class TelemetryDrain:
+    """Uploads the store's backlog in bulk batches whenever the backend is reachable.
+
+    `upload(rows)` must write a whole batch or raise. After a failure the worker
+    backs off exponentially; notify() (called after each record) wakes it so new
+    data goes out promptly once connectivity returns.
+    """
+    def __init__(self, store, upload, batch_size=500, idle_interval=60.0, min_backoff=5.0, max_backoff=300.0,
+                 compact_interval=3600.0):
+        self.store = store
+        self.upload = upload
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.compact_interval = compact_interval
+
+        self.uploaded = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_drain_s = None
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="telemetry-drain", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def notify(self):
+        self._wake.set()
+
+    def drain(self):
+        """Uploads batches until the backlog is empty; raises on the first failed batch."""
+        started = time.monotonic()
+        sent = 0
+        while not self._stop.is_set():
+            rows = self.store.pending(self.batch_size)
+            if not rows:
+                break
+            self.upload(rows)
+            self.store.ack([row[0] for row in rows])
+            self.batches += 1
+            self.uploaded += len(rows)
+            sent += len(rows)
+        if sent:
+            self.last_drain_s = round(time.monotonic() - started, 3)
+            telemetry_store_logger.info(f"Uploaded {sent} telemetry rows in {self.last_drain_s}s")
+        return sent
+
+    def _run(self):
+        backoff = 0.0
+        last_compact = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.drain()
+                backoff = 0.0
+            except Exception as e:
+                self.failures += 1
+                backoff = min(self.max_backoff, max(self.min_backoff, backoff * 2))
+                telemetry_store_logger.warning(f"Telemetry upload failed, {self.store.count()} rows kept, "
+                                               f"retrying in {backoff:.0f}s: {e}")
+
+            if time.monotonic() - last_compact >= self.compact_interval:
+                self.store.compact()
+                last_compact = time.monotonic()
+
+            if backoff:
+                # New records do not cut a backoff short
+                self._stop.wait(backoff)
+            else:
+                self._wake.wait(self.idle_interval)
+            self._wake.clear()
+
+    def stats(self):
+        return {
+            'backlog': self.store.count(),
+            'uploaded': self.uploaded,
+            'batches': self.batches,
+            'failures': self.failures,
+            'dropped': self.store.dropped,
+            'last_drain_s': self.last_drain_s,
+        }
+
+def telemetry_document(store_id, row):
+    """Firestore document id and body for one stored row."""
+    row_id, kind, recorded_at, payload = row
+    return f"{store_id}-{row_id}", {
+        'kind': kind,
+        'recordedAt': datetime.datetime.fromtimestamp(recorded_at, tz=datetime.timezone.utc),
+        **payload,
+    }
@@ -1,8 +1,5 @@
-from core import SpeakerCore
-from fireclient.fireclient import FireClient
-from aiclient.conversation import ConversationClient
 from utils.define import *
-from utils.scheduler import ScheduleManager
+from utils.startup import StartupTimer
 from utils.utils import set_exit_event
 
 import asyncio
@@ -18,9 +15,7 @@ def signal_handler(signum, frame):
     main_logger.info(f"Received {signum} signal. Initiating graceful shutdown...")
     set_exit_event()
 
-async def main():
-    aiClient = ConversationClient()
-
+def parse_args():
     parser = argparse.ArgumentParser()
     # Pico
     parser.add_argument('--access_key', help='AccessKey for Porcupine', default=os.environ["PICO_ACCESS_KEY"])
@@ -29,27 +24,101 @@ async def main():
     parser.add_argument('--sensitivities', nargs='+', help="Sensitivities for keywords", type=float, default=[0.5, 0.5])
 
     # OpenAi
-    parser.add_argument('--aiclient', help='Asynchronous openAi client', default=aiClient)
+    parser.add_argument('--aiclient', help='Asynchronous openAi client (created during startup)', default=None)
+    parser.add_argument('--local_intents', help='Answer short, predictable replies without the LLM', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--barge_in', help='Stop replies when the user talks over them', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--prefetch_lead_seconds', help='Prepare the scheduled opener this long before the reminder', type=float, default=PrefetchLeadSeconds)
+
+    return parser.parse_args()
+
+# Heavy modules are imported inside these so independent ones load and initialize concurrently
+def create_ai_client(local_intents):
+    from aiclient.conversation import AsyncConversationClient
+    client = AsyncConversationClient()
+    client.intent_router.enabled = local_intents
+    return client
+
+def create_fire_client():
+    from fireclient.fireclient import FireClient
+    return FireClient()
+
+def create_porcupine(args):
+    from pico.pico import PicoVoiceTrigger
+    return PicoVoiceTrigger(args)
+
+def create_recorder():
+    import audio.player  # pygame import overlaps with the PortAudio scan
+    from audio.recorder import PyRecorder
+    return PyRecorder()
+
+def create_telemetry_store():
+    from fireclient.telemetry_store import TelemetryStore
+    return TelemetryStore(TELEMETRY_DB_FILE)
 
-    args = parser.parse_args()
+def create_speaker(args, py_recorder, porcupine, telemetry_store):
+    from core import SpeakerCore
+    return SpeakerCore(args, py_recorder=py_recorder, porcupine=porcupine, telemetry_store=telemetry_store)
 
-    speaker = SpeakerCore(args)
-    fire_client = FireClient()
-    schedule_manager = ScheduleManager(serial_module=speaker.serial_module, fire_client=fire_client)
+def create_schedule_manager(speaker, fire_client, prefetcher):
+    from utils.scheduler import ScheduleManager
+    return ScheduleManager(serial_module=speaker.serial_module, fire_client=fire_client, prefetcher=prefetcher,
+                           telemetry_store=speaker.telemetry_store, on_trigger=speaker.wake_word.request_schedule)
+
+async def main():
+    startup = StartupTimer()
+    args = parse_args()
+    loop = asyncio.get_running_loop()
+
+    # Cloud sign-in is the slowest step and only the scheduler needs it, so listening does not wait for it
+    fire_client_task = asyncio.create_task(startup.run('firestore', create_fire_client))
+    aiClient, porcupine, py_recorder, telemetry_store, _ = await asyncio.gather(
+        startup.run('ai_client', create_ai_client, args.local_intents),
+        startup.run('porcupine', create_porcupine, args),
+        startup.run('audio', create_recorder),
+        startup.run('telemetry', create_telemetry_store),
+        startup.run('ports', usb_ports),
+    )
+    args.aiclient = aiClient
+
+    speaker = await startup.run('speaker', create_speaker, args, py_recorder, porcupine, telemetry_store)
     aiClient.setAudioPlayer(speaker.audio_player)
+    speaker_task = asyncio.create_task(speaker.run())
 
+    schedule_manager = None
+    fire_client = None
     try:
-        await speaker.run(schedule_manager)
+        listening = await asyncio.to_thread(speaker.wake_word.listening.wait, 30)
+        if listening:
+            startup.milestone('first_wake_frame')
+
+        from aiclient.prefetch import ReminderPrefetcher
+        prefetcher = ReminderPrefetcher(aiClient, loop, lead_time=args.prefetch_lead_seconds)
+        fire_client = await fire_client_task
+        schedule_manager = await startup.run('scheduler', create_schedule_manager, speaker, fire_client, prefetcher)
+        speaker.attach_schedule_manager(schedule_manager)
+        startup.milestone('ready')
+        startup.report()
+
+        await speaker_task
 
     except KeyboardInterrupt:
         main_logger.info("KeyboardInterrupt received. Shutting down...")
     except Exception as e:
         main_logger.error(f"An unexpected error occurred: {e}", exc_info=True)
     finally:
+        if not speaker_task.done():
+            set_exit_event()
+            await asyncio.gather(speaker_task, return_exceptions=True)
+        if schedule_manager is not None:
+            schedule_manager.stop()
+        if fire_client is not None:
+            fire_client.close()
+        telemetry_store.close()
         speaker.cleanup()
-        
+        await aiClient.aclose()
+
 if __name__ == '__main__':
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
 
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -1,3 +1,5 @@
+from ctypes import ArgumentError, byref, c_int
+
 import logging
 import pvporcupine 
 
@@ -5,9 +7,21 @@ logging.basicConfig(level=logging.INFO)
 pico_logger = logging.getLogger(__name__)
 
 class PicoVoiceTrigger:
-    def __init__(self, args):
-        self.porcupine = self._create_porcupine(args.access_key, args.model_path, args.keyword_paths, args.sensitivities)
+    def __init__(self, args, porcupine=None):
+        """`porcupine` replaces the engine created from `args`, e.g. with a stand-in for benchmarks."""
+        self.porcupine = porcupine or self._create_porcupine(args.access_key, args.model_path, args.keyword_paths,
+                                                             args.sensitivities)
         self.frame_length = self.porcupine.frame_length
+        self.sample_rate = self.porcupine.sample_rate
+        # Native entry point of the pinned pvporcupine, so a frame already in C-compatible memory is not
+        # copied again. It is private API: process() falls back to the public call if it goes away.
+        self._process_func = getattr(self.porcupine, '_process_func', None)
+        self._handle = getattr(self.porcupine, '_handle', None)
+        self.native = self._process_func is not None and self._handle is not None
+        if not self.native:
+            self._log_fallback("engine has no _process_func/_handle")
+        self._result = c_int()
+        self._result_ref = byref(self._result)
 
     def _create_porcupine(self,access_key, model_path, keyword_paths, sensitivities):
         try:
@@ -35,7 +49,21 @@ class PicoVoiceTrigger:
             pico_logger.error(f"Failed to initialize Porcupine: {e}")
             raise e
     
-    def process(self, audio_frame):
+    def process(self, audio_frame, pointer=None):
+        """`pointer`, a ctypes int16 pointer to `audio_frame`'s samples, skips the per-frame ctypes copy."""
+        if pointer is not None and self.native:
+            try:
+                if self._process_func(self._handle, pointer, self._result_ref) == 0:  # PV_STATUS_SUCCESS
+                    return self._result.value
+            except (AttributeError, TypeError, ArgumentError) as e:
+                self._log_fallback(e)
+                self.native = False
+        # The public call validates the frame and raises Porcupine's own exception for a failure
         return self.porcupine.process(audio_frame)
-    
-    
\ No newline at end of file
+
+    def _log_fallback(self, reason):
+        pico_logger.warning(f"Porcupine zero-copy process disabled ({reason}), using process(); "
+                            f"check the pvporcupine pin in requirements.txt")
+
+    def delete(self):
+        self.porcupine.delete()
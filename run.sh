@@ -28,6 +28,15 @@ else
     echo "PulseAudio is already running."
 fi
 
+export OPENAI_API_KEY='key'
+# export OPENAI_BASE_URL='http://127.0.0.1:8089/v1'  # local stand-in: python3 -m tools.fake_openai_server
+export PICO_ACCESS_KEY='another-key'
+export SPEAKER_ID='example-speaker-id'
+export FIREBASE_API_KEY='api-key'
+export FIREBASE_PROJECT_ID='project-id'
+export FIREBASE_AUTH_EMAIL='example@gmail.com'
+export FIREBASE_AUTH_PASSWORD='example-password'
+
 run_setup() {
     echo "Running setup..."
     python3 setup.py
@@ -67,14 +76,6 @@ fi
 
 source .venv/bin/activate
 
-export OPENAI_API_KEY='key'
-export PICO_ACCESS_KEY='another-key'
-export SPEAKER_ID='example-speaker-id'
-export FIREBASE_API_KEY='api-key'
-export FIREBASE_PROJECT_ID='project-id'
-export FIREBASE_AUTH_EMAIL='example@gmail.com'
-export FIREBASE_AUTH_PASSWORD='example-password'
-
 run_main_program() {
     echo "Starting AI Speaker System..."
     python3 main.py &
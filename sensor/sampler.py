@@ -0,0 +1,116 @@
+import logging
+import numpy as np
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+sampler_logger = logging.getLogger(__name__)
+
+class SensorSampler:
+    """Samples thermal, IR and luminosity at `rate_hz` into fixed NumPy ring buffers.
+
+    Reads go through the MCU's shared inputs snapshot, so a sample reuses the
+    button poller's latest getInputs response instead of adding serial traffic.
+    take_window() reduces everything sampled since the previous call to one set
+    of aggregates; only those are uploaded.
+    """
+    def __init__(self, serial_module, rate_hz=1.0, window_seconds=180):
+        self.serial_module = serial_module
+        self.interval = 1.0 / rate_hz
+        # Room for one and a half windows, so a late upload job loses nothing
+        self.capacity = max(16, int(rate_hz * window_seconds * 1.5))
+
+        self.samples = 0
+        self.missed = 0
+        self.overwritten = 0
+
+        self._times = np.zeros(self.capacity, dtype=np.float64)
+        self._thermal = np.zeros(self.capacity, dtype=np.float32)
+        self._luminosity = np.zeros(self.capacity, dtype=np.float32)
+        self._ir = np.zeros(self.capacity, dtype=np.bool_)
+        self._window_start = 0  # sample number the current window starts at
+        self._last_ir = False  # IR state at the end of the previous window, for edges across windows
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sensor-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            self.sample()
+            # Fixed-rate ticks; a slow read skips ahead instead of bunching samples
+            next_at = max(next_at + self.interval, time.monotonic())
+            self._stop.wait(next_at - time.monotonic())
+
+    def sample(self):
+        try:
+            inputs = self.serial_module.latest_inputs(max_age=self.interval)
+            result = inputs['result'] if inputs and 'result' in inputs else None
+            if result is not None:
+                self.add(result['thermal'], result['ir_detect'], result['luminosity'])
+                return
+        except Exception as e:
+            sampler_logger.error(f"Error sampling sensors: {e}")
+        self.missed += 1
+
+    def add(self, thermal, ir_detect, luminosity, at=None):
+        with self._lock:
+            i = self.samples % self.capacity
+            self._times[i] = time.time() if at is None else at
+            self._thermal[i] = thermal
+            self._luminosity[i] = luminosity
+            self._ir[i] = ir_detect
+            self.samples += 1
+
+    def take_window(self):
+        """Aggregates the samples since the previous call and starts a new window; {} if there were none."""
+        with self._lock:
+            end = self.samples
+            start = max(self._window_start, end - self.capacity)
+            self.overwritten += start - self._window_start
+            self._window_start = end
+            if start == end:
+                return {}
+            order = np.arange(start, end) % self.capacity
+            times = self._times[order]
+            thermal = self._thermal[order]
+            luminosity = self._luminosity[order]
+            ir = self._ir[order]
+            previous_ir, self._last_ir = self._last_ir, bool(ir[-1])
+
+        # Presence onsets, counting one that started right at the window boundary
+        detections = int(np.count_nonzero(ir[1:] & ~ir[:-1])) + int(ir[0] and not previous_ir)
+        return {
+            # The latest values keep the fields the app already reads
+            'temperatureSensor': f"{thermal[-1]:.2f}",
+            'irSensor': bool(ir[-1]),
+            'brightnessSensor': f"{luminosity[-1]:.2f}",
+            'temperatureMin': round(float(thermal.min()), 2),
+            'temperatureMax': round(float(thermal.max()), 2),
+            'temperatureMean': round(float(thermal.mean()), 2),
+            'brightnessMin': round(float(luminosity.min()), 2),
+            'brightnessMax': round(float(luminosity.max()), 2),
+            'brightnessMean': round(float(luminosity.mean()), 2),
+            'irDutyCycle': round(float(ir.mean()), 3),
+            'irDetections': detections,
+            'sampleCount': int(len(order)),
+            'windowSeconds': round(float(times[-1] - times[0]), 1),
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'samples': self.samples,
+                'missed': self.missed,
+                'overwritten': self.overwritten,
+                'buffered': min(self.samples - self._window_start, self.capacity),
+            }
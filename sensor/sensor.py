@@ -4,17 +4,39 @@ logging.basicConfig(level=logging.INFO)
 sensor_logger = logging.getLogger(__name__)
 
 class SpeakerSensor:
-    def __init__(self, serial_module, fire_client):
+    thresholds = {
+        'temperatureSensor': 0.5,  
+        'irSensor': None,  
+        'brightnessSensor': 5.0  
+    }
+
+    def __init__(self, serial_module, fire_client, telemetry_store=None, on_record=None, sampler=None):
+        """With a `sampler`, each update uploads the aggregates of its window instead of one fresh reading."""
         self.serial_module = serial_module
         self.fire_client = fire_client
+        self.telemetry_store = telemetry_store
+        self.on_record = on_record
+        self.sampler = sampler
         self.auth_token =  None
         self.last_sensor_data = None
 
     def update_sensor_data(self):
-        current_sensor_data = self.get_current_sensor_data()
-        if self.should_update_sensor_data(current_sensor_data):
+        if self.sampler is not None:
+            current_sensor_data = self.sampler.take_window()
+        else:
+            current_sensor_data = self.get_current_sensor_data()
+        if not current_sensor_data or not self.should_update_sensor_data(current_sensor_data):
+            return
+        if self.telemetry_store is not None:
+            # Kept locally first, so a reading survives an outage; the drain hands it to the merge-writer
+            self.telemetry_store.record_sensor(current_sensor_data)
+            self.last_sensor_data = current_sensor_data
+            if self.on_record:
+                self.on_record()
+        else:
             try:
-                success = self.fire_client.update_sensor_data(current_sensor_data)
+                # Queued for the telemetry writer; the upload happens off this thread
+                success = self.fire_client.submit_sensor_data(current_sensor_data)
                 if success:
                     self.last_sensor_data = current_sensor_data
                 else:
@@ -26,13 +48,10 @@ class SpeakerSensor:
         if not self.last_sensor_data:
             return True
         
-        thresholds = {
-            'temperatureSensor': 0.5,  
-            'irSensor': None,  
-            'brightnessSensor': 5.0  
-        }
-        
-        for key, threshold in thresholds.items():
+        if 'irDetections' in current_sensor_data and self.window_changed(current_sensor_data):
+            return True
+
+        for key, threshold in self.thresholds.items():
             if key not in self.last_sensor_data:
                 return True
             
@@ -55,6 +74,13 @@ class SpeakerSensor:
         
         return False
 
+    def window_changed(self, window):
+        # Presence or a swing inside the window counts even when its last values match the previous upload
+        return (window['irDetections'] > 0
+                or window['irDutyCycle'] != self.last_sensor_data.get('irDutyCycle')
+                or window['temperatureMax'] - window['temperatureMin'] >= self.thresholds['temperatureSensor']
+                or window['brightnessMax'] - window['brightnessMin'] >= self.thresholds['brightnessSensor'])
+
     def get_current_sensor_data(self):
         inputs = self.serial_module.get_inputs()
         if inputs and 'result' in inputs:
@@ -69,6 +69,19 @@ class RaspberryPiSetup:
             return False
         return True
     
+    def build_canned_responses(self):
+        print("Rendering canned response audio...")
+        if not os.environ.get("OPENAI_API_KEY"):
+            print("OPENAI_API_KEY is not set. Skipping canned responses; error replies will use the TTS cache or the generic error sound.")
+            return True
+
+        project_dir = os.path.dirname(os.path.abspath(__file__))
+        success, output = self.run_command(f"cd {project_dir} && {self.python_path} -m aiclient.canned")
+        if not success:
+            print("Failed to render canned responses")
+            print(f"Error output: {output}")
+        return success
+
     def check_pulse_audio_installation(self):
         success, output = self.run_command("dpkg -s pulseaudio")
         return success and "Status: install ok installed" in output
@@ -110,6 +123,8 @@ pcm.!default {
         if not self.install_python_packages():
             print("Failed to install Python packages. Exiting.")
             return False
+        if not self.build_canned_responses():
+            print("Continuing without the canned response pack.")
         if not self.check_pulse_audio_installation():
             self.setup_pulse_audio()
         else:
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules are imported from the project root, as when the app runs from it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+from aiclient.call_policy import CallPolicy, CircuitBreaker, CircuitOpenError, StagePolicy
+
+import asyncio
+import pytest
+import time
+
+def _policy(reset_timeout=0.05):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+    return CallPolicy(stages={'chat': StagePolicy(deadline=5.0, max_attempts=1)}, breaker=breaker, seed=0)
+
+async def _trip(policy):
+    async def failing():
+        raise TimeoutError("upstream timed out")
+    with pytest.raises(TimeoutError):
+        await policy.acall('chat', failing)
+    assert policy.breaker.state == 'open'
+
+def test_open_breaker_rejects_calls():
+    async def scenario():
+        policy = _policy(reset_timeout=60)
+        await _trip(policy)
+
+        async def ok():
+            return 'answer'
+        with pytest.raises(CircuitOpenError):
+            await policy.acall('chat', ok)
+
+    asyncio.run(scenario())
+
+def test_successful_probe_closes_breaker():
+    async def scenario():
+        policy = _policy()
+        await _trip(policy)
+        await asyncio.sleep(0.06)
+
+        async def ok():
+            return 'answer'
+        assert await policy.acall('chat', ok) == 'answer'
+        assert policy.breaker.state == 'closed'
+
+    asyncio.run(scenario())
+
+def test_cancelled_probe_releases_half_open_breaker():
+    async def scenario():
+        policy = _policy()
+        await _trip(policy)
+        await asyncio.sleep(0.06)
+
+        async def hangs():
+            await asyncio.sleep(60)
+        probe = asyncio.ensure_future(policy.acall('chat', hangs))
+        await asyncio.sleep(0.01)
+        assert policy.breaker.state == 'half_open'
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        await asyncio.sleep(0.06)
+        async def ok():
+            return 'answer'
+        assert await policy.acall('chat', ok) == 'answer'
+        assert policy.breaker.state == 'closed'
+
+    asyncio.run(scenario())
+
+def test_interrupted_blocking_probe_releases_breaker():
+    policy = _policy()
+
+    def failing():
+        raise TimeoutError("upstream timed out")
+    with pytest.raises(TimeoutError):
+        policy.call('chat', failing)
+    time.sleep(0.06)
+
+    def interrupted():
+        raise KeyboardInterrupt()
+    with pytest.raises(KeyboardInterrupt):
+        policy.call('chat', interrupted)
+
+    assert policy.call('chat', lambda: 'answer') == 'answer'
+    assert policy.breaker.state == 'closed'
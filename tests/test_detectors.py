@@ -0,0 +1,29 @@
+from wakeword.detectors import StubDetector, WakeWordDetector
+
+import pytest
+
+def test_stub_detector_satisfies_protocol():
+    assert isinstance(StubDetector(), WakeWordDetector)
+
+def test_stub_detector_fires_on_chosen_frames():
+    detector = StubDetector(triggers=(2,))
+    assert [detector.process(None) for _ in range(4)] == [-1, -1, 0, -1]
+    detector = StubDetector(every=3)
+    assert [detector.process(None) for _ in range(6)] == [-1, -1, 0, -1, -1, 0]
+    assert detector.detections == 2
+
+def test_porcupine_detector_satisfies_protocol():
+    pytest.importorskip('pvporcupine')
+    from pico.pico import PicoVoiceTrigger
+
+    class _Porcupine:
+        frame_length = 512
+        sample_rate = 16000
+
+        def process(self, pcm):
+            return -1
+
+        def delete(self):
+            pass
+
+    assert isinstance(PicoVoiceTrigger(None, porcupine=_Porcupine()), WakeWordDetector)
@@ -0,0 +1,55 @@
+from audio.frames import FrameRing, PvFrameSource
+
+import numpy as np
+
+class _Recorder:
+    """PvRecorder stand-in; `native` is the private read function, or None like a recorder without one."""
+    def __init__(self, frame_length, native=None):
+        self.frame_length = frame_length
+        self.reads = 0
+        if native is not None:
+            self._read_func = native
+            self._handle = object()
+
+    def read(self):
+        self.reads += 1
+        return list(range(self.frame_length))
+
+def _ring():
+    return FrameRing(frame_length=4, sample_rate=16, seconds=1.0)
+
+def test_native_read_fills_the_slot():
+    def native(handle, pcm):
+        for i in range(4):
+            pcm[i] = 7
+        return 0
+    recorder = _Recorder(4, native=native)
+    source = PvFrameSource(recorder)
+    ring = _ring()
+    assert source.read_into(ring)
+    assert list(ring.commit()) == [7, 7, 7, 7]
+    assert source.native and recorder.reads == 0
+
+def test_public_read_without_native_function():
+    recorder = _Recorder(4)
+    source = PvFrameSource(recorder)
+    ring = _ring()
+    assert not source.native
+    assert source.read_into(ring)
+    assert list(ring.commit()) == [0, 1, 2, 3]
+
+def test_changed_native_function_falls_back_to_public_read():
+    # An upstream release with a different private signature
+    recorder = _Recorder(4, native=lambda handle: None)
+    source = PvFrameSource(recorder)
+    ring = _ring()
+    assert source.read_into(ring)
+    assert not source.native
+    assert list(ring.commit()) == [0, 1, 2, 3]
+    assert source.read_into(ring) and recorder.reads == 2
+
+def test_commit_returns_read_only_view():
+    ring = _ring()
+    ring.slot()[:] = np.arange(4)
+    view = ring.commit()
+    assert not view.flags.writeable
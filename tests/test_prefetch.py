@@ -0,0 +1,57 @@
+from aiclient.prefetch import ReminderPrefetcher
+
+import asyncio
+import pytest
+
+class _Prepared:
+    def age(self):
+        return 0.0
+
+class _SlowClient:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    async def prepare_reply(self, text, output_base):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return _Prepared()
+
+def test_take_waits_for_in_flight_prefetch():
+    async def scenario():
+        prefetcher = ReminderPrefetcher(_SlowClient(0.05), asyncio.get_running_loop())
+        prefetcher.request('08:30')
+        await asyncio.sleep(0)
+        assert await prefetcher.take('08:30') is not None
+        assert prefetcher.hits == 1
+
+    asyncio.run(scenario())
+
+def test_cancelled_turn_is_not_swallowed_by_take():
+    async def scenario():
+        prefetcher = ReminderPrefetcher(_SlowClient(0.2), asyncio.get_running_loop())
+        prefetcher.request('08:30')
+        await asyncio.sleep(0)
+        turn = asyncio.ensure_future(prefetcher.take('08:30'))
+        await asyncio.sleep(0.01)
+        turn.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await turn
+        # The prefetch keeps going for the next take()
+        assert not prefetcher._task.done()
+        assert await prefetcher.take('08:30') is not None
+
+    asyncio.run(scenario())
+
+def test_invalidated_prefetch_falls_through_to_live_reply():
+    async def scenario():
+        prefetcher = ReminderPrefetcher(_SlowClient(0.2), asyncio.get_running_loop())
+        prefetcher.request('08:30')
+        await asyncio.sleep(0)
+        turn = asyncio.ensure_future(prefetcher.take('08:30'))
+        await asyncio.sleep(0.01)
+        prefetcher.invalidate()
+        assert await turn is None
+        assert prefetcher.misses == 1
+
+    asyncio.run(scenario())
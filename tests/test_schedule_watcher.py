@@ -0,0 +1,111 @@
+from fireclient.fireclient import FireClient, ScheduleWatcher
+from fireclient.local_firestore import LocalFirestore
+from utils.scheduler import ScheduleManager
+
+import pytest
+import threading
+import time
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.002)
+    return False
+
+class _Changes:
+    def __init__(self):
+        self.schedules = []
+        self._lock = threading.Lock()
+
+    def __call__(self, schedule):
+        with self._lock:
+            self.schedules.append(schedule)
+
+    def last(self):
+        with self._lock:
+            return self.schedules[-1] if self.schedules else None
+
+@pytest.fixture
+def db():
+    return LocalFirestore()
+
+@pytest.fixture
+def fire_client(db):
+    return FireClient(db=db, speaker_id='test-speaker')
+
+def _watch(fire_client, on_change, **kwargs):
+    settings = {'check_interval': 0.01, 'min_poll': 0.05, 'max_poll': 0.2}
+    settings.update(kwargs)
+    watcher = ScheduleWatcher(fire_client, on_change, **settings)
+    watcher.start()
+    return watcher
+
+def test_initial_snapshot_is_applied(fire_client):
+    fire_client.schedule_ref().set({'hour': 8, 'minute': 30})
+    changes = _Changes()
+    watcher = _watch(fire_client, changes)
+    try:
+        assert _wait_for(lambda: watcher.snapshots >= 1)
+        assert changes.last() == {'hour': 8, 'minute': 30}
+        # The poll and the first snapshot carry the same schedule, so it is applied once
+        assert changes.schedules == [{'hour': 8, 'minute': 30}]
+    finally:
+        watcher.stop()
+
+def test_resubscribes_after_listener_drops(db, fire_client):
+    fire_client.schedule_ref().set({'hour': 8, 'minute': 30})
+    changes = _Changes()
+    watcher = _watch(fire_client, changes)
+    try:
+        assert _wait_for(lambda: watcher.subscribes == 1 and watcher.snapshots >= 1)
+        db.break_listeners()
+        # Edited while no listener is streaming; the poll on resubscribe picks it up
+        fire_client.schedule_ref().set({'hour': 9, 'minute': 0})
+        assert _wait_for(lambda: watcher.subscribes == 2)
+        assert _wait_for(lambda: changes.last() == {'hour': 9, 'minute': 0})
+
+        fire_client.schedule_ref().set({'hour': 10, 'minute': 15})
+        assert _wait_for(lambda: changes.last() == {'hour': 10, 'minute': 15})
+    finally:
+        watcher.stop()
+
+def test_poll_backoff_grows_then_resets(db, fire_client):
+    db.fail_reads = True
+    watcher = _watch(fire_client, _Changes())
+    delays = []
+    try:
+        def observe():
+            if not delays or delays[-1] != watcher.poll_delay:
+                delays.append(watcher.poll_delay)
+            return watcher.poll_delay == watcher.max_poll
+        assert _wait_for(observe)
+        assert delays[-3:] == [0.05, 0.1, 0.2]
+        assert watcher.subscribes == 0
+
+        db.fail_reads = False
+        assert _wait_for(lambda: watcher.subscribes == 1)
+        assert _wait_for(lambda: watcher.poll_delay == watcher.check_interval)
+    finally:
+        watcher.stop()
+
+class _QuietMCU:
+    def get_inputs(self):
+        return {'result': {'thermal': 22.0, 'ir_detect': False, 'luminosity': 100.0, 'buttons': [0, 0, 0]}}
+
+    def latest_inputs(self, max_age):
+        return self.get_inputs()
+
+def test_schedule_updates_reach_apply_schedule(fire_client):
+    fire_client.schedule_ref().set({'hour': 8, 'minute': 30})
+    manager = ScheduleManager(serial_module=_QuietMCU(), fire_client=fire_client)
+    try:
+        assert _wait_for(lambda: manager.current_schedule == {'hour': 8, 'minute': 30})
+        assert [reminder_id for _, reminder_id in manager.timers.upcoming()] == ['default']
+
+        fire_client.schedule_ref().set({'reminders': [{'id': 'evening', 'hour': 20, 'minute': 0}]})
+        assert _wait_for(lambda: manager.current_schedule.get('reminders') is not None)
+        assert [reminder_id for _, reminder_id in manager.timers.upcoming()] == ['evening']
+    finally:
+        manager.stop()
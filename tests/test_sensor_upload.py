@@ -0,0 +1,72 @@
+from fireclient.fireclient import FireClient
+from fireclient.local_firestore import LocalFirestore
+from fireclient.telemetry_store import TelemetryDrain, TelemetryStore
+from sensor.sensor import SpeakerSensor
+
+import os
+import pytest
+
+class _MCU:
+    def __init__(self):
+        self.thermal = 22.0
+
+    def get_inputs(self):
+        return {'result': {'thermal': self.thermal, 'ir_detect': False, 'luminosity': 100.0, 'buttons': [0, 0, 0]}}
+
+@pytest.fixture
+def setup(tmp_path):
+    db = LocalFirestore()
+    fire_client = FireClient(db=db, speaker_id='test-speaker')
+    store = TelemetryStore(os.path.join(tmp_path, 'telemetry', 'log.sqlite3'))
+    mcu = _MCU()
+    sensor = SpeakerSensor(serial_module=mcu, fire_client=fire_client, telemetry_store=store)
+    drain = TelemetryDrain(store, lambda rows: fire_client.upload_telemetry(store.store_id, rows))
+    yield db, fire_client, store, mcu, sensor, drain
+    fire_client.close()
+    store.close()
+
+def _telemetry_documents(db):
+    return [path for path in db.documents if path.startswith('speakers/test-speaker/telemetry/')]
+
+def test_reading_is_uploaded_once_as_a_merge_write(setup):
+    db, fire_client, store, mcu, sensor, drain = setup
+    sensor.update_sensor_data()
+    sensor.update_sensor_data()  # unchanged, below the threshold
+    assert store.count() == 1
+
+    drain.drain()
+    assert store.count() == 0
+    assert db.documents['speakers/test-speaker']['temperatureSensor'] == '22.00'
+    assert _telemetry_documents(db) == []
+    assert db.writes == 1
+
+def test_backlog_coalesces_into_newest_values(setup):
+    db, fire_client, store, mcu, sensor, drain = setup
+    for thermal in (22.0, 23.0, 24.0):
+        mcu.thermal = thermal
+        sensor.update_sensor_data()
+    assert store.count() == 3
+
+    drain.drain()
+    assert db.documents['speakers/test-speaker']['temperatureSensor'] == '24.00'
+    assert db.writes == 1
+
+def test_readings_stay_in_store_while_offline(setup):
+    db, fire_client, store, mcu, sensor, drain = setup
+    db.fail_writes = True
+    sensor.update_sensor_data()
+    with pytest.raises(ConnectionError):
+        drain.drain()
+    assert store.count() == 1
+
+    db.fail_writes = False
+    drain.drain()
+    assert store.count() == 0
+    assert db.documents['speakers/test-speaker']['temperatureSensor'] == '22.00'
+
+def test_events_are_written_as_documents(setup):
+    db, fire_client, store, mcu, sensor, drain = setup
+    store.record_event('conversation', turns=2)
+    drain.drain()
+    assert len(_telemetry_documents(db)) == 1
+    assert 'speakers/test-speaker' not in db.documents
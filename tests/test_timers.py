@@ -0,0 +1,30 @@
+from utils.timers import Reminder, TimerEngine
+
+import datetime
+import threading
+import time
+
+def _reminder_in(seconds):
+    """A daily reminder on the minute boundary at least `seconds` from now."""
+    at = datetime.datetime.now() + datetime.timedelta(seconds=seconds + 60)
+    return Reminder('soon', at.hour, at.minute)
+
+def test_lead_inside_lead_window_uses_fire_key():
+    leads = []
+    led = threading.Event()
+
+    def on_lead(reminder, key):
+        leads.append(key)
+        led.set()
+
+    engine = TimerEngine(on_fire=lambda reminder, key: None, on_lead=on_lead, lead_time=600)
+    reminder = _reminder_in(5)
+    fire_key = TimerEngine.occurrence_key(reminder.next_after(time.time()))
+    engine.start()
+    try:
+        engine.set_reminders([reminder])
+        # Set closer than the lead time, so the lead runs right away
+        assert led.wait(2)
+        assert leads == [fire_key]
+    finally:
+        engine.stop()
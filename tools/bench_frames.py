@@ -0,0 +1,179 @@
+"""Measures per-frame allocations, GC activity and CPU time of the wake-word frame path, before and after.
+
+    python -m tools.bench_frames --seconds 600
+
+"before" is the previous loop: PvRecorder.read() list -> np.array -> bytes per
+frame, a fresh low-pass design per frame at calibration, and Porcupine copying
+the list into a ctypes array. "after" reads into the preallocated FrameRing and
+hands the same memory to Porcupine and the calibration. Recorder and Porcupine
+are replaced by stand-ins that mirror their Python wrappers around the native
+calls, so no microphone or AccessKey is needed.
+"""
+from audio.frames import FrameRing, PvFrameSource
+from audio.recorder import PyRecorder
+from ctypes import byref, c_int, c_int16, c_short, memmove, sizeof
+from pico.pico import PicoVoiceTrigger
+from scipy.signal import butter, lfilter
+from utils.define import RATE
+
+import argparse
+import gc
+import numpy as np
+import time
+import tracemalloc
+
+FRAME_LENGTH = 512
+
+class _ReplayRecorder:
+    """PvRecorder stand-in: same read() wrapper around a native read that copies recorded samples."""
+    def __init__(self, samples, frame_length=FRAME_LENGTH):
+        self.frame_length = frame_length
+        self._samples = np.ascontiguousarray(samples, dtype=np.int16)
+        self._address = self._samples.ctypes.data
+        self._frame_bytes = frame_length * sizeof(c_int16)
+        self._frames = len(self._samples) // frame_length
+        self._position = 0
+        self._handle = object()
+
+    def start(self):
+        pass
+
+    def _read_func(self, handle, pcm):
+        memmove(pcm, self._address + self._position * self._frame_bytes, self._frame_bytes)
+        self._position = (self._position + 1) % self._frames
+        return 0
+
+    def read(self):
+        pcm = (c_int16 * self.frame_length)()
+        self._read_func(self._handle, pcm)
+        return pcm[0:self.frame_length]
+
+class _SilentPorcupine:
+    """pvporcupine.Porcupine stand-in: same process() wrapper, a native call that never detects."""
+    frame_length = FRAME_LENGTH
+    sample_rate = RATE
+
+    def __init__(self):
+        self._handle = object()
+
+    def _process_func(self, handle, pcm, result):
+        result._obj.value = -1
+        return 0
+
+    def process(self, pcm):
+        if len(pcm) != self.frame_length:
+            raise ValueError(f"Invalid frame length. expected {self.frame_length} but received {len(pcm)}")
+        result = c_int()
+        self._process_func(self._handle, (c_short * len(pcm))(*pcm), byref(result))
+        return result.value
+
+def _previous_calibration(frames):
+    # The loop before the frame ring: a new filter design and an array per frame
+    energy_levels = []
+    for frame in frames:
+        audio_chunk = np.frombuffer(frame, dtype=np.int16)
+        b, a = butter(5, 1000 / (0.5 * RATE), btype='low', analog=False)
+        filtered_audio = lfilter(b, a, audio_chunk)
+        energy_levels.append(np.sum(filtered_audio**2) / len(filtered_audio))
+    return np.mean(energy_levels) * 3.5
+
+def run_before(recorder, porcupine, frames, calibration_frames, per_frame):
+    frame_bytes = []
+    for _ in range(frames):
+        audio_frame = recorder.read()
+        frame_bytes.append(np.array(audio_frame, dtype=np.int16).tobytes())
+        if len(frame_bytes) >= calibration_frames:
+            _previous_calibration(frame_bytes)
+            frame_bytes = []
+        porcupine.process(audio_frame)
+        per_frame()
+
+def run_after(recorder, trigger, py_recorder, ring, frames, per_frame):
+    source = PvFrameSource(recorder)
+    ring.reset()
+    for _ in range(frames):
+        source.read_into(ring)
+        pointer = ring.pointer()
+        audio_frame = ring.commit()
+        if ring.wrapped():
+            py_recorder.calibrate_energy_threshold(ring.window())
+        trigger.process(audio_frame, pointer)
+        per_frame()
+
+def run_baseline(frames, per_frame):
+    # The measuring itself, to subtract from both paths
+    for _ in range(frames):
+        per_frame()
+
+class _GCCounter:
+    def __init__(self):
+        self.collections = [0, 0, 0]
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self.collections[info['generation']] += 1
+
+def measure(name, run, frames):
+    """Runs `run(frames, per_frame)` twice: timed, then under tracemalloc for transient bytes per frame."""
+    gc.collect()
+    counter = _GCCounter()
+    gc.callbacks.append(counter)
+    started = time.perf_counter()
+    try:
+        run(frames, lambda: None)
+    finally:
+        gc.callbacks.remove(counter)
+    elapsed = time.perf_counter() - started
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        def per_frame():
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+            tracemalloc.reset_peak()
+        run(min(frames, 2000), per_frame)
+    finally:
+        tracemalloc.stop()
+
+    peaks.sort()
+    return {
+        'path': name,
+        'us_per_frame': round(elapsed / frames * 1e6, 1),
+        'transient_bytes_per_frame_p50': peaks[len(peaks) // 2],
+        'transient_bytes_per_frame_max': peaks[-1],
+        'gc_collections_per_hour': [round(c / frames * 3600 * RATE / FRAME_LENGTH) for c in counter.collections],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Allocation and GC benchmark of the wake-word frame path")
+    parser.add_argument('--seconds', type=float, default=300, help="Seconds of audio to push through each path")
+    parser.add_argument('--calibration-seconds', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    room = (rng.normal(0, 300, RATE * 10)).astype(np.int16)
+    frames = int(args.seconds * RATE / FRAME_LENGTH)
+
+    py_recorder = PyRecorder()
+    ring = FrameRing(FRAME_LENGTH, RATE, seconds=args.calibration_seconds)
+    trigger = PicoVoiceTrigger(None, porcupine=_SilentPorcupine())
+
+    results = [
+        measure('baseline', run_baseline, frames),
+        measure('before', lambda n, per_frame: run_before(_ReplayRecorder(room), _SilentPorcupine(), n,
+                                                          ring.count, per_frame), frames),
+        measure('after', lambda n, per_frame: run_after(_ReplayRecorder(room), trigger, py_recorder, ring, n,
+                                                        per_frame), frames),
+    ]
+    # Both paths must agree on the calibrated threshold
+    before_threshold = _previous_calibration([frame.tobytes() for frame in ring.window()])
+    py_recorder.calibrate_energy_threshold(ring.window())
+    print(f"frames per path: {frames} ({args.seconds:.0f}s of audio)")
+    for result in results:
+        print(result)
+    print(f"threshold before/after: {before_threshold:.3f} / {py_recorder.energy_threshold:.3f}")
+
+if __name__ == "__main__":
+    main()
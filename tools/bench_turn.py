@@ -0,0 +1,95 @@
+"""Benchmarks full conversation turns (STT -> streamed chat -> TTS) against the local OpenAI stand-in.
+
+    python -m tools.bench_turn --turns 30 --chat-latency lognormal:0.6,0.3 --token-rate 25
+"""
+from aiclient.conversation import AsyncConversationClient
+from aiclient.tts_cache import TTSCache
+from audio.player import PlaybackHandle
+from tools.fake_openai_server import FakeOpenAIServer, add_server_arguments, config_from_args
+from tools.turn_report import build_report
+from utils.stats import summarize
+from utils.tracing import TurnTrace
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import wave
+
+class _TimingAudioPlayer:
+    """Stands in for AudioPlayer: records when each clip would start playing, plays nothing.
+
+    Returns a finished PlaybackHandle like the real player, so callers that
+    inspect the playback (barge-in) run the same path as on the device.
+    """
+    def __init__(self):
+        self.play_times = []
+
+    async def sync_audio_and_gif_async(self, audio_file, gif_path, track=None):
+        self.play_times.append(time.perf_counter())
+        playback = PlaybackHandle(audio_file)
+        playback.finish()
+        return playback
+
+def _write_silence(path, seconds=1.0, rate=16000):
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b'\x00\x00' * int(seconds * rate))
+
+async def run_benchmark(args, work_dir):
+    server = FakeOpenAIServer(config_from_args(args)).start()
+    client = AsyncConversationClient(base_url=server.base_url)
+    client.tts_cache = TTSCache(os.path.join(work_dir, 'tts'), max_bytes=client.tts_cache.max_bytes if args.cache else 0)
+    player = _TimingAudioPlayer()
+    client.setAudioPlayer(player)
+
+    input_file = os.path.join(work_dir, 'input.wav')
+    _write_silence(input_file)
+
+    first_audio, totals, turns = [], [], []
+    try:
+        for _ in range(args.turns):
+            player.play_times.clear()
+            trace = TurnTrace('bench')
+            trace.mark('endpoint')
+            start = time.perf_counter()
+            await client.process_audio(input_file, trace=trace)
+            end = time.perf_counter()
+            turns.append(trace.to_record())
+            totals.append(end - start)
+            if player.play_times:
+                first_audio.append(player.play_times[0] - start)
+    finally:
+        await client.aclose()
+        server.stop()
+
+    return {
+        'time_to_first_audio_s': summarize(first_audio),
+        'turn_total_s': summarize(totals),
+        'turn_stages_s': build_report(turns),
+        'server_requests': server.counts,
+        'tts_cache': client.tts_cache.stats(),
+        'stage_latency_s': client.call_policy.latency_summary(),
+        'circuit_trips': client.call_policy.breaker.trips,
+        'intent_router': client.intent_router.stats(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end turn latency benchmark against a local OpenAI stand-in")
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--cache', action='store_true', help="Keep the TTS cache enabled across turns")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+    with tempfile.TemporaryDirectory() as work_dir:
+        report = asyncio.run(run_benchmark(args, work_dir))
+
+    for name, value in report.items():
+        print(f"{name}: {value}")
+
+if __name__ == "__main__":
+    main()
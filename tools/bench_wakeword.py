@@ -0,0 +1,162 @@
+"""Replays recorded room audio through the wake-word loop faster than real time and reports its overhead.
+
+    python -m tools.bench_wakeword --wav room.wav --loops 12
+    python -m tools.bench_wakeword --hours 1 --trigger-every 20000 --cost 0.0002
+
+The real WakeWord loop runs with a WavFileSource in place of the microphone and
+a StubDetector in place of Porcupine, so no microphone or AccessKey is needed.
+Without --wav, synthetic room noise is replayed. `--cost` adds busy work per
+frame to stand in for a real model. The report gives frames/s, how much faster
+than real time that is, where the time per frame goes, and the cost of the
+button and scheduler checks that run beside the loop.
+"""
+from audio.frames import WavFileSource
+from audio.recorder import PyRecorder
+from utils.define import RATE, WakeWordType
+from utils.timers import TimerEngine
+from wakeword.detectors import StubDetector
+from wakeword.wakeword import WakeWord
+
+import argparse
+import logging
+import numpy as np
+import os
+import tempfile
+import time
+import wave
+
+class _NullPlayer:
+    current_volume = 0.5
+
+    def play_audio(self, *args, **kwargs):
+        pass
+
+    def play_trigger_with_logo(self, *args, **kwargs):
+        pass
+
+class _IdleMCU:
+    """SerialModule stand-in with no buttons pressed."""
+    input_serial = None
+    current_brightness = 0.5
+
+    def get_inputs(self):
+        return {'result': {'thermal': 22.0, 'ir_detect': False, 'luminosity': 100.0, 'buttons': [0, 0, 0]}}
+
+class _Timed:
+    """Wraps `function` and adds up its calls and wall time."""
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+        self.seconds = 0.0
+
+    def __call__(self, *args):
+        started = time.perf_counter()
+        try:
+            return self.function(*args)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.calls += 1
+
+def _write_room_noise(path, seconds, seed):
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0, 300, int(seconds * RATE)).clip(-32768, 32767).astype(np.int16)
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(samples.tobytes())
+
+def replay(args, path, loops, timed):
+    detector = StubDetector(every=args.trigger_every, cost=args.cost)
+    source = WavFileSource(path, RATE, loops=loops)
+    wake_word = WakeWord(None, _NullPlayer(), _IdleMCU(), detector=detector, audio_source=source)
+    py_recorder = PyRecorder()
+    if timed:
+        detector.process = _Timed(detector.process)
+        source.read_into = _Timed(source.read_into)
+        py_recorder.calibrate_energy_threshold = _Timed(py_recorder.calibrate_energy_threshold)
+
+    sessions = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            # One arm() per session, as after each conversation in the app
+            wake_word.arm()
+            sessions += 1
+            if wake_word.listen_for_wake_word(py_recorder) is not WakeWordType.TRIGGER:
+                break
+    finally:
+        elapsed = time.perf_counter() - started
+        source.close()
+    return {
+        'elapsed': elapsed,
+        'frames': source.frames_read,
+        'sessions': sessions,
+        'detections': detector.detections,
+        'detector': detector.process,
+        'source': source.read_into,
+        'calibration': py_recorder.calibrate_energy_threshold,
+        'wake_word': wake_word,
+    }
+
+def _per_call_us(function, calls=2000):
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - started) / calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay benchmark of the wake-word loop")
+    parser.add_argument('--wav', help="16-bit mono WAV at the recorder rate; synthetic room noise if omitted")
+    parser.add_argument('--loops', type=int, help="Times to replay the file (default: enough for --hours)")
+    parser.add_argument('--hours', type=float, default=0.25, help="Audio to replay when --loops is not given")
+    parser.add_argument('--trigger-every', type=int, help="Detect the wake word every N frames")
+    parser.add_argument('--cost', type=float, default=0.0, help="Detector busy time per frame in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = args.wav
+        if path is None:
+            path = os.path.join(work_dir, 'room.wav')
+            _write_room_noise(path, 60, args.seed)
+        with wave.open(path, 'rb') as wf:
+            file_seconds = wf.getnframes() / wf.getframerate()
+        loops = args.loops or max(1, round(args.hours * 3600 / file_seconds))
+
+        plain = replay(args, path, loops, timed=False)
+        timed = replay(args, path, loops, timed=True)
+
+    frames = plain['frames']
+    audio_seconds = frames * plain['wake_word'].frames.frame_length / RATE
+    per_frame = plain['elapsed'] / frames * 1e6
+    components = {name: timed[name].seconds / frames * 1e6 for name in ('source', 'detector', 'calibration')}
+
+    wake_word = timed['wake_word']
+    button_us = _per_call_us(wake_word.right_button_pressed)
+    button_checks_per_hour = 3600 / wake_word.button_check_interval
+    timer_wakeups_per_hour = 3600 / TimerEngine(on_fire=None).max_sleep
+
+    report = {
+        'audio_hours': round(audio_seconds / 3600, 3),
+        'frames': frames,
+        'sessions': plain['sessions'],
+        'detections': plain['detections'],
+        'frames_per_s': round(frames / plain['elapsed']),
+        'realtime_factor': round(audio_seconds / plain['elapsed'], 1),
+        'us_per_frame': round(per_frame, 2),
+        'us_per_frame_by_part': {name: round(us, 2) for name, us in components.items()},
+        # Everything in the loop besides reading, detecting and calibrating: ring bookkeeping, checks, dispatch
+        'loop_overhead_us_per_frame': round(max(0.0, per_frame - sum(components.values())), 2),
+        # Buttons are polled on their own thread and reminders fire from the timer thread, not per frame
+        'button_check': {'us_per_call': round(button_us, 2), 'calls_per_hour': round(button_checks_per_hour),
+                         'ms_per_hour': round(button_us * button_checks_per_hour / 1000, 2)},
+        'scheduler_checks_per_frame': 0,
+        'timer_wakeups_per_hour': round(timer_wakeups_per_hour),
+    }
+    for name, value in report.items():
+        print(f"{name}: {value}")
+
+if __name__ == "__main__":
+    main()
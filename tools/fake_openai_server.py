@@ -0,0 +1,326 @@
+"""Local stand-in for the OpenAI endpoints used by the conversation client.
+
+Implements /v1/audio/transcriptions, /v1/chat/completions (plain and streaming)
+and /v1/audio/speech with seeded latency distributions, token pacing and error
+injection, so a full turn can be benchmarked offline:
+
+    python -m tools.fake_openai_server --port 8089 --chat-latency lognormal:0.6,0.3
+    export OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import argparse
+import io
+import json
+import logging
+import math
+import random
+import struct
+import threading
+import time
+import wave
+
+logging.basicConfig(level=logging.INFO)
+fake_openai_logger = logging.getLogger(__name__)
+
+_ERRORS = {
+    'rate_limit_exceeded': (429, 'requests', "Rate limit reached for requests"),
+    'insufficient_quota': (429, 'insufficient_quota', "You exceeded your current quota"),
+    'server_error': (500, 'server_error', "The server had an error while processing your request"),
+}
+
+class LatencyDistribution:
+    """Parses specs such as `const:0.2`, `uniform:0.1,0.4`, `normal:0.3,0.05` or `lognormal:0.3,0.4`."""
+    def __init__(self, spec):
+        self.spec = spec
+        kind, _, params = spec.partition(':')
+        self.kind = kind
+        self.params = [float(p) for p in params.split(',')] if params else []
+        if kind not in ('const', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng):
+        if self.kind == 'const':
+            value = self.params[0]
+        elif self.kind == 'uniform':
+            value = rng.uniform(*self.params)
+        elif self.kind == 'normal':
+            value = rng.gauss(*self.params)
+        else:
+            median, sigma = self.params
+            value = rng.lognormvariate(math.log(median), sigma)
+        return max(0.0, value)
+
+class FakeOpenAIConfig:
+    def __init__(self, stt_latency='const:0.3', chat_latency='const:0.5', tts_latency='const:0.3',
+                 token_rate=30.0, tts_bytes_per_second=96000, errors=None, seed=0,
+                 transcript="今日はもう薬を飲みました。", reply="それは良かったです。今日はどんな一日でしたか？",
+                 speech_file=None, speech_seconds_per_char=0.12):
+        self.stt_latency = LatencyDistribution(stt_latency)
+        self.chat_latency = LatencyDistribution(chat_latency)
+        self.tts_latency = LatencyDistribution(tts_latency)
+        self.token_rate = token_rate
+        self.tts_bytes_per_second = tts_bytes_per_second
+        self.errors = dict(errors or {})
+        self.seed = seed
+        self.transcript = transcript
+        self.reply = reply
+        self.speech_file = speech_file
+        self.speech_seconds_per_char = speech_seconds_per_char
+
+def _tone_wav(seconds, sample_rate=24000):
+    frames = int(seconds * sample_rate)
+    samples = (int(6000 * math.sin(2 * math.pi * 220 * i / sample_rate) * (0.5 + 0.5 * math.sin(2 * math.pi * 3 * i / sample_rate)))
+               for i in range(frames))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(struct.pack(f'<{frames}h', *samples))
+    return buffer.getvalue()
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        fake_openai_logger.debug(format % args)
+
+    @property
+    def fake(self):
+        return self.server.fake
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _maybe_fail(self, endpoint):
+        error_code = self.fake.draw_error()
+        if error_code is None:
+            return False
+        status, error_type, message = _ERRORS[error_code]
+        self.fake.record(endpoint, error_code)
+        self._send_json(status, {'error': {'message': message, 'type': error_type, 'param': None, 'code': error_code}})
+        return True
+
+    def do_POST(self):
+        body = self._read_body()
+        routes = {
+            '/v1/audio/transcriptions': self._transcriptions,
+            '/v1/chat/completions': self._chat_completions,
+            '/v1/audio/speech': self._speech,
+        }
+        route = routes.get(self.path.split('?')[0])
+        if route is None:
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}", 'type': 'invalid_request_error', 'code': None}})
+            return
+        try:
+            route(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the request (a deadline or a hedged duplicate won)
+            fake_openai_logger.debug(f"Client disconnected during {self.path}")
+
+    def _transcriptions(self, body):
+        time.sleep(self.fake.sample('stt'))
+        if self._maybe_fail('stt'):
+            return
+        text = self.fake.config.transcript
+        self.fake.record('stt', 'ok')
+        self._send_json(200, {
+            'task': 'transcribe',
+            'language': 'japanese',
+            'duration': 2.0,
+            'text': text,
+            'segments': [{
+                'id': 0, 'seek': 0, 'start': 0.0, 'end': 2.0, 'text': text, 'tokens': [],
+                'temperature': 0.0, 'avg_logprob': -0.2, 'compression_ratio': 1.0, 'no_speech_prob': 0.01,
+            }],
+        })
+
+    def _chat_completions(self, body):
+        request = json.loads(body or b'{}')
+        time.sleep(self.fake.sample('chat'))
+        if self._maybe_fail('chat'):
+            return
+
+        reply = self.fake.config.reply
+        model = request.get('model', 'gpt-4')
+        created = int(time.time())
+        prompt_tokens = sum(len(m.get('content', '')) for m in request.get('messages', []))
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(reply), 'total_tokens': prompt_tokens + len(reply)}
+        self.fake.record('chat', 'ok')
+
+        if not request.get('stream'):
+            self._send_json(200, {
+                'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}, 'finish_reason': 'stop'}],
+                'usage': usage,
+            })
+            return
+
+        def event(choices, extra=None):
+            payload = {'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': created,
+                       'model': model, 'choices': choices}
+            payload.update(extra or {})
+            self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8'))
+
+        self._start_chunked('text/event-stream')
+        token_delay = 1.0 / self.fake.config.token_rate
+        for token in reply:  # roughly one token per Japanese character
+            event([{'index': 0, 'delta': {'content': token}, 'finish_reason': None}])
+            time.sleep(token_delay)
+        event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+        if (request.get('stream_options') or {}).get('include_usage'):
+            event([], {'usage': usage})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+    def _speech(self, body):
+        request = json.loads(body or b'{}')
+        time.sleep(self.fake.sample('tts'))
+        if self._maybe_fail('tts'):
+            return
+        audio = self.fake.speech_audio(request.get('input', ''))
+        self.fake.record('tts', 'ok')
+
+        self._start_chunked('audio/wav')
+        chunk_size = 4096
+        chunk_delay = chunk_size / self.fake.config.tts_bytes_per_second
+        for offset in range(0, len(audio), chunk_size):
+            self._write_chunk(audio[offset:offset + chunk_size])
+            time.sleep(chunk_delay)
+        self._end_chunked()
+
+class FakeOpenAIServer:
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or FakeOpenAIConfig()
+        self.counts = {}
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._speech_cache = {}
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def sample(self, endpoint):
+        distribution = getattr(self.config, f"{endpoint}_latency")
+        with self._lock:
+            return distribution.sample(self._rng)
+
+    def draw_error(self):
+        with self._lock:
+            roll = self._rng.random()
+        for error_code, probability in self.config.errors.items():
+            if roll < probability:
+                return error_code
+            roll -= probability
+        return None
+
+    def record(self, endpoint, outcome):
+        with self._lock:
+            key = f"{endpoint}:{outcome}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def speech_audio(self, text):
+        if self.config.speech_file:
+            with open(self.config.speech_file, 'rb') as f:
+                return f.read()
+        seconds = max(0.3, len(text) * self.config.speech_seconds_per_char)
+        key = round(seconds, 2)
+        if key not in self._speech_cache:
+            self._speech_cache[key] = _tone_wav(key)
+        return self._speech_cache[key]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        fake_openai_logger.info(f"Fake OpenAI server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def _parse_errors(values):
+    errors = {}
+    for value in values or []:
+        code, _, probability = value.partition('=')
+        if code not in _ERRORS:
+            raise argparse.ArgumentTypeError(f"Unknown error code {code}; choose from {', '.join(_ERRORS)}")
+        errors[code] = float(probability)
+    return errors
+
+def add_server_arguments(parser):
+    parser.add_argument('--stt-latency', default='const:0.3', help="Transcription latency distribution")
+    parser.add_argument('--chat-latency', default='const:0.5', help="Time to first chat token distribution")
+    parser.add_argument('--tts-latency', default='const:0.3', help="Time to first speech byte distribution")
+    parser.add_argument('--token-rate', type=float, default=30.0, help="Streamed chat tokens per second")
+    parser.add_argument('--error', action='append', metavar='CODE=P',
+                        help="Inject an error with probability P per request (rate_limit_exceeded, insufficient_quota, server_error)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--transcript', default=FakeOpenAIConfig().transcript)
+    parser.add_argument('--reply', default=FakeOpenAIConfig().reply)
+    parser.add_argument('--speech-file', help="WAV file returned by the speech endpoint instead of a generated tone")
+
+def config_from_args(args):
+    return FakeOpenAIConfig(
+        stt_latency=args.stt_latency,
+        chat_latency=args.chat_latency,
+        tts_latency=args.tts_latency,
+        token_rate=args.token_rate,
+        errors=_parse_errors(args.error),
+        seed=args.seed,
+        transcript=args.transcript,
+        reply=args.reply,
+        speech_file=args.speech_file,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI STT/chat/TTS endpoints")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(config_from_args(args), host=args.host, port=args.port)
+    fake_openai_logger.info(f"Fake OpenAI server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        fake_openai_logger.info(f"Request counts: {server.counts}")
+
+if __name__ == "__main__":
+    main()
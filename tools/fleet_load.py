@@ -0,0 +1,240 @@
+"""Simulates a fleet of speakers against one Firestore backend and reports quota use and latency.
+
+    python -m tools.fleet_load --speakers 50 --sim-hours 2 --speedup 60 --latency lognormal:0.04,0.5
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python -m tools.fleet_load --emulator --project demo-speakers
+
+Every virtual speaker runs the real ScheduleManager (schedule listener, timer
+engine, sensor sampler, sensor job, telemetry drain), SpeakerSensor and
+FireClient code. Only the MCU is simulated. Time is compressed by `--speedup`:
+sensor sampling and upload intervals shrink by that factor, and the report
+scales counts back to simulated hours. Network latency is not compressed.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from fireclient.fireclient import FireClient
+from fireclient.local_firestore import LocalFirestore
+from fireclient.telemetry import TelemetryWriter
+from fireclient.telemetry_store import TelemetryStore
+from tools.fake_openai_server import LatencyDistribution
+from utils.define import SensorSampleRateHz
+from utils.scheduler import ScheduleManager
+from utils.stats import summarize
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+# Firestore's free daily quota and its guideline for sustained writes to one document
+_FREE_READS_PER_DAY = 50_000
+_FREE_WRITES_PER_DAY = 20_000
+_MAX_DOCUMENT_WRITES_PER_S = 1.0
+
+class SimulatedMCU:
+    """Stands in for SerialModule's sensor inputs: a slowly drifting room that people walk in and out of."""
+    def __init__(self, rng):
+        self.rng = rng
+        self.temperature = rng.uniform(18.0, 27.0)
+        self.luminosity = rng.uniform(5.0, 300.0)
+        self.present = False
+
+    def get_inputs(self):
+        # One call per simulated second of sampling
+        self.temperature += self.rng.gauss(0, 0.02)
+        self.luminosity = max(0.0, self.luminosity + self.rng.gauss(0, 1.0))
+        if self.rng.random() < (0.01 if self.present else 0.002):
+            self.present = not self.present
+        return {'result': {'thermal': self.temperature, 'ir_detect': self.present,
+                           'luminosity': self.luminosity, 'buttons': [0, 0, 0]}}
+
+    def latest_inputs(self, max_age):
+        return self.get_inputs()
+
+class FleetMeter:
+    """Per-operation latency and per-document write times, shared by every virtual speaker."""
+    def __init__(self):
+        self.calls = Counter()
+        self.writes = Counter()
+        self.errors = Counter()
+        self.latencies = defaultdict(list)
+        self.document_writes = defaultdict(list)  # path -> monotonic time of each single-document write
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, operation, writes=1, path=None):
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self.errors[operation] += 1
+            raise
+        finished = time.monotonic()
+        with self._lock:
+            self.calls[operation] += 1
+            self.writes[operation] += writes
+            self.latencies[operation].append(finished - started)
+            if path is not None:
+                self.document_writes[path].append(finished)
+
+class MeteredFireClient(FireClient):
+    def __init__(self, db, speaker_id, meter):
+        super().__init__(db=db, speaker_id=speaker_id)
+        self.meter = meter
+
+    def write_sensor_data(self, data):
+        reference = self.speaker_ref()
+        with self.meter.timed('sensor_merge', path=reference.path):
+            reference.set(data, merge=True)
+
+    def upload_events(self, store_id, rows):
+        with self.meter.timed('telemetry_batch', writes=len(rows)):
+            super().upload_events(store_id, rows)
+
+class VirtualSpeaker:
+    def __init__(self, db, speaker_id, meter, work_dir, speedup, seed):
+        self.fire_client = MeteredFireClient(db, speaker_id, meter)
+        # Pre-created so the coalescing delay is compressed with everything else
+        self.fire_client.telemetry = TelemetryWriter(self.fire_client.write_sensor_data, max_delay=5.0 / speedup)
+        self.store = TelemetryStore(os.path.join(work_dir, f"{speaker_id}.sqlite3"))
+        self.manager = ScheduleManager(
+            serial_module=SimulatedMCU(random.Random(seed)), fire_client=self.fire_client,
+            telemetry_store=self.store, sensor_update_interval=3 * 60 / speedup,
+            sensor_sample_rate=SensorSampleRateHz * speedup)
+        # The job runner's tick would otherwise stretch the compressed upload interval
+        self.manager.job_runner.interval = 0.05
+        self.manager.telemetry_drain.idle_interval = 60.0 / speedup
+
+    def stop(self):
+        self.manager.stop()
+        self.fire_client.close()
+        self.store.close()
+
+    def reads(self):
+        watcher = self.manager.schedule_watcher
+        return {'schedule_snapshot': watcher.snapshots, 'schedule_poll': watcher.polls}
+
+def _peak_rate(times, window):
+    """Most events in any `window`-long span of the sorted `times`."""
+    peak, start = 0, 0
+    for end, at in enumerate(times):
+        while at - times[start] > window:
+            start += 1
+        peak = max(peak, end - start + 1)
+    return peak
+
+def _edit_schedules(db, edits_per_hour, speedup, stop, rng):
+    reference = db.collection('schedulers').document('medicine_reminder_time')
+    edits = 0
+    while not stop.wait(3600.0 / edits_per_hour / speedup):
+        reference.set({'reminders': [{'id': 'load', 'hour': rng.randrange(24), 'minute': rng.randrange(60)}]})
+        edits += 1
+    return edits
+
+def _create_db(args):
+    if args.emulator:
+        # The client talks to FIRESTORE_EMULATOR_HOST without credentials
+        from google.cloud.firestore import Client
+        return Client(project=args.project)
+    rng = random.Random(args.seed)
+    latency = LatencyDistribution(args.latency)
+    return LocalFirestore(latency=lambda: latency.sample(rng))
+
+def run_load(args, work_dir):
+    db = _create_db(args)
+    meter = FleetMeter()
+    speakers = []
+    started = time.monotonic()
+    for i in range(args.speakers):
+        speakers.append(VirtualSpeaker(db, f"load-{i:04d}", meter, work_dir, args.speedup, args.seed + i))
+        # Spread the start-up reads like devices booting at different times
+        time.sleep(args.ramp / max(1, args.speakers))
+
+    stop = threading.Event()
+    edits = []
+    editor = None
+    if args.schedule_edits_per_hour:
+        editor = threading.Thread(target=lambda: edits.append(_edit_schedules(
+            db, args.schedule_edits_per_hour, args.speedup, stop, random.Random(args.seed))), daemon=True)
+        editor.start()
+
+    time.sleep(max(0.0, args.sim_hours * 3600 / args.speedup - (time.monotonic() - started)))
+    stop.set()
+    if editor is not None:
+        editor.join()
+    for speaker in speakers:
+        speaker.stop()
+    elapsed = time.monotonic() - started
+    return _build_report(args, speakers, meter, edits[0] if edits else 0, elapsed, db)
+
+def _build_report(args, speakers, meter, edits, elapsed, db):
+    sim_hours = elapsed * args.speedup / 3600
+    reads = Counter()
+    for speaker in speakers:
+        reads.update(speaker.reads())
+    writes = Counter(meter.writes)
+    writes['schedule_edit'] = edits
+
+    reads_per_hour = {name: round(count / sim_hours, 1) for name, count in reads.items()}
+    writes_per_hour = {name: round(count / sim_hours, 1) for name, count in writes.items()}
+    reads_per_day = sum(reads.values()) / sim_hours * 24
+    writes_per_day = sum(writes.values()) / sim_hours * 24
+
+    hot_spots = []
+    for path, times in meter.document_writes.items():
+        times = sorted(times)
+        hot_spots.append({
+            'document': path,
+            'writes_per_s': round(len(times) / (elapsed * args.speedup), 4),
+            # A simulated second lasts 1 / speedup real seconds
+            'peak_writes_per_s': _peak_rate(times, 1.0 / args.speedup),
+        })
+    hot_spots.sort(key=lambda spot: (spot['peak_writes_per_s'], spot['writes_per_s']), reverse=True)
+    # Every speaker listens to the same schedule document, so each edit is read once per speaker
+    listeners = {'schedulers/medicine_reminder_time': len(speakers)}
+
+    report = {
+        'speakers': len(speakers),
+        'simulated_hours': round(sim_hours, 2),
+        'reads_per_hour': reads_per_hour,
+        'writes_per_hour': writes_per_hour,
+        'per_speaker_per_day': {'reads': round(reads_per_day / len(speakers), 1),
+                                'writes': round(writes_per_day / len(speakers), 1)},
+        'fleet_size_within_free_quota': int(min(_FREE_READS_PER_DAY / max(reads_per_day / len(speakers), 1e-9),
+                                                _FREE_WRITES_PER_DAY / max(writes_per_day / len(speakers), 1e-9))),
+        'latency_s': {operation: summarize(values) for operation, values in meter.latencies.items()},
+        'errors': dict(meter.errors),
+        'hot_documents': hot_spots[:args.top],
+        'documents_over_write_guideline': sum(spot['peak_writes_per_s'] > _MAX_DOCUMENT_WRITES_PER_S for spot in hot_spots),
+        'listeners_per_document': listeners,
+    }
+    if isinstance(db, LocalFirestore):
+        report['backend'] = {'reads': db.reads, 'writes': db.writes, 'commits': db.commits}
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet load generator for the speaker's Firestore traffic")
+    parser.add_argument('--speakers', type=int, default=20)
+    parser.add_argument('--sim-hours', type=float, default=1.0, help="Simulated duration")
+    parser.add_argument('--speedup', type=float, default=60.0, help="Simulated seconds per real second")
+    parser.add_argument('--ramp', type=float, default=1.0, help="Real seconds over which the speakers start")
+    parser.add_argument('--schedule-edits-per-hour', type=float, default=2.0)
+    parser.add_argument('--latency', default='lognormal:0.03,0.5', help="Local stand-in round-trip latency distribution")
+    parser.add_argument('--emulator', action='store_true', help="Use the Firestore emulator at FIRESTORE_EMULATOR_HOST")
+    parser.add_argument('--project', default='demo-speakers', help="Project id for the emulator")
+    parser.add_argument('--top', type=int, default=5, help="Hot documents to list")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as work_dir:
+        report = run_load(args, work_dir)
+
+    for name, value in report.items():
+        print(f"{name}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Prints per-stage latency percentiles from the turn traces written by SpeakerCore.
+
+    python -m tools.turn_report
+    python -m tools.turn_report --kind wake --last 50
+"""
+from utils.stats import summarize
+from utils.tracing import TURN_MARKS, TURN_STAGES, read_turns
+
+import argparse
+import os
+
+# Same as TURN_TRACE_FILE; utils.define is not imported so the report also runs off-device
+_DEFAULT_TRACE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs', 'turns.jsonl')
+
+def _format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+def build_report(turns, percentiles=(50, 95, 99)):
+    """Returns {stage: summary} over the turns that recorded both ends of each stage."""
+    report = {}
+    for stage in list(TURN_STAGES) + ['turn']:
+        values = [turn['stages'][stage] for turn in turns if stage in turn.get('stages', {})]
+        if values:
+            report[stage] = summarize(values, percentiles)
+    return report
+
+def print_report(turns, percentiles=(50, 95, 99)):
+    report = build_report(turns, percentiles)
+    if not report:
+        print("No turns recorded")
+        return
+
+    outcomes = {}
+    for turn in turns:
+        outcome = turn.get('outcome', 'unknown')
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    print(f"{len(turns)} turns ({', '.join(f'{name}: {count}' for name, count in sorted(outcomes.items()))})")
+
+    header = f"{'stage':<20}{'n':>6}" + "".join(f"{f'p{p} ms':>10}" for p in percentiles)
+    print(header)
+    print("-" * len(header))
+    for stage, summary in report.items():
+        print(f"{stage:<20}{summary['count']:>6}" + "".join(f"{_format_ms(summary[f'p{p}']):>10}" for p in percentiles))
+
+    # Median offset of each mark from the start of the turn
+    print()
+    print(f"{'mark':<20}{'n':>6}{'p50 ms':>10}")
+    for mark in TURN_MARKS:
+        offsets = [turn['marks'][mark] for turn in turns if mark in turn.get('marks', {})]
+        if offsets:
+            print(f"{mark:<20}{len(offsets):>6}{_format_ms(summarize(offsets, (50,))['p50']):>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency percentiles from recorded conversation turns")
+    parser.add_argument('--file', default=_DEFAULT_TRACE_FILE, help="Turn trace file (rotated backups are read too)")
+    parser.add_argument('--kind', help="Only turns of this kind (wake, followup, scheduled)")
+    parser.add_argument('--last', type=int, help="Only the most recent N turns")
+    args = parser.parse_args()
+
+    turns = list(read_turns(args.file))
+    if args.kind:
+        turns = [turn for turn in turns if turn.get('kind') == args.kind]
+    if args.last:
+        turns = turns[-args.last:]
+    print_report(turns)
+
+if __name__ == "__main__":
+    main()
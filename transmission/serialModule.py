@@ -1,4 +1,4 @@
-from utils.define import BautRate, MCUPort
+from utils.define import BautRate, mcu_port
 from PIL import Image, ImageEnhance
 
 import json
@@ -6,6 +6,7 @@ import io
 import logging
 import numpy as np
 import serial
+import threading
 import time
 
 logging.basicConfig(level=logging.INFO)
@@ -18,7 +19,10 @@ class SerialModule:
         self.comm = None
         self.current_brightness = 1.0  
         self.current_image = None
-        self.input_serial = serial.Serial(MCUPort, BautRate, timeout=1)
+        self.input_serial = serial.Serial(mcu_port(), BautRate, timeout=1)
+        # The button poller, the settings menu and the sensor job all talk to the MCU
+        self.mcu_lock = threading.Lock()
+        self.inputs_snapshot = None  # (monotonic time, response) of the last good getInputs
 
     def set_brightness(self, brightness):
         self.current_brightness = max(0.0, min(1.0, brightness))
@@ -33,16 +37,42 @@ class SerialModule:
             serial_logger.warning(f"Failed to open port: {e}")
         return self.isPortOpen
 
+    def lcd_healthy(self):
+        return self.isPortOpen and self.comm is not None and self.comm.is_open
+
+    def reopen_lcd(self, tty):
+        try:
+            if self.comm is not None:
+                self.comm.close()
+        except Exception as e:
+            serial_logger.warning(f"Error closing LCD port: {e}")
+        self.isPortOpen = False
+        if not self.open(tty):
+            raise ConnectionError(f"Failed to open serial port {tty}")
+
+    def mcu_healthy(self):
+        return self.input_serial is not None and self.input_serial.is_open
+
+    def reopen_mcu(self):
+        with self.mcu_lock:
+            try:
+                self.input_serial.close()
+            except Exception as e:
+                serial_logger.warning(f"Error closing MCU port: {e}")
+            self.input_serial = serial.Serial(mcu_port(), BautRate, timeout=1)
+        serial_logger.info(f"MCU port {mcu_port()} reopened")
+
     def send_mcu_command(self, method, params=None):
-        serial_connection = self.input_serial  
-        
         message = {"method": method}
         if params:
             message["params"] = params
         
-        serial_connection.write(json.dumps(message).encode() + b'\n')
         try:
-            response = serial_connection.readline().decode().strip()
+            with self.mcu_lock:
+                # Read under the lock, so a port swapped by reopen_mcu() is never written after closing
+                serial_connection = self.input_serial
+                serial_connection.write(json.dumps(message).encode() + b'\n')
+                response = serial_connection.readline().decode().strip()
             
             try:
                 return json.loads(response)
@@ -60,7 +90,17 @@ class SerialModule:
         self.comm.write(data)
 
     def get_inputs(self):
-        return self.send_mcu_command("getInputs")
+        inputs = self.send_mcu_command("getInputs")
+        if inputs and 'result' in inputs:
+            self.inputs_snapshot = (time.monotonic(), inputs)
+        return inputs
+
+    def latest_inputs(self, max_age):
+        """Returns the last getInputs response if it is at most `max_age` seconds old, else reads the MCU."""
+        snapshot = self.inputs_snapshot
+        if snapshot is not None and time.monotonic() - snapshot[0] <= max_age:
+            return snapshot[1]
+        return self.get_inputs()
 
     def send_text(self):
         self.send('test'.encode())
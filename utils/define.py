@@ -1,8 +1,8 @@
 from utils.utils import *
 from enum import Enum, auto
 
+import functools
 import os
-import pyaudio
 
 # Get the current directory
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -18,6 +18,21 @@ AUDIO_DIR = os.path.join(ASSETS_DIR, 'audio')
 IMAGE_DIR = os.path.join(ASSETS_DIR, 'images')
 GIF_DIR = os.path.join(ASSETS_DIR, 'gifs')
 VOICE_TRIGGER_DIR = os.path.join(ASSETS_DIR, 'trigger')
+CANNED_AUDIO_DIR = os.path.join(AUDIO_DIR, 'canned')
+INTENTS_FILE = os.path.join(ASSETS_DIR, 'intents.json')  # optional override of the built-in local intents
+
+# Define the cache directory for synthesized speech
+CACHE_DIR = os.path.join(PARENT_DIR, 'cache')
+TTS_CACHE_DIR = os.path.join(CACHE_DIR, 'tts')
+TTS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Define the local log directory (turn latency traces)
+LOG_DIR = os.path.join(PARENT_DIR, 'logs')
+TURN_TRACE_FILE = os.path.join(LOG_DIR, 'turns.jsonl')
+
+# Define the local data directory (telemetry kept until it is uploaded)
+DATA_DIR = os.path.join(PARENT_DIR, 'data')
+TELEMETRY_DB_FILE = os.path.join(DATA_DIR, 'telemetry.sqlite3')
 
 # Define the temporary ai output audio file
 TEMP_AUDIO_FILE = os.path.join(AUDIO_DIR, 'output.wav')
@@ -26,8 +41,7 @@ TEMP_AUDIO_FILE = os.path.join(AUDIO_DIR, 'output.wav')
 if not os.path.exists(TEMP_AUDIO_FILE):
     create_empty_wav_file(TEMP_AUDIO_FILE)
 
-# Audio settings
-FORMAT = pyaudio.paInt16
+# Audio settings (FORMAT, pyaudio.paInt16, is resolved lazily below)
 CHANNELS = 1
 RATE = 16000 # Higher rates require more CPU power to process in real-time
 RECORD_SECONDS = 8
@@ -37,6 +51,14 @@ ResponseAudio = os.path.join(AUDIO_DIR, "response_audio.wav")
 TriggerAudio = os.path.join(AUDIO_DIR, "startUp.wav")
 ErrorAudio = os.path.join(AUDIO_DIR, "errorSpeech.wav")
 AIOutputAudio = TEMP_AUDIO_FILE
+PrefetchAudioBase = os.path.join(AUDIO_DIR, "prefetch_response")
+
+# scheduled conversation
+ScheduledOpenerText = "こんにちは"
+PrefetchLeadSeconds = 120
+
+# sensors
+SensorSampleRateHz = 1.0  # MCU sensor sampling rate; only per-window aggregates are uploaded
 
 # display
 SpeakingGif = os.path.join(GIF_DIR, "speakingGif.gif")
@@ -45,7 +67,17 @@ SatoruHappy = os.path.join(IMAGE_DIR, "happy.png")
 
 # serial/display Settings
 BautRate = '230400'
-USBPort, MCUPort = extract_usb_device()
+
+# Ports are discovered on first use, not at import time, so startup can overlap the scan with other work
+@functools.lru_cache(maxsize=None)
+def usb_ports():
+    return extract_usb_device()
+
+def lcd_port():
+    return usb_ports()[0]
+
+def mcu_port():
+    return usb_ports()[1]
 
 # voice trigger 
 PicoLangModel = os.path.join(VOICE_TRIGGER_DIR,"pico_voice_language_model_ja.pv")
@@ -57,4 +89,16 @@ ToshibaVoiceLibrary = os.path.join(VOICE_TRIGGER_DIR,"libVT_ARML64h.so")
 class WakeWordType(str, Enum):
     TRIGGER = auto()
     SCHEDULE = auto()
+    BUTTON = auto()
     OTHER = auto()
+
+def __getattr__(name):
+    # Keeps `from utils.define import USBPort` working without importing pyaudio or scanning ports up front
+    if name == 'USBPort':
+        return lcd_port()
+    if name == 'MCUPort':
+        return mcu_port()
+    if name == 'FORMAT':
+        import pyaudio
+        return pyaudio.paInt16
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
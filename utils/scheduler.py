@@ -1,89 +1,141 @@
+from concurrent.futures import ThreadPoolExecutor
+from fireclient.telemetry_store import TelemetryDrain
+from sensor.sampler import SensorSampler
 from sensor.sensor import SpeakerSensor
+from utils.define import SensorSampleRateHz
+from utils.timers import TimerEngine, reminders_from_schedule
 
 import datetime
 import logging
 import schedule
+import threading
 
 logging.basicConfig(level=logging.INFO)
 scheduler_logger = logging.getLogger(__name__)
 
-scheduler = schedule.Scheduler()
+class JobRunner:
+    """Runs due jobs on worker threads, so Firestore fetches and sensor uploads never block the audio path.
 
-def run_pending():
-    scheduler.run_pending()
+    A job is not started again while its previous run is still in flight.
+    Without `jobs` the runner gets its own empty schedule.Scheduler.
+    """
+    def __init__(self, max_workers=2, interval=0.5, jobs=None):
+        self.interval = interval
+        self.jobs = jobs if jobs is not None else schedule.Scheduler()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
 
-def every(interval):
-    return scheduler.every(interval)
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="job-runner", daemon=True)
+        self._thread.start()
 
-def clear(tag=None):
-    return scheduler.clear(tag)
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for job in list(self.jobs.jobs):
+                if not job.should_run:
+                    continue
+                with self._lock:
+                    if job in self._running:
+                        continue
+                    self._running.add(job)
+                self.executor.submit(self._run_job, job)
+
+    def _run_job(self, job):
+        try:
+            ret = job.run()
+            if isinstance(ret, schedule.CancelJob) or ret is schedule.CancelJob:
+                self.jobs.cancel_job(job)
+        except Exception as e:
+            scheduler_logger.error(f"Scheduled job {job} failed: {e}")
+            # Wait for the next interval instead of retrying on every tick
+            job.last_run = datetime.datetime.now()
+            job._schedule_next_run()
+        finally:
+            with self._lock:
+                self._running.discard(job)
 
 class ScheduleManager:
-    def __init__(self, serial_module, fire_client):
-        self.sensor = SpeakerSensor(serial_module=serial_module, fire_client=fire_client)
+    def __init__(self, serial_module, fire_client, prefetcher=None, telemetry_store=None, on_trigger=None,
+                 sensor_update_interval=3 * 60, sensor_sample_rate=SensorSampleRateHz):
+        """`on_trigger()` is called from the timer thread when a reminder is due; it must return quickly."""
+        self.telemetry_drain = None
+        if telemetry_store is not None:
+            self.telemetry_drain = TelemetryDrain(
+                telemetry_store, lambda rows: fire_client.upload_telemetry(telemetry_store.store_id, rows))
+        self.sensor_update_interval = sensor_update_interval  # seconds between sensor aggregate uploads
+        self.sensor_sampler = SensorSampler(serial_module, rate_hz=sensor_sample_rate,
+                                            window_seconds=self.sensor_update_interval)
+        self.sensor = SpeakerSensor(serial_module=serial_module, fire_client=fire_client, telemetry_store=telemetry_store,
+                                    on_record=self.telemetry_drain.notify if self.telemetry_drain else None,
+                                    sampler=self.sensor_sampler)
         
         self.fire_client = fire_client
+        self.prefetcher = prefetcher
+        self.on_trigger = on_trigger
+        self.last_trigger_key = None
         self.current_schedule = {}
-        self.schedule_update_interval = 3 * 60  # run schedule every 3 minutes
-        self.scheduled_conversation_flag = False
-        self.last_trigger_time = None
+        # Own job list, so several managers in one process (the fleet load tool) do not share jobs
+        self.jobs = schedule.Scheduler()
+        self.job_runner = JobRunner(jobs=self.jobs)
+        self.timers = TimerEngine(on_fire=self.trigger_scheduled_conversation,
+                                  on_lead=self.prefetch_opener if prefetcher is not None else None,
+                                  lead_time=prefetcher.lead_time if prefetcher is not None else 0)
+        self.schedule_watcher = None
+        self._schedule_lock = threading.Lock()
 
         self.initialize()
 
     def initialize(self):
-        self.get_schedule()
-        every(self.schedule_update_interval).seconds.do(self.get_schedule)
-        every(self.schedule_update_interval).seconds.do(self.sensor.update_sensor_data)
+        self.timers.start()
+        # Schedule edits are pushed by a Firestore listener instead of being polled
+        self.schedule_watcher = self.fire_client.watch_schedule(self.apply_schedule)
+        self.sensor_sampler.start()
+        self.jobs.every(self.sensor_update_interval).seconds.do(self.sensor.update_sensor_data)
+        self.job_runner.start()
+        if self.telemetry_drain is not None:
+            self.telemetry_drain.start()
 
-    def get_schedule(self):
-        try:
-            new_schedule = self.fire_client.fetch_schedule()
-            if new_schedule != self.current_schedule:
-                self.current_schedule = new_schedule
-                self.set_next_schedule_check()
-            scheduler_logger.info("Schedule updated")
-        except Exception as e:
-            scheduler_logger.error(f"Failed to fetch schedule: {e}")
+    def stop(self):
+        if self.schedule_watcher is not None:
+            self.schedule_watcher.stop()
+        self.timers.stop()
+        scheduler_logger.info(f"Timers: {self.timers.stats()}")
+        self.job_runner.stop()
+        self.sensor_sampler.stop()
+        scheduler_logger.info(f"Sensor sampler: {self.sensor_sampler.stats()}")
+        if self.telemetry_drain is not None:
+            self.telemetry_drain.stop()
+            scheduler_logger.info(f"Telemetry drain: {self.telemetry_drain.stats()}")
 
-    def set_next_schedule_check(self):
-        if not self.current_schedule:
-            return
+    def apply_schedule(self, new_schedule):
+        """Called from the listener thread whenever the schedule document changes."""
+        with self._schedule_lock:
+            if new_schedule == self.current_schedule:
+                return
+            self.current_schedule = new_schedule
+            self.invalidate_prefetch()
+            self.timers.set_reminders(reminders_from_schedule(new_schedule))
+        scheduler_logger.info(f"Schedule updated: {new_schedule}")
 
-        now = datetime.datetime.now()
-        scheduled_time = now.replace(hour=int(self.current_schedule['hour']), 
-                                     minute=int(self.current_schedule['minute']), 
-                                     second=0, microsecond=0)
-        
-        if scheduled_time <= now:
-            scheduled_time += datetime.timedelta(days=1)
-        
-        time_diff = (scheduled_time - now).total_seconds()
-        check_time = max(time_diff - 30, 30)  
-        
-        clear('schedule_check')
-        every(check_time).seconds.do(self.trigger_scheduled_conversation).tag('schedule_check')
-        scheduler_logger.info(f"Next schedule check set for {check_time} seconds from now")
-
-    def trigger_scheduled_conversation(self):
-        now = datetime.datetime.now()
-        scheduled_time = now.replace(hour=int(self.current_schedule['hour']), 
-                                     minute=int(self.current_schedule['minute']), 
-                                     second=0, microsecond=0)
-        
-        time_diff = abs((now - scheduled_time).total_seconds())
-        if time_diff <= 30:
-            if (self.last_trigger_time is None or 
-                (now - self.last_trigger_time).total_seconds() > 300):
-                self.scheduled_conversation_flag = True
-                self.last_trigger_time = now
-                scheduler_logger.info(f"Triggering scheduled conversation at {now}")
-            else:
-                scheduler_logger.info(f"Skipping trigger as last trigger was too recent")
-        
-        self.set_next_schedule_check()
+    def prefetch_opener(self, reminder, key):
+        self.prefetcher.request(key)
+
+    def invalidate_prefetch(self):
+        if self.prefetcher is not None:
+            self.prefetcher.invalidate()
 
-    def check_scheduled_conversation(self):
-        if self.scheduled_conversation_flag:
-            self.scheduled_conversation_flag = False  
-            return True
-        return False
\ No newline at end of file
+    def trigger_scheduled_conversation(self, reminder, key):
+        # The prefetcher hands out the opener prepared for this key
+        self.last_trigger_key = key
+        scheduler_logger.info(f"Triggering scheduled conversation for {reminder}")
+        if self.on_trigger is not None:
+            self.on_trigger()
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+
+import asyncio
+import logging
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+startup_logger = logging.getLogger(__name__)
+
+class StartupTimer:
+    """Records when each startup phase began and finished, relative to process start."""
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases = {}
+        self.milestones = {}
+        self._lock = threading.Lock()
+
+    def _offset(self):
+        return time.monotonic() - self.started
+
+    @contextmanager
+    def phase(self, name):
+        start = self._offset()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = (start, self._offset(), threading.current_thread().name)
+
+    async def run(self, name, func, *args, **kwargs):
+        """Runs the blocking `func` on a worker thread as one timed phase."""
+        def timed():
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return await asyncio.to_thread(timed)
+
+    def milestone(self, name):
+        with self._lock:
+            self.milestones.setdefault(name, self._offset())
+
+    def report(self):
+        lines = [f"{'phase':<16}{'start ms':>10}{'end ms':>10}{'took ms':>10}  thread"]
+        for name, (start, end, thread) in sorted(self.phases.items(), key=lambda item: item[1][0]):
+            lines.append(f"{name:<16}{start * 1000:>10.0f}{end * 1000:>10.0f}{(end - start) * 1000:>10.0f}  {thread}")
+        for name, at in sorted(self.milestones.items(), key=lambda item: item[1]):
+            lines.append(f"{name:<16}{at * 1000:>10.0f}")
+        report = "\n".join(lines)
+        startup_logger.info(f"Startup timing:\n{report}")
+        return report
@@ -0,0 +1,15 @@
+import math
+
+def percentile(values, p):
+    """Nearest-rank percentile of `values` (p in 0-100); None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(values, percentiles=(50, 95, 99)):
+    summary = {'count': len(values)}
+    for p in percentiles:
+        summary[f"p{p}"] = percentile(values, p)
+    return summary
@@ -0,0 +1,83 @@
+from collections import deque
+from utils.stats import summarize
+
+import asyncio
+import datetime
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+supervisor_logger = logging.getLogger(__name__)
+
+class Component:
+    def __init__(self, name, check, restart):
+        self.name = name
+        self.check = check
+        self.restart = restart
+        self.restarts = 0
+
+    def healthy(self):
+        try:
+            return bool(self.check())
+        except Exception as e:
+            supervisor_logger.warning(f"Health check of {self.name} failed: {e}")
+            return False
+
+class Supervisor:
+    """Restarts only the subsystems that failed and keeps every other instance warm.
+
+    Each component has a cheap health check and an in-place restart. recover()
+    restarts the components whose check fails plus any the caller suspects, and
+    records how long each incident took to recover.
+    """
+    def __init__(self, components, history=100, on_incident=None):
+        self.components = {component.name: component for component in components}
+        self.incidents = deque(maxlen=history)
+        self.on_incident = on_incident
+
+    def unhealthy(self):
+        return [name for name, component in self.components.items() if not component.healthy()]
+
+    async def recover(self, suspects=(), error=None):
+        """Returns True once every restarted component passes its health check again."""
+        failed = list(dict.fromkeys([*self.unhealthy(), *(name for name in suspects if name in self.components)]))
+        recovered = True
+        for name in failed:
+            component = self.components[name]
+            started = time.monotonic()
+            try:
+                await asyncio.to_thread(component.restart)
+                ok = component.healthy()
+            except Exception as e:
+                supervisor_logger.error(f"Restarting {name} failed: {e}")
+                ok = False
+            component.restarts += 1
+            recovery_s = round(time.monotonic() - started, 4)
+            incident = {
+                'at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'component': name,
+                'error': str(error) if error is not None else None,
+                'recovered': ok,
+                'recovery_s': recovery_s,
+            }
+            self.incidents.append(incident)
+            if self.on_incident:
+                self.on_incident(incident)
+            supervisor_logger.info(f"Restarted {name} in {recovery_s * 1000:.0f} ms ({'ok' if ok else 'still failing'})")
+            recovered = recovered and ok
+        return recovered
+
+    async def restart_all(self, error=None):
+        return await self.recover(suspects=list(self.components), error=error)
+
+    def stats(self):
+        summary = {}
+        for name in self.components:
+            incidents = [incident for incident in self.incidents if incident['component'] == name]
+            if incidents:
+                summary[name] = {
+                    'incidents': len(incidents),
+                    'failed': sum(not incident['recovered'] for incident in incidents),
+                    'recovery_s': summarize([incident['recovery_s'] for incident in incidents], (50, 95)),
+                }
+        return summary
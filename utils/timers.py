@@ -0,0 +1,262 @@
+from collections import deque
+from utils.stats import summarize
+
+import datetime
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+timers_logger = logging.getLogger(__name__)
+
+_WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+class Reminder:
+    """One reminder time: daily, weekly on `days` (0 = Monday) or once on `date`.
+
+    Times are local wall-clock times. A time skipped by a DST change fires just
+    after the gap; a time repeated by one fires on its first occurrence only.
+    """
+    def __init__(self, reminder_id, hour, minute, days=None, date=None):
+        self.id = reminder_id
+        self.hour = hour
+        self.minute = minute
+        self.days = frozenset(days) if days else None
+        self.date = date
+
+    def __repr__(self):
+        if self.date is not None:
+            when = self.date.isoformat()
+        elif self.days is not None:
+            when = ','.join(_WEEKDAYS[day] for day in sorted(self.days))
+        else:
+            when = 'daily'
+        return f"Reminder({self.id} {self.hour:02d}:{self.minute:02d} {when})"
+
+    def __eq__(self, other):
+        return isinstance(other, Reminder) and self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
+
+    def _fields(self):
+        return (self.id, self.hour, self.minute, self.days, self.date)
+
+    def next_after(self, epoch):
+        """Epoch seconds of the first occurrence strictly after `epoch`, or None for a past one-off."""
+        if self.date is not None:
+            candidates = [self.date]
+        else:
+            today = datetime.datetime.fromtimestamp(epoch).date()
+            # Today may already be past, and a weekly reminder may be up to a week out
+            candidates = [today + datetime.timedelta(days=offset) for offset in range(8)]
+        for day in candidates:
+            if self.days is not None and day.weekday() not in self.days:
+                continue
+            # A naive local datetime maps through the local zone, including DST
+            at = datetime.datetime.combine(day, datetime.time(self.hour, self.minute)).timestamp()
+            if at > epoch:
+                return at
+        return None
+
+def _parse_days(days):
+    parsed = set()
+    for day in days:
+        parsed.add(_WEEKDAYS.index(day[:3].lower()) if isinstance(day, str) else int(day) % 7)
+    return parsed
+
+def reminders_from_schedule(schedule):
+    """Builds reminders from the schedule document.
+
+    Accepts the original single daily `hour`/`minute` fields and/or a `reminders`
+    list of {id, hour, minute, days?, date?} entries. Invalid entries are skipped.
+    """
+    entries = []
+    if 'hour' in schedule and 'minute' in schedule:
+        entries.append({'id': 'default', 'hour': schedule['hour'], 'minute': schedule['minute']})
+    entries.extend(schedule.get('reminders') or [])
+
+    reminders = []
+    for index, entry in enumerate(entries):
+        try:
+            hour, minute = int(entry['hour']), int(entry['minute'])
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise ValueError(f"{hour}:{minute} is not a time of day")
+            date = entry.get('date')
+            reminders.append(Reminder(
+                str(entry.get('id', index)), hour, minute,
+                days=_parse_days(entry['days']) if entry.get('days') else None,
+                date=datetime.date.fromisoformat(date) if isinstance(date, str) else date))
+        except (KeyError, TypeError, ValueError) as e:
+            timers_logger.error(f"Skipping invalid reminder {entry}: {e}")
+    return reminders
+
+class TimerEngine:
+    """Fires reminders at their wall-clock deadlines from one sleeping thread.
+
+    Pending deadlines live in a min-heap; the thread sleeps until the earliest
+    one, or for at most `max_sleep` seconds so that wall-clock jumps (NTP sync
+    after boot, manual changes) are noticed. After a jump every deadline is
+    recomputed. A deadline missed by more than `grace` seconds is skipped rather
+    than fired late, and each occurrence fires at most once even if the clock
+    goes back over it.
+
+    `on_fire(reminder, key)` runs on the timer thread at the deadline and
+    `on_lead(reminder, key)` runs `lead_time` seconds before it; both must
+    return quickly. `key` names the occurrence ("%Y-%m-%d %H:%M" local time),
+    so reminders set to the same minute fire one conversation.
+    """
+    def __init__(self, on_fire, on_lead=None, lead_time=0, grace=60, max_sleep=60, jump_threshold=2.0):
+        self.on_fire = on_fire
+        self.on_lead = on_lead
+        self.lead_time = lead_time
+        self.grace = grace
+        self.max_sleep = max_sleep
+        self.jump_threshold = jump_threshold
+
+        self.fired = 0
+        self.skipped = 0
+        self.jumps = 0
+        self.fire_delays = deque(maxlen=100)  # seconds between each deadline and its callback
+
+        self._reminders = ()
+        self._heap = []
+        self._seq = itertools.count()
+        self._generation = 0  # bumped on every reschedule; entries popped before it are not re-pushed
+        self._fired_keys = {}  # occurrence key -> deadline, pruned after a day
+        self._lead_key = None
+        self._condition = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="timer-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stop = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def set_reminders(self, reminders):
+        """Thread-safe: replaces every reminder and reschedules from now."""
+        with self._condition:
+            self._reminders = tuple(reminders)
+            self._lead_key = None  # the caller drops any opener prepared for the old schedule
+            self._reschedule(time.time())
+            self._condition.notify()
+        timers_logger.info(f"Timers set: {self.upcoming()}")
+
+    def upcoming(self, limit=5):
+        """(local time, reminder id) of the next deadlines, soonest first."""
+        with self._condition:
+            entries = sorted(entry for entry in self._heap if entry[2] == self._generation and entry[3] == 'fire')
+        return [(datetime.datetime.fromtimestamp(deadline).isoformat(timespec='minutes'), reminder.id)
+                for _, _, _, _, reminder, deadline in entries[:limit]]
+
+    def _reschedule(self, now):
+        self._generation += 1
+        self._heap = []
+        for reminder in self._reminders:
+            self._push(reminder, now)
+
+    def _push(self, reminder, after):
+        deadline = reminder.next_after(after)
+        if deadline is None:
+            return
+        # Entries carry the fire deadline, so a lead moved by the clamp below still names the same occurrence
+        heapq.heappush(self._heap, (deadline, next(self._seq), self._generation, 'fire', reminder, deadline))
+        if self.on_lead is not None and self.lead_time:
+            # A reminder set closer than the lead time is prepared right away
+            lead_at = max(deadline - self.lead_time, time.time())
+            heapq.heappush(self._heap, (lead_at, next(self._seq), self._generation, 'lead', reminder, deadline))
+
+    @staticmethod
+    def occurrence_key(deadline):
+        return datetime.datetime.fromtimestamp(deadline).strftime('%Y-%m-%d %H:%M')
+
+    def _run(self):
+        offset = time.time() - time.monotonic()
+        with self._condition:
+            while not self._stop:
+                now = time.time()
+                # Wall clock minus monotonic clock only moves when the wall clock is stepped
+                new_offset = now - time.monotonic()
+                if abs(new_offset - offset) > self.jump_threshold:
+                    self.jumps += 1
+                    timers_logger.warning(f"Clock jumped {new_offset - offset:+.0f}s, recomputing timers")
+                    for at, _, _, kind, reminder, _ in self._heap:
+                        if kind == 'fire' and at < now - self.grace:
+                            self.skipped += 1
+                            timers_logger.warning(f"Skipping {reminder} at {self.occurrence_key(at)}, jumped over")
+                    # Deadlines that passed within the grace period still fire
+                    self._reschedule(now - self.grace)
+                offset = new_offset
+
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    entry = heapq.heappop(self._heap)
+                    if entry[2] == self._generation:
+                        due.append(entry)
+                if due:
+                    # Callbacks run outside the lock so they may call back into the engine
+                    self._condition.release()
+                    try:
+                        for entry in due:
+                            self._handle(entry, now)
+                    finally:
+                        self._condition.acquire()
+                    continue
+
+                timeout = self.max_sleep
+                if self._heap:
+                    timeout = min(timeout, self._heap[0][0] - now)
+                self._condition.wait(timeout)
+
+    def _handle(self, entry, now):
+        _, _, generation, kind, reminder, deadline = entry
+        key = self.occurrence_key(deadline)
+        if kind == 'lead':
+            # Reminders sharing a minute share one prepared opener
+            if key not in self._fired_keys and key != self._lead_key:
+                self._lead_key = key
+                self._callback(self.on_lead, reminder, key)
+            return
+
+        with self._condition:
+            if generation == self._generation:
+                self._push(reminder, max(deadline, now))
+            fired_before = key in self._fired_keys
+            if not fired_before and now - deadline <= self.grace:
+                self._fired_keys[key] = deadline
+            self._fired_keys = {k: at for k, at in self._fired_keys.items() if at > now - 86400}
+
+        if fired_before:
+            timers_logger.info(f"{reminder} at {key} already fired")
+        elif now - deadline > self.grace:
+            self.skipped += 1
+            timers_logger.warning(f"Skipping {reminder} at {key}, missed by {now - deadline:.0f}s")
+        else:
+            self.fired += 1
+            self.fire_delays.append(time.time() - deadline)
+            timers_logger.info(f"Firing {reminder} at {key}")
+            self._callback(self.on_fire, reminder, key)
+
+    def _callback(self, callback, reminder, key):
+        try:
+            callback(reminder, key)
+        except Exception as e:
+            timers_logger.error(f"Timer callback for {reminder} failed: {e}")
+
+    def stats(self):
+        return {
+            'reminders': len(self._reminders),
+            'fired': self.fired,
+            'skipped': self.skipped,
+            'clock_jumps': self.jumps,
+            'fire_delay_s': summarize(list(self.fire_delays), (50, 95)),
+        }
@@ -0,0 +1,134 @@
+from logging.handlers import RotatingFileHandler
+
+import datetime
+import itertools
+import json
+import logging
+import os
+import time
+
+logging.basicConfig(level=logging.INFO)
+tracing_logger = logging.getLogger(__name__)
+
+# Timeline marks of one turn, in the order they normally happen
+TURN_MARKS = (
+    'wake_detected',
+    'listen_start',
+    'speech_onset',
+    'endpoint',
+    'upload_start',
+    'transcript_ready',
+    'first_llm_token',
+    'llm_done',
+    'first_tts_byte',
+    'playback_start',
+    'playback_end',
+)
+
+# stage -> (from mark, to mark)
+TURN_STAGES = {
+    'wake_to_listen': ('wake_detected', 'listen_start'),
+    'speech': ('speech_onset', 'endpoint'),
+    'endpoint_to_upload': ('endpoint', 'upload_start'),
+    'stt': ('upload_start', 'transcript_ready'),
+    'llm_first_token': ('transcript_ready', 'first_llm_token'),
+    'llm_total': ('transcript_ready', 'llm_done'),
+    'tts_first_byte': ('first_llm_token', 'first_tts_byte'),
+    'first_audio': ('endpoint', 'playback_start'),
+    'playback': ('playback_start', 'playback_end'),
+}
+
+class TurnTrace:
+    """Monotonic timestamps of one conversation turn.
+
+    Only the first occurrence of a mark is kept, so per-sentence code can mark
+    `first_tts_byte` or `playback_start` without tracking whether it was first.
+    """
+    def __init__(self, kind, turn_id=None, enabled=True):
+        self.kind = kind
+        self.turn_id = turn_id
+        self.enabled = enabled
+        self.started = time.monotonic()
+        self.started_at = datetime.datetime.now().isoformat(timespec='milliseconds')
+        self.marks = {}
+        self.fields = {}
+
+    def mark(self, name, at=None):
+        if self.enabled:
+            self.marks.setdefault(name, time.monotonic() if at is None else at)
+
+    def annotate(self, **fields):
+        if self.enabled:
+            self.fields.update(fields)
+
+    def stages(self):
+        durations = {}
+        for stage, (start, end) in TURN_STAGES.items():
+            if start in self.marks and end in self.marks:
+                durations[stage] = round(self.marks[end] - self.marks[start], 4)
+        if self.marks:
+            durations['turn'] = round(max(self.marks.values()) - min(self.marks.values()), 4)
+        return durations
+
+    def to_record(self):
+        origin = min(self.marks.values(), default=self.started)
+        return {
+            'turn_id': self.turn_id,
+            'kind': self.kind,
+            'started_at': self.started_at,
+            'marks': {name: round(at - origin, 4) for name, at in sorted(self.marks.items(), key=lambda item: item[1])},
+            'stages': self.stages(),
+            **self.fields,
+        }
+
+# Stands in wherever no turn is being traced
+NULL_TRACE = TurnTrace(kind=None, enabled=False)
+
+class TurnTracer:
+    """Writes each finished turn as one JSON line to a size-rotated local file."""
+    def __init__(self, path, max_bytes=1024 * 1024, backup_count=5):
+        self.path = path
+        self._ids = itertools.count(1)
+        self._session = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._logger = logging.getLogger(f"{__name__}.turns")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger.addHandler(handler)
+
+    def start(self, kind):
+        return TurnTrace(kind, turn_id=f"{self._session}-{next(self._ids)}")
+
+    def finish(self, trace, **fields):
+        if not trace.enabled:
+            return
+        trace.annotate(**fields)
+        record = trace.to_record()
+        try:
+            self._logger.info(json.dumps(record, ensure_ascii=False))
+        except Exception as e:
+            tracing_logger.warning(f"Failed to write turn trace: {e}")
+        tracing_logger.info(f"Turn {trace.turn_id} ({trace.kind}): {record['stages']}")
+
+def read_turns(path):
+    """Yields the turn records in `path` and its rotated backups, oldest first."""
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+
+    for file_path in list(reversed(backups)) + ([path] if os.path.exists(path) else []):
+        with open(file_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    tracing_logger.warning(f"Skipping malformed turn record in {file_path}")
@@ -0,0 +1,57 @@
+"""Wake-word detectors that WakeWord can run.
+
+A detector satisfies WakeWordDetector. `frame` is a read-only int16 array of
+`frame_length` samples at `sample_rate` Hz and `pointer` an optional ctypes
+int16 pointer to the same memory. process() runs on the audio thread once per
+frame and must not block.
+
+pico.pico.PicoVoiceTrigger (Porcupine) is the production detector.
+"""
+from typing import Protocol, runtime_checkable
+from utils.define import RATE
+
+import time
+
+@runtime_checkable
+class WakeWordDetector(Protocol):
+    frame_length: int
+    sample_rate: int
+
+    def process(self, frame, pointer=None) -> int:
+        """Index of the keyword heard in `frame`, or -1."""
+        ...
+
+    def delete(self) -> None:
+        """Releases the engine; the detector is not used afterwards."""
+        ...
+
+class StubDetector:
+    """Deterministic detector for replay benchmarks and tests; needs no AccessKey.
+
+    Fires keyword 0 on the frame numbers in `triggers` (counted from 0 across
+    all calls), or every `every` frames if given. `cost` seconds of busy work
+    per frame stands in for a real model's CPU time.
+    """
+    def __init__(self, frame_length=512, triggers=(), every=None, cost=0.0, sample_rate=RATE):
+        self.frame_length = frame_length
+        self.sample_rate = sample_rate
+        self.triggers = frozenset(triggers)
+        self.every = every
+        self.cost = cost
+        self.frames = 0
+        self.detections = 0
+
+    def process(self, frame, pointer=None):
+        index = self.frames
+        self.frames += 1
+        if self.cost:
+            until = time.perf_counter() + self.cost
+            while time.perf_counter() < until:
+                pass
+        if index in self.triggers or (self.every and index % self.every == self.every - 1):
+            self.detections += 1
+            return 0
+        return -1
+
+    def delete(self):
+        pass
@@ -1,117 +1,218 @@
+from audio.frames import FrameRing, PvFrameSource
 from display.setting import SettingMenu
 from pico.pico import PicoVoiceTrigger
 from utils.define import *
-from utils.scheduler import run_pending
-from utils.utils import is_exit_event_set
+from utils.utils import is_exit_event_set, exit_event
+from wakeword.detectors import WakeWordDetector
 
 from pvrecorder import PvRecorder
 
+import asyncio
 import logging
-import numpy as np
+import threading
 import time
 
 logging.basicConfig(level=logging.INFO)
 wakeword_logger = logging.getLogger(__name__)
 
 class WakeWord:
-    def __init__(self, args, audio_player, serial_module):
+    """Listens for the wake word on a dedicated audio thread and hands events to the event loop.
+
+    The audio thread only reads frames, calibrates the recorder and runs the
+    detector; the MCU buttons are polled on a second thread. Both post
+    (WakeWordType, error) events to an asyncio queue. Posting disarms the
+    listener, so exactly one event is delivered per arm() and the microphone is
+    released while the event is handled. Scheduled reminders arrive through
+    request_schedule() from the timer thread.
+    """
+    def __init__(self, args, audio_player, serial_module, detector: WakeWordDetector | None = None, audio_source=None):
+        """`detector` defaults to Porcupine built from `args` and `audio_source` to the PvRecorder microphone."""
         self.audio_player = audio_player
         self.serial_module = serial_module
-        self.pv_recorder = None 
+        self.audio_source = audio_source
+        self.source = None
         self.play_trigger = None
-        self.porcupine = PicoVoiceTrigger(args)
+        self.detected_at = None
+        self.detector = detector or PicoVoiceTrigger(args)
+        if self.detector.sample_rate != RATE:
+            raise ValueError(f"Wake-word detector expects {self.detector.sample_rate} Hz audio, "
+                             f"the recorder gives {RATE} Hz")
         self.setting_menu = SettingMenu(audio_player=self.audio_player, serial_module=self.serial_module)
-        
-    def initialize_recorder(self):
-        if self.pv_recorder is None:
+
+        self.button_check_interval = 1.5
+        self.calibration_interval = 5  # seconds of audio per energy recalibration
+        self.frames = FrameRing(self.detector.frame_length, RATE, seconds=self.calibration_interval)
+        self.listening = threading.Event()  # set once the first audio frame has been read
+        self.events = None
+        self._loop = None
+        self._armed = threading.Event()
+        self._closed = threading.Event()
+        self._post_lock = threading.Lock()
+        self._schedule_pending = threading.Event()
+        self._threads = []
+        self._py_recorder = None
+
+    def open_source(self):
+        if self.source is None:
             try:
-                self.pv_recorder = PvRecorder(frame_length=self.porcupine.frame_length)
+                self.source = self.audio_source or PvFrameSource(PvRecorder(frame_length=self.detector.frame_length))
             except Exception as e:
                 wakeword_logger.error(f"Failed to initialize recorder: {e}")
                 raise
-
-    def check_buttons(self):
+        return self.source
+
+    def start(self, loop, py_recorder):
+        """Starts the audio and button threads; they stay idle until arm()."""
+        self._loop = loop
+        self._py_recorder = py_recorder
+        self.events = asyncio.Queue()
+        self._threads = [
+            threading.Thread(target=self._listen, args=(py_recorder,), name="wake-word", daemon=True),
+            threading.Thread(target=self._poll_buttons, name="button-poller", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def is_healthy(self):
+        return bool(self._threads) and all(thread.is_alive() for thread in self._threads)
+
+    def restart(self):
+        """Restarts the audio threads and recorder; the detector and the settings menu stay loaded."""
+        self.close()
+        self.release_source()
+        self._closed.clear()
+        self._armed.clear()
+        self.start(self._loop, self._py_recorder)
+
+    def arm(self):
+        self._armed.set()
+        # A reminder that came due during a conversation starts right after it
+        self._post_pending_schedule()
+
+    def request_schedule(self):
+        """Thread-safe: posts a SCHEDULE event now, or at the next arm() if an event is being handled."""
+        self._schedule_pending.set()
+        self._post_pending_schedule()
+
+    def _post_pending_schedule(self):
+        if self._schedule_pending.is_set():
+            self._post(WakeWordType.SCHEDULE, consumes=self._schedule_pending)
+
+    def close(self):
+        self._closed.set()
+        self._armed.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2)
+        self._threads = []
+
+    def _post(self, trigger_type, error=None, consumes=None):
+        # Only the first event after arm() gets through; the rest were raced by it
+        with self._post_lock:
+            if not self._armed.is_set() or self._closed.is_set():
+                return False
+            self._armed.clear()
+            if consumes is not None:
+                consumes.clear()
+        self._loop.call_soon_threadsafe(self.events.put_nowait, (trigger_type, error))
+        return True
+
+    async def next_event(self):
+        """Waits for the next (WakeWordType, error) event; (OTHER, None) once the app is exiting."""
+        get_event = asyncio.ensure_future(self.events.get())
+        exiting = asyncio.ensure_future(exit_event.wait())
         try:
-            inputs = self.serial_module.get_inputs()
-            if inputs and 'result' in inputs:
-                result = inputs['result']
-                buttons = result.get('buttons', [])
-
-                if len(buttons) > 1 and buttons[1]:  # RIGHT button
-                    response = self.setting_menu.display_menu()
-                    if response:
-                        return response
-                    time.sleep(0.2)
-            return None
-        except Exception as e:
-            wakeword_logger.error(f"Error in check_buttons: {e}")
-            return None
-        
-    def listen_for_wake_word(self, schedule_manager, py_recorder):
+            await asyncio.wait({get_event, exiting}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            exiting.cancel()
+            if not get_event.done():
+                get_event.cancel()
+        if get_event.done() and not get_event.cancelled():
+            return get_event.result()
+        return WakeWordType.OTHER, None
+
+    def _wait_armed(self):
+        while not self._armed.wait(timeout=0.5):
+            if is_exit_event_set():
+                return False
+        return not self._closed.is_set() and not is_exit_event_set()
+
+    def _listen(self, py_recorder):
+        while self._wait_armed():
+            if self.play_trigger is None:
+                # The startup chime plays while the detector is already listening
+                threading.Thread(target=self.audio_player.play_trigger_with_logo, args=(TriggerAudio, SeamanLogo),
+                                 name="startup-chime", daemon=True).start()
+                self.play_trigger = True
+
+            try:
+                trigger_type = self.listen_for_wake_word(py_recorder)
+                if trigger_type is not None:
+                    self._post(trigger_type)
+            except Exception as e:
+                wakeword_logger.error(f"Error in wake word detection: {e}")
+                self._post(WakeWordType.OTHER, e)
+
+    def listen_for_wake_word(self, py_recorder):
+        """Reads frames until the wake word or disarm; runs on the audio thread.
+
+        Frames are read into the preallocated ring and shared read-only with
+        the detector and the calibration, so the loop allocates nothing per
+        frame. Returns OTHER if the audio source runs out (a replayed file).
+        """
         try:
-            self.initialize_recorder()
-            self.pv_recorder.start()
-
-            frame_bytes = []
-            calibration_interval = 5
-            last_button_check_time = time.time()
-            last_calibration_time = time.time()
-            button_check_interval = 1.5 # 1.5 -> check buttons every 1.5 seconds
-            detections = -1
-
-            while not is_exit_event_set():
-                run_pending()
-
-                if schedule_manager.check_scheduled_conversation():
-                    return True, WakeWordType.SCHEDULE
-
-                audio_frame = self.pv_recorder.read()
-                audio_frame_bytes = np.array(audio_frame, dtype=np.int16).tobytes()
-                frame_bytes.append(audio_frame_bytes)
-
-                current_time = time.time() # timestamp
-
-                if current_time - last_calibration_time >= calibration_interval:
-                    py_recorder.calibrate_energy_threshold(frame_bytes)
-
-                    frame_bytes = []
-                    last_calibration_time = current_time
-
-                if self.play_trigger is None:
-                    self.audio_player.play_trigger_with_logo(TriggerAudio, SeamanLogo)
-                    self.play_trigger = True
-                
-                detections = self.porcupine.process(audio_frame)
-                wake_word_triggered = detections >= 0
-                
-                if wake_word_triggered:
+            source = self.open_source()
+            source.start()
+            frames = self.frames
+            frames.reset()
+
+            while self._armed.is_set() and not self._closed.is_set() and not is_exit_event_set():
+                if not source.read_into(frames):
+                    return WakeWordType.OTHER
+                pointer = frames.pointer()
+                audio_frame = frames.commit()
+                self.listening.set()
+
+                if frames.wrapped():
+                    py_recorder.calibrate_energy_threshold(frames.window())
+
+                if self.detector.process(audio_frame, pointer) >= 0:
+                    self.detected_at = time.monotonic()
                     wakeword_logger.info("Wake word detected")
                     self.audio_player.play_audio(ResponseAudio)
-                    return True, WakeWordType.TRIGGER
-                
-                if current_time - last_button_check_time >= button_check_interval:
-                    res = self.check_buttons()
-                    
-                    if res == 'exit':
-                        self.audio_player.play_trigger_with_logo(TriggerAudio, SeamanLogo)
-                    
-                    last_button_check_time = current_time
-
-        except KeyboardInterrupt:
-            return False, WakeWordType.OTHER
-        except Exception as e:
-            wakeword_logger.error(f"Error in wake word detection: {e}")
-            raise
+                    return WakeWordType.TRIGGER
+            return None
         finally:
-            self.cleanup_recorder()
+            self.release_source()
+
+    def _poll_buttons(self):
+        while self._wait_armed():
+            if self.right_button_pressed():
+                self._post(WakeWordType.BUTTON)
+            self._closed.wait(self.button_check_interval)
 
-        return False, None
-    
-    def cleanup_recorder(self):
-        if self.pv_recorder:
+    def right_button_pressed(self):
+        try:
+            inputs = self.serial_module.get_inputs()
+            if inputs and 'result' in inputs:
+                buttons = inputs['result'].get('buttons', [])
+                return len(buttons) > 1 and bool(buttons[1])  # RIGHT button
+        except Exception as e:
+            wakeword_logger.error(f"Error in check_buttons: {e}")
+        return False
+
+    def open_settings(self):
+        response = self.setting_menu.display_menu()
+        if response == 'exit':
+            self.audio_player.play_trigger_with_logo(TriggerAudio, SeamanLogo)
+        elif not response:
+            time.sleep(0.2)
+        return response
+
+    def release_source(self):
+        if self.source is not None:
             try:
-                self.pv_recorder.stop()
-                self.pv_recorder.delete()
-                self.pv_recorder = None
+                self.source.release()
             except Exception as e:
-                wakeword_logger.error(f"Error cleaning up recorder: {e}")
\ No newline at end of file
+                wakeword_logger.error(f"Error cleaning up recorder: {e}")
+            self.source = None